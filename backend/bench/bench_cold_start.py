@@ -0,0 +1,71 @@
+# backend/bench/bench_cold_start.py
+#
+# Cold-start benchmark for the Mangum/Netlify function entry point.
+#
+#   poetry run python -m backend.bench.bench_cold_start --runs 5
+#
+# Every run starts a fresh interpreter, imports functions/api.py and serves a
+# first request, reporting import time, first-request latency and which heavy
+# libraries / shared clients were loaded along the way.
+
+import sys
+import json
+import statistics
+import subprocess
+
+import click
+
+HEAVY_MODULES = ("torch", "sentence_transformers", "pinecone", "openai", "psycopg2", "pypdf", "bs4")
+
+_PROBE = r"""
+import sys, time, json
+t0 = time.perf_counter()
+import backend.server.netlify.functions.api as api
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(api.app)
+t2 = time.perf_counter()
+resp = client.get(PATH)
+t3 = time.perf_counter()
+from backend.server.netlify.utils import container
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "first_request_ms": (t3 - t2) * 1000,
+    "status": resp.status_code,
+    "heavy_loaded": [m for m in HEAVY if m in sys.modules],
+    "clients_built": [n for n in ("pinecone_client", "pinecone_index", "embedder", "llm", "chunk_store")
+                      if getattr(container, n).built],
+}))
+"""
+
+
+def _probe(path: str) -> dict:
+    code = f"PATH = {path!r}\nHEAVY = {HEAVY_MODULES!r}\n" + _PROBE
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+@click.command()
+@click.option('--runs', default=5, show_default=True, help='Fresh interpreters to start')
+@click.option('--path', default='/openapi.json', show_default=True, help='First request to serve')
+@click.option('--out', default=None, help='Write results as JSON to this file')
+def main(runs, path, out):
+    """Measure import time and first-request latency of the API function."""
+    samples = [_probe(path) for _ in range(runs)]
+    results = {
+        "runs": runs,
+        "path": path,
+        "import_ms_p50": round(statistics.median(s["import_ms"] for s in samples), 1),
+        "first_request_ms_p50": round(statistics.median(s["first_request_ms"] for s in samples), 1),
+        "status": samples[-1]["status"],
+        "heavy_loaded": samples[-1]["heavy_loaded"],
+        "clients_built": samples[-1]["clients_built"],
+    }
+    click.echo(json.dumps(results, indent=2))
+    if out:
+        with open(out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
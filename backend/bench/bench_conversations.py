@@ -0,0 +1,131 @@
+# backend/bench/bench_conversations.py
+#
+# Conversation listing / history benchmark on a synthetic database.
+#
+#   poetry run python -m backend.bench.bench_conversations --messages 100000
+#
+# Compares the previous full ORM reads against the keyset-paginated,
+# column-only reads in functions/db/conversations.py.
+
+import os
+import json
+import time
+import random
+import statistics
+import tempfile
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from backend.server.netlify.functions.db.conversations import list_conversation_page, message_page
+from backend.server.netlify.functions.models.models import Base, Conversation, Message, User
+
+
+def _timeit(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+    }
+
+
+def seed(session, conversations: int, messages: int, long_fraction: float) -> tuple:
+    """
+    One heavy user; `long_fraction` of the messages go to a single long
+    conversation, the rest are spread evenly over the others.
+    """
+    session.execute(insert(User), [{"id": 1, "username": "heavy", "hashed_password": "x"}])
+    base = datetime(2025, 1, 1)
+    session.execute(insert(Conversation), [
+        {"id": i, "user_id": 1, "created_at": base + timedelta(minutes=i), "summary": f"conv {i}"}
+        for i in range(1, conversations + 1)
+    ])
+
+    long_count = int(messages * long_fraction)
+    rest = messages - long_count
+    rows = []
+    for n in range(messages):
+        conv_id = 1 if n < long_count else 2 + (n - long_count) % max(1, conversations - 1)
+        rows.append({
+            "conversation_id": conv_id,
+            "role": "user" if n % 2 == 0 else "assistant",
+            "content": "Care este limita de viteză în localitate? " * random.randint(1, 6),
+            "created_at": base + timedelta(seconds=n),
+        })
+        if len(rows) >= 10_000:
+            session.execute(insert(Message), rows)
+            rows = []
+    if rows:
+        session.execute(insert(Message), rows)
+    session.commit()
+    return 1, long_count, rest
+
+
+@click.command()
+@click.option('--database_url', default=None, help='SQLAlchemy URL; defaults to a temporary SQLite file')
+@click.option('--conversations', default=1000, show_default=True)
+@click.option('--messages', default=100_000, show_default=True)
+@click.option('--long_fraction', default=0.5, show_default=True, help='Share of messages in one long conversation')
+@click.option('--page_size', default=50, show_default=True)
+@click.option('--repeat', default=20, show_default=True)
+@click.option('--out', default=None, help='Write results as JSON to this file')
+def main(database_url, conversations, messages, long_fraction, page_size, repeat, out):
+    """Benchmark conversation listing and history reads."""
+    if database_url is None:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')}"
+    engine = create_engine(database_url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+
+    start = time.perf_counter()
+    long_id, long_count, _ = seed(db, conversations, messages, long_fraction)
+    click.echo(f"Seeded {messages} messages in {time.perf_counter() - start:.1f}s")
+
+    def old_list():
+        db.execute(
+            select(Conversation).where(Conversation.user_id == 1).order_by(Conversation.created_at.desc())
+        ).scalars().all()
+        db.expunge_all()
+
+    def new_list():
+        list_conversation_page(db, 1, page_size)
+
+    def old_history():
+        db.execute(
+            select(Message).where(Message.conversation_id == long_id).order_by(Message.created_at)
+        ).scalars().all()
+        db.expunge_all()
+
+    def new_history():
+        message_page(db, long_id, 1, page_size)
+
+    results = {
+        "database": engine.dialect.name,
+        "messages": messages,
+        "conversations": conversations,
+        "long_conversation_messages": long_count,
+        "page_size": page_size,
+        "list_full_orm": _timeit(old_list, repeat),
+        "list_keyset_page": _timeit(new_list, repeat),
+        "history_full_orm": _timeit(old_history, repeat),
+        "history_keyset_page": _timeit(new_history, repeat),
+    }
+    click.echo(json.dumps(results, indent=2))
+    if out:
+        with open(out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
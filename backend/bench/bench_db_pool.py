@@ -0,0 +1,236 @@
+# backend/bench/bench_db_pool.py
+#
+# Database connection load test: /chat at peak concurrency under each
+# connection strategy of functions/db/db.py.
+#
+#   poetry run python -m backend.bench.bench_db_pool --concurrency 64 --requests 256
+#   poetry run python -m backend.bench.bench_db_pool --database_url postgresql://... --max_connections 100
+#
+# Every mode serves the same burst of /chat turns (fake OpenAI with
+# --openai_latency_ms, so requests overlap the way real ones do) and reports:
+# connection acquisition latency (the X-DB-Acquire-Ms of each request), pings,
+# pool timeouts and failed requests, how long each checkout held its
+# connection, and the peak number of connections open at once against
+# --max_connections. Modes:
+#
+#   legacy   create_engine(url, pool_pre_ping=True): default QueuePool, ping per checkout
+#   queue    DB_POOL_MODE=queue with the DB_POOL_* settings (see --pool_size)
+#   null     DB_POOL_MODE=null (NullPool, one connection per checkout)
+#
+# Without --database_url a SQLite file is used; its writes are serialised, so
+# absolute latencies say more about SQLite than about the pool.
+
+import os
+import json
+import time
+import asyncio
+import logging
+import tempfile
+import threading
+
+import click
+
+from .stubs import FakeOpenAI, HashEmbedder, MemoryIndex, offline_environment
+
+WORKDIR = tempfile.mkdtemp(prefix="road-law-dbpool-")
+offline_environment(WORKDIR)   # before anything imports the server settings
+
+from sqlalchemy import create_engine, event   # noqa: E402
+
+from backend.server.netlify.functions.db import db as db_module   # noqa: E402
+from backend.server.netlify.functions.models.models import Base, User   # noqa: E402
+from backend.server.netlify.utils import container   # noqa: E402
+from backend.server.netlify.utils.auth import issue_token   # noqa: E402
+from backend.server.netlify.utils.metrics import DB_CONNECTIONS   # noqa: E402
+from backend.server.netlify.utils.settings import settings   # noqa: E402
+
+MODES = ("legacy", "queue", "null")
+
+
+def _pct(samples: list, q: float) -> float:
+    s = sorted(samples)
+    return round(s[min(len(s) - 1, int(len(s) * q))], 2) if s else 0.0
+
+
+class ConnectionWatch:
+    """Open and checked-out connections over time, from engine pool events."""
+
+    def __init__(self, engine):
+        self._lock = threading.Lock()
+        self.open = self.peak_open = 0
+        self.checked_out = self.peak_checked_out = 0
+        self.held_ms: list = []
+        self._since = {}
+        event.listen(engine, "connect", self._connect)
+        event.listen(engine, "close", self._close)
+        event.listen(engine, "checkout", self._checkout)
+        event.listen(engine, "checkin", self._checkin)
+
+    def _connect(self, dbapi_conn, record):
+        with self._lock:
+            self.open += 1
+            self.peak_open = max(self.peak_open, self.open)
+
+    def _close(self, dbapi_conn, record):
+        with self._lock:
+            self.open -= 1
+
+    def _checkout(self, dbapi_conn, record, proxy):
+        with self._lock:
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+            self._since[id(dbapi_conn)] = time.perf_counter()
+
+    def _checkin(self, dbapi_conn, record):
+        with self._lock:
+            self.checked_out -= 1
+            start = self._since.pop(id(dbapi_conn), None)
+            if start is not None:
+                self.held_ms.append((time.perf_counter() - start) * 1000)
+
+
+def build(mode: str, url: str):
+    if mode == "legacy":
+        return create_engine(url, pool_pre_ping=True)
+    return db_module.build_engine(url, mode=mode)
+
+
+def _events() -> dict:
+    return {labels[0]: sum(values) for labels, values in DB_CONNECTIONS.snapshot().items()}
+
+
+async def _burst(llm, user_id: int, requests: int, concurrency: int, turns: int) -> tuple:
+    import httpx
+    from backend.server.netlify.functions.api import app
+
+    headers = {"Authorization": f"Bearer {issue_token(user_id, False)}"}
+    acquire_ms, latencies = [], []
+    errors = 0
+    sem = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        async def session(n: int):
+            nonlocal errors
+            conv_id = None
+            for t in range(turns):
+                async with sem:
+                    start = time.perf_counter()
+                    resp = await client.post("/chat", headers=headers, json={
+                        "conversation_id": conv_id,
+                        "message": f"Întrebarea {t} din sesiunea {n}: care este limita de viteză?",
+                    })
+                    latencies.append((time.perf_counter() - start) * 1000)
+                if resp.status_code != 200:
+                    errors += 1
+                    return
+                acquire_ms.append(float(resp.headers.get("X-DB-Acquire-Ms", 0)))
+                conv_id = resp.json()["conversation_id"]
+
+        start = time.perf_counter()
+        await asyncio.gather(*(session(n) for n in range(max(1, requests // turns))))
+        elapsed = time.perf_counter() - start
+    await llm.aclose()
+    return acquire_ms, latencies, errors, elapsed
+
+
+def run_mode(mode: str, url: str, openai: FakeOpenAI, requests: int, concurrency: int, turns: int,
+             max_connections: int) -> dict:
+    from backend.server.netlify.utils.llm_cache import build_llm_cache
+    from backend.server.netlify.utils.openai_client import LLMClient
+
+    engine = build(mode, url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        user_id = conn.execute(
+            User.__table__.insert().values(username=f"bench-pool-{mode}", hashed_password="x")
+        ).inserted_primary_key[0]
+    engine.dispose()   # start the burst with a cold pool
+    watch = ConnectionWatch(engine)
+    db_module.get_engine.set(engine)
+
+    llm = LLMClient(api_key="offline", base_url=openai.base_url, max_in_flight=concurrency,
+                    cache=build_llm_cache())
+    container.llm.set(llm)
+    before = _events()
+    try:
+        acquire_ms, latencies, errors, elapsed = asyncio.run(_burst(llm, user_id, requests, concurrency, turns))
+    finally:
+        container.llm.reset()
+        db_module.get_engine.reset()
+    events = {k: v - before.get(k, 0) for k, v in _events().items()}
+    open_after = watch.open
+    engine.dispose()
+
+    return {
+        "mode": mode,
+        "requests": len(latencies),
+        "failed": errors,
+        "requests_per_s": round(len(latencies) / elapsed, 2),
+        "p95_ms": _pct(latencies, 0.95),
+        "acquire_p50_ms": _pct(acquire_ms, 0.5),
+        "acquire_p95_ms": _pct(acquire_ms, 0.95),
+        "acquire_p99_ms": _pct(acquire_ms, 0.99),
+        "held_p50_ms": _pct(watch.held_ms, 0.5),
+        "held_p95_ms": _pct(watch.held_ms, 0.95),
+        "checkouts": len(watch.held_ms),
+        "pings": int(events.get("pinged", 0)) if mode != "legacy" else len(watch.held_ms),
+        "timeouts": int(events.get("timeout", 0)),
+        "peak_checked_out": watch.peak_checked_out,
+        "peak_open": watch.peak_open,
+        "open_when_idle": open_after,
+        "within_max_connections": watch.peak_open <= max_connections,
+    }
+
+
+@click.command()
+@click.option('--mode', 'modes', multiple=True, type=click.Choice(MODES), default=list(MODES), show_default=True)
+@click.option('--database_url', default=None, help='Database to load (default: a temporary SQLite file)')
+@click.option('--requests', default=256, show_default=True, help='/chat turns per mode')
+@click.option('--turns', default=4, show_default=True, help='Turns per conversation')
+@click.option('--concurrency', default=64, show_default=True, help='Requests in flight at once')
+@click.option('--pool_size', default=None, type=int, help='DB_POOL_SIZE for the queue mode')
+@click.option('--max_overflow', default=None, type=int, help='DB_MAX_OVERFLOW for the queue mode')
+@click.option('--max_connections', default=100, show_default=True,
+              help="Connections the server accepts (Postgres max_connections), per process here")
+@click.option('--openai_latency_ms', default=300.0, show_default=True, help='Mean fake OpenAI latency')
+@click.option('--out', default=None, help='Write results as JSON to this file')
+def main(modes, database_url, requests, turns, concurrency, pool_size, max_overflow, max_connections,
+         openai_latency_ms, out):
+    """Load /chat under each database connection strategy and report connection usage."""
+    url = database_url or os.environ["DATABASE_URL"]
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    if pool_size is not None:
+        settings.DB_POOL_SIZE = pool_size
+    if max_overflow is not None:
+        settings.DB_MAX_OVERFLOW = max_overflow
+    container.embedder.set(HashEmbedder())
+    container.pinecone_index.set(MemoryIndex())
+    openai = FakeOpenAI(latency=openai_latency_ms / 1000, jitter=openai_latency_ms / 5000).start()
+
+    results = []
+    try:
+        for mode in modes:
+            click.echo(f"→ {mode}", err=True)
+            results.append(run_mode(mode, url, openai, requests, concurrency, turns, max_connections))
+    finally:
+        openai.stop()
+
+    click.echo(f"{'mode':7s} {'req/s':>6s} {'failed':>6s} {'acq p95':>8s} {'acq p99':>8s} {'held p95':>8s} "
+               f"{'pings':>6s} {'peak open':>9s} {'idle open':>9s}", err=True)
+    for r in results:
+        click.echo(
+            f"{r['mode']:7s} {r['requests_per_s']:6.1f} {r['failed']:6d} {r['acquire_p95_ms']:8.2f} "
+            f"{r['acquire_p99_ms']:8.2f} {r['held_p95_ms']:8.1f} {r['pings']:6d} {r['peak_open']:9d} "
+            f"{r['open_when_idle']:9d}",
+            err=True,
+        )
+    click.echo(json.dumps({"concurrency": concurrency, "max_connections": max_connections,
+                           "pool_size": settings.DB_POOL_SIZE, "max_overflow": settings.DB_MAX_OVERFLOW,
+                           "results": results}, indent=2))
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+# backend/bench/bench_html.py
+#
+# HTML parsing throughput and extracted-text size per parser backend, against
+# the path the crawler used before html_extract (two html.parser soups per
+# page: one for get_text, one for the links).
+#
+#   poetry run python -m backend.bench.bench_html --out html.json
+#   poetry run python -m backend.bench.bench_html --html_dir saved_pages/ --repeat 5
+#
+# Run it on real pages saved from legislatie.just.ro (--html_dir); those are
+# the numbers to quote. Without --html_dir the pages are SYNTHETIC: the
+# archived texts behind scrape_api/output/ are rebuilt and rendered by
+# stubs.render_page the way the fixture site serves them (act body plus
+# portal menus, table of contents and scripts). Their markup is simpler than
+# the portal's, so treat those results as a smoke test of relative cost, not
+# real throughput; the output says which kind of pages were measured.
+
+import os
+import glob
+import json
+import time
+from typing import List, Tuple
+
+import click
+
+from backend.scrape_api.html_extract import BACKENDS, extract_page, resolve_backend
+
+from .stubs import reconstruct_pages, render_page
+
+HERE = os.path.dirname(__file__)
+DEFAULT_OUTPUT_DIR = os.path.join(HERE, "..", "scrape_api", "output")
+
+
+def legacy_extract(content: bytes) -> Tuple[str, list]:
+    from bs4 import BeautifulSoup
+
+    text = BeautifulSoup(content, "html.parser").get_text(separator="\n", strip=True)
+    soup = BeautifulSoup(content, "html.parser")
+    links = [(a["href"].strip(), a.get_text(strip=True)) for a in soup.find_all("a", href=True)]
+    return text, links
+
+
+def load_pages(html_dir: str, output_dir: str, limit: int) -> List[bytes]:
+    if html_dir:
+        paths = sorted(glob.glob(os.path.join(html_dir, "**", "*.htm*"), recursive=True))
+        pages = []
+        for path in paths[:limit or None]:
+            with open(path, "rb") as f:
+                pages.append(f.read())
+        return pages
+    rebuilt = sorted(reconstruct_pages(output_dir).items())
+    return [render_page(p).encode("utf-8") for _, p in rebuilt[:limit or None]]
+
+
+def measure(fn, pages: List[bytes], repeat: int) -> dict:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [fn(page) for page in pages]
+        best = min(best, time.perf_counter() - start)
+    total = sum(len(p) for p in pages)
+    return {
+        "elapsed_s": round(best, 3),
+        "pages_per_s": round(len(pages) / best, 1),
+        "mb_per_s": round(total / best / 1e6, 2),
+        "text_chars": sum(len(t) for t, _ in results),
+        "links": sum(len(links) for _, links in results),
+    }
+
+
+@click.command()
+@click.option('--html_dir', default=None,
+              help='Directory of saved .html pages (default: synthetic pages rebuilt from the archive)')
+@click.option('--output_dir', default=DEFAULT_OUTPUT_DIR, help='Scraped JSON files to rebuild pages from')
+@click.option('--limit', default=0, help='Benchmark only the first N pages (0 = all)')
+@click.option('--repeat', default=3, show_default=True, help='Runs per backend; the fastest is reported')
+@click.option('--out', default=None, help='Write results as JSON to this file')
+def main(html_dir, output_dir, limit, repeat, out):
+    """Compare HTML parser backends on archived pages."""
+    pages = load_pages(html_dir, output_dir, limit)
+    source = html_dir or "synthetic (stubs.render_page; pass --html_dir for real pages)"
+    click.echo(f"{len(pages)} pages, {sum(len(p) for p in pages) / 1e6:.1f} MB, from {source}", err=True)
+
+    results = {"legacy (2× bs4 html.parser, full text)": measure(legacy_extract, pages, repeat)}
+    for name in BACKENDS:
+        try:
+            resolve_backend(name)
+        except ImportError:
+            click.echo(f"  {name}: not installed, skipped", err=True)
+            continue
+        results[name] = measure(lambda page, n=name: extract_page(page, backend=n), pages, repeat)
+
+    base = next(iter(results.values()))
+    click.echo(f"{'path':42s} {'pages/s':>9s} {'MB/s':>7s} {'speedup':>8s} {'text kept':>10s}", err=True)
+    for name, r in results.items():
+        r["speedup"] = round(base["elapsed_s"] / r["elapsed_s"], 2)
+        r["text_kept"] = round(r["text_chars"] / base["text_chars"], 3) if base["text_chars"] else 0.0
+        click.echo(
+            f"{name:42s} {r['pages_per_s']:9.1f} {r['mb_per_s']:7.2f} {r['speedup']:7.2f}× {r['text_kept']:10.1%}",
+            err=True,
+        )
+
+    report = {"pages": {"source": html_dir or "synthetic", "count": len(pages)}, "results": results}
+    click.echo(json.dumps(report, indent=2, ensure_ascii=False))
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# backend/bench/bench_login.py
+#
+# Login throughput benchmark: bcrypt verify inline on the event loop (the
+# previous login path) vs. the bounded PasswordHasher pool.
+#
+#   poetry run python -m backend.bench.bench_login --logins 64 --rounds 10
+#
+# Besides logins/s it reports event-loop lag measured by a heartbeat task,
+# i.e. how long every other request on the worker would have been stalled.
+
+import json
+import time
+import asyncio
+
+import click
+from passlib.context import CryptContext
+
+from backend.server.netlify.utils.passwords import PasswordHasher
+
+PASSWORD = "parola-de-test-123"
+
+
+async def _heartbeat(stop: asyncio.Event, lags: list, interval: float = 0.005) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - start - interval) * 1000)
+
+
+async def _run(login, logins: int, concurrency: int) -> dict:
+    lags: list = []
+    stop = asyncio.Event()
+    hb = asyncio.create_task(_heartbeat(stop, lags))
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            await login()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await hb
+
+    lags.sort()
+    return {
+        "logins_per_s": round(logins / elapsed, 2),
+        "elapsed_s": round(elapsed, 3),
+        "loop_lag_p50_ms": round(lags[len(lags) // 2], 2) if lags else None,
+        "loop_lag_max_ms": round(lags[-1], 2) if lags else None,
+    }
+
+
+@click.command()
+@click.option('--logins', default=64, show_default=True)
+@click.option('--concurrency', default=16, show_default=True)
+@click.option('--rounds', default=12, show_default=True, help='bcrypt cost')
+@click.option('--workers', default=2, show_default=True, help='PasswordHasher threads')
+@click.option('--out', default=None, help='Write results as JSON to this file')
+def main(logins, concurrency, rounds, workers, out):
+    """Benchmark login password verification throughput and event-loop stalls."""
+    ctx = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=rounds)
+    hashed = ctx.hash(PASSWORD)
+    hasher = PasswordHasher(rounds=rounds, workers=workers)
+
+    async def inline_login():
+        # previous path: user verify (+ admin verify for the admin account)
+        ctx.verify(PASSWORD, hashed)
+
+    async def pooled_login():
+        await hasher.verify_and_update(PASSWORD, hashed)
+
+    results = {
+        "rounds": rounds,
+        "workers": workers,
+        "logins": logins,
+        "concurrency": concurrency,
+        "inline": asyncio.run(_run(inline_login, logins, concurrency)),
+        "pooled": asyncio.run(_run(pooled_login, logins, concurrency)),
+    }
+    click.echo(json.dumps(results, indent=2))
+    if out:
+        with open(out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+# backend/bench/eval_retrieval.py
+#
+# Retrieval quality vs. latency on the local corpus, fully offline.
+#
+#   poetry run python -m backend.bench.eval_retrieval \
+#       --embedder hash --embedder sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2 \
+#       --chunking stored --chunking 120:30 --top_k 1 --top_k 5 --top_k 10 --out eval.json
+#
+# Each configuration (embedder × chunking) builds its own in-memory index from
+# scrape_api/output/ and then answers every question in the question set
+# through `query_handler`, once per top_k. Reported per configuration:
+# recall@k (share of questions with a gold chunk in the top k), MRR, query
+# latency p50/p95 and index size.
+#
+# Questions are JSON lines: {"id", "question", "gold": {"contains": [...], "urls": [...]}}.
+# A retrieved chunk is relevant when its text contains one of the `contains`
+# phrases (case, whitespace and cedilla/comma diacritics normalised) and, if
+# `urls` is given, its page URL starts with one of them.
+
+import os
+import json
+import time
+import asyncio
+import statistics
+import tempfile
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urldefrag
+
+import click
+
+from .stubs import HashEmbedder, MemoryIndex, offline_environment
+
+offline_environment(tempfile.mkdtemp(prefix="road-law-eval-"))   # before the server settings load
+
+from backend.scrape_api.acts import tag_acts   # noqa: E402
+from backend.scrape_api.html_parser import chunk_text   # noqa: E402
+from backend.scrape_api.loader import iter_chunk_batches   # noqa: E402
+from backend.scrape_api.chunk_store import slim_metadata   # noqa: E402
+from backend.scrape_api.upsert import vector_id   # noqa: E402
+from backend.server.netlify.functions.db.db import get_engine   # noqa: E402
+from backend.server.netlify.functions.models.models import Base   # noqa: E402
+from backend.server.netlify.utils import container   # noqa: E402
+
+from .stubs import reconstruct_pages   # noqa: E402
+
+HERE = os.path.dirname(__file__)
+DEFAULT_QUESTIONS = os.path.join(HERE, "data", "eval_questions.jsonl")
+DEFAULT_OUTPUT_DIR = os.path.join(HERE, "..", "scrape_api", "output")
+
+_DIACRITICS = str.maketrans({"ş": "ș", "ţ": "ț", "Ş": "ș", "Ţ": "ț"})
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().translate(_DIACRITICS).split())
+
+
+def load_questions(path: str) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        questions = [json.loads(line) for line in f if line.strip()]
+    for q in questions:
+        gold = q.setdefault("gold", {})
+        gold["contains"] = [normalize(p) for p in gold.get("contains", [])]
+        gold["urls"] = list(gold.get("urls", []))
+    return questions
+
+
+def is_relevant(gold: dict, url: str, text: str) -> bool:
+    if gold["urls"] and not any(urldefrag(url)[0].startswith(u) for u in gold["urls"]):
+        return False
+    if gold["contains"]:
+        norm = normalize(text)
+        return any(p in norm for p in gold["contains"])
+    return bool(gold["urls"])
+
+
+def build_chunks(output_dir: str, chunking: str) -> List[Tuple[str, Optional[int], str]]:
+    """
+    (url, chunk_index, text) rows: as stored in output/ ("stored"), or re-chunked
+    from the rebuilt page texts with chunk_text ("max_words:overlap").
+    """
+    if chunking == "stored":
+        return [(c["url"], c["chunk_index"], c["text"]) for b in iter_chunk_batches(output_dir) for c in b]
+    max_words, overlap = (int(x) for x in chunking.split(":"))
+    rows = []
+    for page in reconstruct_pages(output_dir).values():
+        for idx, txt in enumerate(chunk_text(page["text"], max_words=max_words, overlap=overlap)):
+            rows.append((page["url"], idx, txt))
+    return rows
+
+
+def _make_embedder(name: str):
+    if name == "hash":
+        return HashEmbedder()
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(name)
+
+
+async def _run_queries(questions: List[dict], top_k: int) -> Tuple[List[list], List[float]]:
+    from backend.server.netlify.functions.handlers.query import QueryRequest, query_handler
+
+    ranked, latencies = [], []
+    for q in questions:
+        start = time.perf_counter()
+        resp = await query_handler(QueryRequest(query=q["question"], top_k=top_k))
+        latencies.append((time.perf_counter() - start) * 1000)
+        ranked.append([m.id for m in resp.matches])
+    return ranked, latencies
+
+
+def evaluate(questions: List[dict], embedder_name: str, chunking: str, output_dir: str,
+             top_ks: List[int], batch_size: int) -> dict:
+    embedder = _make_embedder(embedder_name)
+    rows = build_chunks(output_dir, chunking)
+    ids = [vector_id(url, idx, txt) for url, idx, txt in rows]
+    by_id: Dict[str, Tuple[str, str]] = {vid: (url, txt) for vid, (url, _, txt) in zip(ids, rows)}
+    acts = tag_acts({"url": url, "chunk_index": idx, "text": txt} for url, idx, txt in rows)
+
+    index = MemoryIndex()
+    start = time.perf_counter()
+    for i in range(0, len(rows), batch_size):
+        batch = rows[i:i + batch_size]
+        vectors = embedder.encode([txt for _, _, txt in batch], batch_size=batch_size, show_progress_bar=False)
+        index.upsert([
+            (vid, vec.tolist(), slim_metadata({"url": url, "chunk_index": idx, "act": acts.get(url)}))
+            for vid, vec, (url, idx, _) in zip(ids[i:i + batch_size], vectors, batch)
+        ])
+    build_s = time.perf_counter() - start
+
+    container.embedder.set(embedder)
+    container.pinecone_index.set(index)
+
+    answerable = sum(
+        any(is_relevant(q["gold"], url, txt) for url, txt in by_id.values()) for q in questions
+    )
+
+    per_k = {}
+    mrr = 0.0
+    for k in sorted(top_ks):
+        ranked, latencies = asyncio.run(_run_queries(questions, k))
+        hits = 0
+        reciprocal = []
+        for q, result in zip(questions, ranked):
+            rank = next(
+                (r for r, vid in enumerate(result, 1) if vid in by_id and is_relevant(q["gold"], *by_id[vid])),
+                None,
+            )
+            hits += rank is not None
+            reciprocal.append(1.0 / rank if rank else 0.0)
+        latencies.sort()
+        per_k[f"recall@{k}"] = round(hits / len(questions), 4)
+        per_k[f"latency@{k}"] = {
+            "p50_ms": round(statistics.median(latencies), 2),
+            "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+        }
+        mrr = sum(reciprocal) / len(questions)   # largest k wins
+
+    dimension = index.dimension
+    stats = index.describe_index_stats()
+    return {
+        "embedder": embedder_name,
+        "chunking": chunking,
+        "questions": len(questions),
+        "answerable": answerable,
+        **per_k,
+        f"mrr@{max(top_ks)}": round(mrr, 4),
+        "index": {
+            "vectors": stats["total_vector_count"],
+            "vector_bytes": stats["total_vector_count"] * dimension * 4,
+            "text_bytes": sum(len(txt.encode("utf-8")) for _, _, txt in rows),
+            "build_s": round(build_s, 2),
+        },
+    }
+
+
+@click.command()
+@click.option('--questions', 'questions_path', default=DEFAULT_QUESTIONS, show_default=True)
+@click.option('--output_dir', default=DEFAULT_OUTPUT_DIR, help='Scraped JSON files to index')
+@click.option('--embedder', 'embedders', multiple=True, default=['hash'], show_default=True,
+              help='"hash" or a SentenceTransformer model name; repeat to compare')
+@click.option('--chunking', 'chunkings', multiple=True, default=['stored'], show_default=True,
+              help='"stored" (as in output/) or "max_words:overlap"; repeat to compare')
+@click.option('--top_k', 'top_ks', multiple=True, type=int, default=[1, 3, 5, 10], show_default=True)
+@click.option('--batch_size', default=256, show_default=True, help='Encode/upsert batch while indexing')
+@click.option('--out', default=None, help='Write results as JSON to this file')
+def main(questions_path, output_dir, embedders, chunkings, top_ks, batch_size, out):
+    """Report recall@k, MRR, latency and index size per retrieval configuration."""
+    questions = load_questions(questions_path)
+    Base.metadata.create_all(get_engine())   # generation registry read by query_handler
+    results = []
+    for embedder_name in embedders:
+        for chunking in chunkings:
+            click.echo(f"→ {embedder_name} / {chunking}", err=True)
+            results.append(evaluate(questions, embedder_name, chunking, output_dir, list(top_ks), batch_size))
+
+    k_max = max(top_ks)
+    click.echo(f"{'embedder':40s} {'chunking':9s} {'R@1':>6s} {f'R@{k_max}':>6s} {'MRR':>6s} "
+               f"{'p50 ms':>7s} {'vectors':>8s}", err=True)
+    for r in results:
+        click.echo(
+            f"{r['embedder'][-40:]:40s} {r['chunking']:9s} {r.get('recall@1', float('nan')):6.3f} "
+            f"{r[f'recall@{k_max}']:6.3f} {r[f'mrr@{k_max}']:6.3f} "
+            f"{r[f'latency@{k_max}']['p50_ms']:7.1f} {r['index']['vectors']:8d}",
+            err=True,
+        )
+
+    click.echo(json.dumps(results, indent=2, ensure_ascii=False))
+    if out:
+        with open(out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+# backend/bench/eval_vectors.py
+#
+# Recall, latency and footprint of the LocalIndex codecs against exact float32
+# search, fully offline.
+#
+#   poetry run python -m backend.bench.eval_vectors --codec float16 --codec pq --rescore 0 --rescore 100
+#   poetry run python -m backend.bench.eval_vectors --synthetic 1000000 --codec pq --queries 200
+#
+# The corpus is every stored chunk of scrape_api/output/ (or N synthetic
+# clustered vectors). Queries are the eval question set plus a sample of chunk
+# openings. For every codec (and, for pq, every re-score depth) the report
+# gives recall@k against the exact top k, query latency, the bytes scanned per
+# query (what must stay in RAM) and the bytes stored on disk.
+
+import os
+import json
+import time
+import random
+import shutil
+import statistics
+import tempfile
+from typing import List, Tuple
+
+import click
+import numpy as np
+
+from backend.scrape_api.loader import iter_chunk_batches
+from backend.scrape_api.vector_store import LocalIndex
+
+from .stubs import HashEmbedder
+
+HERE = os.path.dirname(__file__)
+DEFAULT_QUESTIONS = os.path.join(HERE, "data", "eval_questions.jsonl")
+DEFAULT_OUTPUT_DIR = os.path.join(HERE, "..", "scrape_api", "output")
+
+
+def _make_embedder(name: str):
+    if name == "hash":
+        return HashEmbedder()
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(name)
+
+
+def corpus_vectors(embedder, output_dir: str, questions_path: str, queries: int,
+                   batch_size: int) -> Tuple[np.ndarray, np.ndarray]:
+    texts = [c["text"] for b in iter_chunk_batches(output_dir) for c in b]
+    with open(questions_path, encoding="utf-8") as f:
+        query_texts = [json.loads(line)["question"] for line in f if line.strip()]
+    rng = random.Random(1)
+    query_texts += [" ".join(t.split()[:12]) for t in rng.sample(texts, min(queries, len(texts)))]
+    encode = lambda batch: embedder.encode(batch, batch_size=batch_size, show_progress_bar=False)
+    vectors = np.concatenate([encode(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)])
+    return np.asarray(vectors, dtype=np.float32), np.asarray(encode(query_texts), dtype=np.float32)
+
+
+def synthetic_vectors(n: int, dimension: int, queries: int, clusters: int = 1000) -> Tuple[np.ndarray, np.ndarray]:
+    """Clustered unit vectors, a rough stand-in for sentence embeddings."""
+    rng = np.random.default_rng(1)
+    centers = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    out = np.empty((n, dimension), dtype=np.float32)
+    for start in range(0, n, 100_000):
+        end = min(start + 100_000, n)
+        out[start:end] = centers[rng.integers(0, clusters, end - start)] \
+            + 0.6 * rng.standard_normal((end - start, dimension)).astype(np.float32)
+    q = centers[rng.integers(0, clusters, queries)] + 0.6 * rng.standard_normal((queries, dimension))
+    return out, q.astype(np.float32)
+
+
+def build(path: str, codec: str, vectors: np.ndarray, batch_size: int, pq_m: int) -> Tuple[LocalIndex, float]:
+    index = LocalIndex(path, dimension=vectors.shape[1], codec=codec, pq_m=pq_m or None)
+    start = time.perf_counter()
+    for i in range(0, len(vectors), batch_size):
+        index.upsert([(str(i + j), v, {}) for j, v in enumerate(vectors[i:i + batch_size])])
+    index.train()
+    index.flush()
+    return index, time.perf_counter() - start
+
+
+def search(index: LocalIndex, queries: np.ndarray, top_k: int) -> Tuple[List[List[str]], List[float]]:
+    ranked, latencies = [], []
+    for q in queries:
+        start = time.perf_counter()
+        resp = index.query(vector=q, top_k=top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ranked.append([m.id for m in resp.matches])
+    return ranked, latencies
+
+
+@click.command()
+@click.option('--embedder', 'embedder_name', default='hash', show_default=True,
+              help='"hash" or a SentenceTransformer model name')
+@click.option('--output_dir', default=DEFAULT_OUTPUT_DIR, help='Scraped JSON files to index')
+@click.option('--questions', 'questions_path', default=DEFAULT_QUESTIONS, show_default=True)
+@click.option('--synthetic', default=0, help='Index N synthetic vectors instead of the corpus')
+@click.option('--dimension', default=384, show_default=True, help='Synthetic vector dimension')
+@click.option('--codec', 'codecs', multiple=True, default=['float16', 'pq'], show_default=True,
+              help='Codec to compare with exact float32; repeat')
+@click.option('--rescore', 'rescores', multiple=True, type=int, default=[0, 50, 200], show_default=True,
+              help='pq candidates re-scored exactly (0 = PQ scores only); repeat')
+@click.option('--pq_m', default=0, help='PQ sub-vectors (default dimension/8)')
+@click.option('--queries', default=300, show_default=True, help='Chunk-opening queries added to the questions')
+@click.option('--top_k', default=10, show_default=True)
+@click.option('--batch_size', default=1024, show_default=True)
+@click.option('--workdir', default=None, help='Where index files go (default: a temp dir, removed after)')
+@click.option('--out', default=None, help='Write results as JSON to this file')
+def main(embedder_name, output_dir, questions_path, synthetic, dimension, codecs, rescores, pq_m, queries,
+         top_k, batch_size, workdir, out):
+    """Report recall@k vs. exact search, latency and footprint per vector codec."""
+    if synthetic:
+        vectors, qs = synthetic_vectors(synthetic, dimension, queries)
+    else:
+        vectors, qs = corpus_vectors(_make_embedder(embedder_name), output_dir, questions_path, queries, batch_size)
+    click.echo(f"{len(vectors)} vectors × {vectors.shape[1]}, {len(qs)} queries", err=True)
+
+    root = workdir or tempfile.mkdtemp(prefix="road-law-vectors-")
+    results = []
+    try:
+        exact_index, build_s = build(os.path.join(root, "float32"), "float32", vectors, batch_size, pq_m)
+        truth, latencies = search(exact_index, qs, top_k)
+        configs = [("float32", None, exact_index, build_s)]
+        for codec in codecs:
+            index, build_s = build(os.path.join(root, codec), codec, vectors, batch_size, pq_m)
+            for rescore in (rescores if codec == "pq" else [None]):
+                configs.append((codec, rescore, index, build_s))
+
+        for codec, rescore, index, build_s in configs:
+            if rescore is not None:
+                index.rescore = rescore
+            if codec == "float32":
+                ranked = truth
+            else:
+                ranked, latencies = search(index, qs, top_k)
+            recall = statistics.mean(
+                len(set(r) & set(t)) / len(t) for r, t in zip(ranked, truth) if t
+            )
+            latencies.sort()
+            footprint = index.footprint()
+            results.append({
+                "codec": codec,
+                "rescore": rescore,
+                f"recall@{top_k}": round(recall, 4),
+                "p50_ms": round(statistics.median(latencies), 2),
+                "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+                "scanned_bytes_per_vector": round(footprint["scanned_bytes"] / len(vectors), 1),
+                "ram_bytes_per_vector": round(
+                    (footprint["scanned_bytes"] + footprint["bookkeeping_bytes"]) / len(vectors), 1),
+                "stored_bytes_per_vector": round(footprint["stored_bytes"] / len(vectors), 1),
+                "build_s": round(build_s, 2),
+            })
+    finally:
+        if workdir is None:
+            shutil.rmtree(root, ignore_errors=True)
+
+    click.echo(f"{'codec':8s} {'rescore':>7s} {f'R@{top_k}':>7s} {'p50 ms':>7s} {'p95 ms':>7s} "
+               f"{'RAM B/vec':>9s} {'disk B/vec':>10s}", err=True)
+    for r in results:
+        click.echo(
+            f"{r['codec']:8s} {'-' if r['rescore'] is None else r['rescore']:>7} {r[f'recall@{top_k}']:7.3f} "
+            f"{r['p50_ms']:7.2f} {r['p95_ms']:7.2f} {r['ram_bytes_per_vector']:9.1f} "
+            f"{r['stored_bytes_per_vector']:10.1f}",
+            err=True,
+        )
+    click.echo(json.dumps(results, indent=2))
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
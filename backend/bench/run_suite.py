@@ -0,0 +1,520 @@
+# backend/bench/run_suite.py
+#
+# Offline end-to-end benchmark suite. Everything external is replaced by the
+# stand-ins in backend/bench/stubs.py, so runs are repeatable on any machine:
+#
+#   poetry run python -m backend.bench.run_suite --out results.json
+#   poetry run python -m backend.bench.run_suite --compare results.json --out new.json
+#
+# Scenarios (select with --scenarios crawl,chat,...):
+#   crawl          fixture site, depth 1            pages/s
+#   chunking       loader + chunk_text over output/ chunks/s
+#   embedding      one encode call vs BulkEncoder   chunks/s, padding
+#   ingest         POST /admin/ingest_legislation   vectors/s, latency
+#   chat           POST /chat, concurrent sessions  req/s, p50/p95/p99
+#   conversations  GET /conversations on seeded DB  p50/p95, SQL per request
+#   batch          query_handler per question vs    questions/s
+#                  POST /query/batch, /answer/batch
+#
+# Results are JSON: {"meta": {...}, "scenarios": {name: {metric: value}}}.
+# Metric names ending in _ms / _s are lower-is-better, _per_s higher-is-better;
+# --compare prints the relative change of each against a previous run and
+# exits non-zero when one regresses by more than --threshold.
+
+import os
+import sys
+import json
+import time
+import asyncio
+import functools
+import platform
+import tempfile
+import subprocess
+import statistics
+from datetime import datetime, timezone
+
+import click
+import numpy as np
+
+from .stubs import FakeOpenAI, FixtureSite, HashEmbedder, MemoryIndex, offline_environment
+
+WORKDIR = tempfile.mkdtemp(prefix="road-law-bench-")
+offline_environment(WORKDIR)   # before anything imports the server settings
+
+from sqlalchemy import create_engine   # noqa: E402
+from sqlalchemy.orm import sessionmaker   # noqa: E402
+
+from backend.scrape_api.html_parser import chunk_text   # noqa: E402
+from backend.scrape_api.loader import iter_chunk_batches   # noqa: E402
+from backend.server.netlify.functions.db import db as db_module   # noqa: E402
+from backend.server.netlify.functions.models.models import Base   # noqa: E402
+from backend.server.netlify.utils import container   # noqa: E402
+from backend.server.netlify.utils.auth import issue_token   # noqa: E402
+
+from .bench_conversations import seed   # noqa: E402
+
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "..", "scrape_api", "output")
+DEFAULT_QUESTIONS = os.path.join(os.path.dirname(__file__), "data", "eval_questions.jsonl")
+ALL_SCENARIOS = ("crawl", "chunking", "embedding", "ingest", "chat", "conversations", "batch")
+
+
+def _percentiles(samples_ms: list) -> dict:
+    s = sorted(samples_ms)
+    if not s:
+        return {}
+
+    def pick(q):
+        return round(s[min(len(s) - 1, int(len(s) * q))], 2)
+    return {"p50_ms": round(statistics.median(s), 2), "p95_ms": pick(0.95), "p99_ms": pick(0.99)}
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+class Env:
+    """Shared state of one suite run: stand-ins, database and API client."""
+
+    def __init__(self, output_dir: str, embedder: str, openai_latency: float, vector_latency: float,
+                 site_latency: float):
+        self.output_dir = output_dir
+        self.site = FixtureSite(output_dir, latency=site_latency).start()
+        self.openai = FakeOpenAI(latency=openai_latency, jitter=openai_latency / 5).start()
+        self.index = MemoryIndex(latency=vector_latency)
+
+        if embedder == "hash":
+            self.embedder_factory = HashEmbedder
+        else:
+            from sentence_transformers import SentenceTransformer
+            self.embedder_factory = functools.partial(SentenceTransformer, embedder)
+        self.embedder = self.embedder_factory()
+
+        self.engine = create_engine(os.environ["DATABASE_URL"], connect_args={"check_same_thread": False})
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+
+        db_module.get_engine.set(self.engine)
+        container.embedder.set(self.embedder)
+        container.pinecone_index.set(self.index)
+
+    def llm_client(self):
+        from backend.server.netlify.utils.llm_cache import build_llm_cache
+        from backend.server.netlify.utils.openai_client import LLMClient
+        return LLMClient(api_key="offline", base_url=self.openai.base_url, max_in_flight=64,
+                         cache=build_llm_cache())
+
+    def close(self) -> None:
+        self.site.stop()
+        self.openai.stop()
+        self.engine.dispose()
+
+
+# ─── Scenarios ──────────────────────────────────────────────────────────────
+def scenario_crawl(env: Env, opts: dict) -> dict:
+    from backend.scrape_api.crawler import crawl
+    from backend.scrape_api.frontier import Frontier
+
+    frontier = Frontier()
+    start = time.perf_counter()
+    pages = crawl(env.site.index_url, max_depth=1, frontier=frontier)
+    elapsed = time.perf_counter() - start
+    stats = frontier.summary()
+    frontier.close()
+    return {
+        "pages": len(pages),
+        "elapsed_s": round(elapsed, 3),
+        "pages_per_s": round(len(pages) / elapsed, 1),
+        "bytes": stats["bytes"],
+        "max_frontier": stats["max_frontier"],
+        "link_dedup_rate": stats["dedup_rate"],
+    }
+
+
+def scenario_chunking(env: Env, opts: dict) -> dict:
+    start = time.perf_counter()
+    loaded = sum(len(batch) for batch in iter_chunk_batches(env.output_dir, batch_size=256))
+    load_s = time.perf_counter() - start
+
+    texts = [p["text"] for p in env.site.pages.values()]
+    start = time.perf_counter()
+    chunks = sum(len(chunk_text(t)) for t in texts)
+    chunk_s = time.perf_counter() - start
+    return {
+        "loaded_chunks": loaded,
+        "load_s": round(load_s, 3),
+        "load_chunks_per_s": round(loaded / load_s, 1),
+        "chunked_chunks": chunks,
+        "chunk_s": round(chunk_s, 3),
+        "chunk_chunks_per_s": round(chunks / chunk_s, 1),
+    }
+
+
+def scenario_embedding(env: Env, opts: dict) -> dict:
+    from backend.scrape_api.encoder import BulkEncoder, token_lengths, padded_tokens
+
+    texts = [c["text"] for batch in iter_chunk_batches(env.output_dir) for c in batch][:opts["embed_limit"]]
+    start = time.perf_counter()
+    single = env.embedder.encode(texts, show_progress_bar=False)
+    single_s = time.perf_counter() - start
+
+    with BulkEncoder(env.embedder_factory, model=env.embedder, processes=opts["embed_processes"]) as encoder:
+        encoder.encode(texts[:256])   # pool start-up and one model load per worker are not counted
+        start = time.perf_counter()
+        bulk = encoder.encode(texts)
+        bulk_s = time.perf_counter() - start
+    assert len(bulk) == len(single) and np.allclose(bulk, single, atol=1e-3), "bulk encoder changed the output"
+
+    # padding of the same texts in arrival order, 32 per batch (the encode() default)
+    lengths = token_lengths(env.embedder, texts)
+    fixed = padded_tokens(lengths, [range(i, min(i + 32, len(texts))) for i in range(0, len(texts), 32)])
+    return {
+        "chunks": len(texts),
+        "processes": encoder.processes,
+        "single_call_s": round(single_s, 3),
+        "single_call_chunks_per_s": round(len(texts) / single_s, 1),
+        "elapsed_s": round(bulk_s, 3),
+        "chunks_per_s": round(len(texts) / bulk_s, 1),
+        "speedup": round(single_s / bulk_s, 2),
+        "arrival_order_padding": round(1 - sum(lengths) / fixed, 3),
+        "bucketed_padding": round(encoder.padding_ratio, 3),
+    }
+
+
+async def _ingest(env: Env) -> dict:
+    import httpx
+    from backend.server.netlify.functions.api import app
+
+    token = issue_token(0, True)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        start = time.perf_counter()
+        resp = await client.post(
+            "/admin/ingest_legislation",
+            json={"url": env.site.index_url},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        elapsed = time.perf_counter() - start
+    resp.raise_for_status()
+    body = resp.json()
+    return {
+        "vectors": body["inserted_chunks"],
+        "elapsed_s": round(elapsed, 3),
+        "vectors_per_s": round(body["inserted_chunks"] / elapsed, 1),
+        "upsert_vectors_per_s": body.get("vectors_per_second"),
+        "server_timing": resp.headers.get("Server-Timing"),
+    }
+
+
+def scenario_ingest(env: Env, opts: dict) -> dict:
+    from backend.server.netlify.functions.models.models import IngestedSource
+
+    with env.Session() as s:
+        s.query(IngestedSource).delete()
+        s.commit()
+    return asyncio.run(_ingest(env))
+
+
+async def _chat(env: Env, user_id: int, sessions: int, turns: int, concurrency: int) -> dict:
+    import httpx
+    from backend.server.netlify.functions.api import app
+
+    llm = env.llm_client()
+    container.llm.set(llm)
+    headers = {"Authorization": f"Bearer {issue_token(user_id, False)}"}
+    questions = [
+        "Care este limita de viteză în localitate?",
+        "Și în afara localității?",
+        "Ce amendă primesc dacă depășesc cu 30 km/h?",
+        "Se suspendă permisul?",
+    ]
+    latencies: list = []
+    errors = 0
+    sem = asyncio.Semaphore(concurrency)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        async def session(n: int):
+            nonlocal errors
+            conv_id = None
+            for t in range(turns):
+                async with sem:
+                    start = time.perf_counter()
+                    resp = await client.post("/chat", headers=headers, json={
+                        "conversation_id": conv_id,
+                        "message": questions[t % len(questions)],
+                    })
+                    latencies.append((time.perf_counter() - start) * 1000)
+                if resp.status_code != 200:
+                    errors += 1
+                    return
+                conv_id = resp.json()["conversation_id"]
+
+        start = time.perf_counter()
+        await asyncio.gather(*(session(n) for n in range(sessions)))
+        elapsed = time.perf_counter() - start
+
+    await llm.aclose()
+    container.llm.reset()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(len(latencies) / elapsed, 2),
+        **_percentiles(latencies),
+        "openai_calls": env.openai.requests,
+        "llm": llm.metrics.snapshot(),
+    }
+
+
+def _ensure_corpus(env: Env) -> None:
+    """Load output/ into the index and chunk store if ingest did not run."""
+    if env.index.describe_index_stats()["total_vector_count"]:
+        return
+    from backend.scrape_api.chunk_store import slim_metadata
+    from backend.scrape_api.upsert import vector_id
+
+    store = container.chunk_store()
+    for batch in iter_chunk_batches(env.output_dir):
+        ids = [vector_id(c["url"], c["chunk_index"], c["text"]) for c in batch]
+        vectors = env.embedder.encode([c["text"] for c in batch], show_progress_bar=False)
+        store.put_many((vid, c["url"], c["chunk_index"], c["text"]) for vid, c in zip(ids, batch))
+        env.index.upsert([(vid, v.tolist(), slim_metadata(c)) for vid, v, c in zip(ids, vectors, batch)])
+
+
+def _seed_user(env: Env) -> int:
+    from backend.server.netlify.functions.models.models import User
+
+    with env.Session() as s:
+        user = s.query(User).filter_by(username="bench-chat").first()
+        if user is None:
+            user = User(username="bench-chat", hashed_password="x")
+            s.add(user)
+            s.commit()
+        return user.id
+
+
+def scenario_chat(env: Env, opts: dict) -> dict:
+    _ensure_corpus(env)
+    env.openai.requests = 0
+    return asyncio.run(_chat(env, _seed_user(env), opts["chat_sessions"], opts["chat_turns"], opts["concurrency"]))
+
+
+def scenario_conversations(env: Env, opts: dict) -> dict:
+    from fastapi.testclient import TestClient
+    from backend.server.netlify.functions.api import app
+    from backend.server.netlify.functions.models.models import User
+
+    with env.Session() as s:
+        if s.get(User, 1) is None:
+            seed(s, opts["conversations"], opts["messages"], long_fraction=0.5)
+
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {issue_token(1, False)}"}
+    list_ms, history_ms, queries = [], [], []
+    for _ in range(opts["repeat"]):
+        start = time.perf_counter()
+        resp = client.get("/conversations", headers=headers, params={"limit": 50})
+        list_ms.append((time.perf_counter() - start) * 1000)
+        queries.append(int(resp.headers.get("X-DB-Queries", 0)))
+
+        start = time.perf_counter()
+        client.get("/conversations/1", headers=headers, params={"limit": 100})
+        history_ms.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "list": _percentiles(list_ms),
+        "history": _percentiles(history_ms),
+        "sql_per_list_request": max(queries),
+    }
+
+
+async def _batch(env: Env, questions: list) -> dict:
+    import httpx
+    from backend.server.netlify.functions.api import app
+    from backend.server.netlify.functions.handlers.query import query_handler
+    from backend.server.netlify.functions.schemas.schemas import QueryRequest
+
+    llm = env.llm_client()
+    container.llm.set(llm)
+    headers = {"Authorization": f"Bearer {issue_token(1, False)}"}
+    out = {"questions": len(questions), "unique": len(set(questions))}
+
+    # one question at a time, as a client of the single-query path would
+    env.index.calls["query"] = 0
+    start = time.perf_counter()
+    for q in questions:
+        await query_handler(QueryRequest(query=q))
+    elapsed = time.perf_counter() - start
+    out["sequential"] = {"questions_per_s": round(len(questions) / elapsed, 2),
+                         "vector_queries": env.index.calls["query"]}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        for endpoint in ("query", "answer"):
+            env.index.calls["query"] = 0
+            env.openai.requests = 0
+            lines, errors = 0, 0
+            start = time.perf_counter()
+            async with client.stream("POST", f"/{endpoint}/batch", headers=headers,
+                                     json={"queries": [{"query": q} for q in questions]}) as resp:
+                async for line in resp.aiter_lines():
+                    if not line:
+                        continue
+                    lines += 1
+                    errors += json.loads(line).get("error") is not None
+            elapsed = time.perf_counter() - start
+            out[f"{endpoint}_batch"] = {
+                "questions_per_s": round(lines / elapsed, 2),
+                "errors": errors,
+                "vector_queries": env.index.calls["query"],
+                "openai_calls": env.openai.requests,
+            }
+
+    await llm.aclose()
+    container.llm.reset()
+    return out
+
+
+def scenario_batch(env: Env, opts: dict) -> dict:
+    _ensure_corpus(env)
+    with open(DEFAULT_QUESTIONS, encoding="utf-8") as f:
+        questions = [json.loads(line)["question"] for line in f if line.strip()]
+    # cycle the eval set up to the batch size, numbering each round so no two
+    # questions are identical (repeats would be answered once and flatter the batch)
+    n = len(questions)
+    questions = [f"{questions[i % n]} ({i // n + 1})" for i in range(opts["batch_questions"])]
+    return asyncio.run(_batch(env, questions))
+
+
+SCENARIOS = {
+    "crawl": scenario_crawl,
+    "chunking": scenario_chunking,
+    "embedding": scenario_embedding,
+    "ingest": scenario_ingest,
+    "chat": scenario_chat,
+    "conversations": scenario_conversations,
+    "batch": scenario_batch,
+}
+
+
+# ─── Comparison ─────────────────────────────────────────────────────────────
+def _flatten(d: dict, prefix: str = "") -> dict:
+    out = {}
+    for k, v in d.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, dict):
+            out.update(_flatten(v, key + "."))
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            out[key] = v
+    return out
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """Relative change per comparable metric; returns the regressions."""
+    old = _flatten(baseline.get("scenarios", {}))
+    new = _flatten(current.get("scenarios", {}))
+    regressions = []
+    for key in sorted(old.keys() & new.keys()):
+        if ".llm." in key:
+            continue   # latency of the stand-in itself, informational only
+        leaf = key.rsplit(".", 1)[-1]
+        if leaf.endswith("_per_s"):
+            better = "higher"
+        elif leaf.endswith("_ms") or leaf.endswith("_s"):
+            better = "lower"
+        else:
+            continue
+        if not old[key]:
+            continue
+        change = (new[key] - old[key]) / old[key]
+        worse = change < -threshold if better == "higher" else change > threshold
+        click.echo(f"{key:55s} {old[key]:>12} -> {new[key]:>12}  {change:+7.1%}{'  REGRESSION' if worse else ''}")
+        if worse:
+            regressions.append(key)
+    return regressions
+
+
+@click.command()
+@click.option('--scenarios', default=",".join(ALL_SCENARIOS), show_default=True, help='Comma-separated subset')
+@click.option('--output_dir', default=DEFAULT_OUTPUT_DIR, help='Scraped JSON files replayed by the fixture site')
+@click.option('--embedder', default='hash', show_default=True,
+              help='"hash" for the dependency-free stand-in, or a SentenceTransformer model name')
+@click.option('--openai_latency_ms', default=300.0, show_default=True, help='Mean fake OpenAI latency')
+@click.option('--vector_latency_ms', default=20.0, show_default=True, help='Per-call MemoryIndex delay')
+@click.option('--site_latency_ms', default=0.0, show_default=True, help='Per-request fixture site delay')
+@click.option('--embed_limit', default=2000, show_default=True, help='Chunks encoded by the embedding scenario')
+@click.option('--embed_processes', default=0, show_default=True,
+              help='BulkEncoder processes in the embedding scenario (0 = one per CPU core)')
+@click.option('--chat_sessions', default=16, show_default=True)
+@click.option('--chat_turns', default=3, show_default=True, help='Turns per chat session')
+@click.option('--concurrency', default=8, show_default=True, help='Concurrent /chat requests')
+@click.option('--conversations', default=500, show_default=True, help='Seeded conversations')
+@click.option('--messages', default=20_000, show_default=True, help='Seeded messages')
+@click.option('--repeat', default=30, show_default=True, help='Samples per conversation-listing metric')
+@click.option('--batch_questions', default=200, show_default=True, help='Questions per batch request')
+@click.option('--out', default=None, help='Write results as JSON to this file')
+@click.option('--compare', 'baseline', default=None, help='Previous results JSON to compare against')
+@click.option('--threshold', default=0.2, show_default=True, help='Relative change counted as a regression')
+def main(scenarios, output_dir, embedder, openai_latency_ms, vector_latency_ms, site_latency_ms,
+         embed_limit, embed_processes, chat_sessions, chat_turns, concurrency, conversations, messages, repeat,
+         batch_questions, out, baseline, threshold):
+    """Run the offline benchmark scenarios and write machine-readable results."""
+    selected = [s.strip() for s in scenarios.split(",") if s.strip()]
+    unknown = set(selected) - set(SCENARIOS)
+    if unknown:
+        raise click.BadParameter(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    opts = {
+        "embed_limit": embed_limit,
+        "embed_processes": embed_processes,
+        "chat_sessions": chat_sessions,
+        "chat_turns": chat_turns,
+        "concurrency": concurrency,
+        "conversations": conversations,
+        "messages": messages,
+        "repeat": repeat,
+        "batch_questions": batch_questions,
+    }
+    env = Env(output_dir, embedder, openai_latency_ms / 1000, vector_latency_ms / 1000, site_latency_ms / 1000)
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "embedder": embedder,
+            "openai_latency_ms": openai_latency_ms,
+            "vector_latency_ms": vector_latency_ms,
+            "site_latency_ms": site_latency_ms,
+            **opts,
+        },
+        "scenarios": {},
+    }
+    try:
+        for name in selected:
+            click.echo(f"→ {name}", err=True)
+            results["scenarios"][name] = SCENARIOS[name](env, opts)
+    finally:
+        env.close()
+
+    click.echo(json.dumps(results, indent=2, ensure_ascii=False))
+    if out:
+        with open(out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    if baseline:
+        with open(baseline, encoding='utf-8') as f:
+            regressions = compare(json.load(f), results, threshold)
+        if regressions:
+            click.echo(f"{len(regressions)} metric(s) regressed by more than {threshold:.0%}", err=True)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,464 @@
+# backend/bench/stubs.py
+#
+# Local stand-ins for the external services, so benchmarks run offline and
+# repeatably:
+#
+#   FixtureSite   — HTTP server replaying the pages behind scrape_api/output/
+#   MemoryIndex   — in-memory vector store speaking the Pinecone `Index` API
+#   FakeOpenAI    — OpenAI-compatible HTTP server with configurable latency
+#   HashEmbedder  — dependency-free SentenceTransformer stand-in
+#
+# Each server runs on 127.0.0.1 in a background thread and is used as a
+# context manager:
+#
+#   with FixtureSite("backend/scrape_api/output") as site:
+#       crawl(site.index_url, max_depth=1)
+
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.parse import urldefrag, urlparse
+
+import numpy as np
+
+from backend.scrape_api.loader import list_chunk_files, read_chunk_file
+from backend.scrape_api.vector_store import matches_filter
+
+OVERLAP_WORDS = 50   # html_parser.chunk_text default
+
+
+class _Server:
+    """ThreadingHTTPServer on an ephemeral port, started/stopped as a context manager."""
+
+    handler_class: type = BaseHTTPRequestHandler
+
+    def __init__(self):
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> '_Server':
+        handler = type("Handler", (self.handler_class,), {"stub": self})
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str, head: bool = False) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+
+# ─── Fixture web site ───────────────────────────────────────────────────────
+def reconstruct_pages(output_dir: str) -> Dict[str, Dict[str, str]]:
+    """
+    Rebuild each crawled page's text from its overlapping chunks.
+
+    Returns {path?query: {"url", "name", "text"}} keyed the way the fixture
+    server routes requests.
+    """
+    pages: Dict[str, Dict[str, Any]] = {}
+    for path in list_chunk_files(output_dir):
+        try:
+            items = read_chunk_file(path)
+        except ValueError:
+            continue
+        for item in items:
+            url, _ = urldefrag(item.get("url") or "")
+            if not url:
+                continue
+            page = pages.setdefault(url, {"url": url, "name": item.get("name") or "", "chunks": {}})
+            page["chunks"][item.get("chunk_index") or 0] = item.get("text") or ""
+
+    out: Dict[str, Dict[str, str]] = {}
+    for url, page in pages.items():
+        words: List[str] = []
+        for i, idx in enumerate(sorted(page["chunks"])):
+            chunk_words = page["chunks"][idx].split()
+            words.extend(chunk_words if i == 0 else chunk_words[OVERLAP_WORDS:])
+        parsed = urlparse(url)
+        key = parsed.path + (f"?{parsed.query}" if parsed.query else "")
+        out[key] = {"url": url, "name": page["name"], "text": " ".join(words)}
+    return out
+
+
+def render_page(page: Dict[str, str], words_per_paragraph: int = 60) -> str:
+    """
+    HTML for a rebuilt page, shaped like a legislatie.just.ro act page: header,
+    menu, a table of contents and scripts around the act body in
+    #textdocumentleg, so parsers do realistic work and main-content extraction
+    has boilerplate to drop.
+    """
+    words = page["text"].split()
+    paragraphs = [
+        " ".join(words[i:i + words_per_paragraph]) for i in range(0, len(words), words_per_paragraph)
+    ]
+    menu = "".join(
+        f'<li><a href="/">{label}</a></li>'
+        for label in ("Acasă", "Despre Proiect", "Facilități Oferite", "Legături Utile", "GDPR")
+    )
+    toc = "".join(f'<li><a href="#p{i}">Articolul {i + 1}</a></li>' for i in range(len(paragraphs)))
+    body = "".join(f'<p id="p{i}"><span>{escape(p)}</span></p>' for i, p in enumerate(paragraphs))
+    return (
+        f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{escape(page['name'])}</title>"
+        f"<style>.S_ART{{font-weight:bold}}</style><script>var portal={{lang:'ro'}};</script></head>"
+        f"<body><header><div class=\"logo\">Portal Legislativ</div><nav><ul>{menu}</ul></nav></header>"
+        f"<div id=\"left\"><h3>Cuprinsul Actului</h3><ul>{toc}</ul></div>"
+        f"<div id=\"textdocumentleg\">{body}</div>"
+        f"<footer>Ministerul Justiției · Portal Legislativ</footer>"
+        f"<script>document.querySelectorAll('a').forEach(function(a){{}});</script></body></html>"
+    )
+
+
+class _SiteHandler(_QuietHandler):
+    def _serve(self, head: bool) -> None:
+        site: FixtureSite = self.stub
+        if site.latency:
+            time.sleep(site.latency)
+        if self.path in ("/", "/index.html"):
+            return self._send(200, site.index_html, "text/html; charset=utf-8", head)
+        page = site.pages.get(self.path)
+        if page is None:
+            return self._send(404, b"not found", "text/plain", head)
+        self._send(200, render_page(page).encode("utf-8"), "text/html; charset=utf-8", head)
+
+    def do_GET(self) -> None:
+        self._serve(head=False)
+
+    def do_HEAD(self) -> None:
+        self._serve(head=True)
+
+
+class FixtureSite(_Server):
+    """
+    Serves every page found in `output_dir` under its original path, plus an
+    index page at / linking to all of them (crawl it with max_depth=1).
+    """
+
+    handler_class = _SiteHandler
+
+    def __init__(self, output_dir: str, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.pages = reconstruct_pages(output_dir)
+        links = "".join(
+            f'<li><a href="{escape(path)}">{escape(p["name"])}</a></li>'
+            for path, p in sorted(self.pages.items())
+        )
+        self.index_html = f"<html><body><ul>{links}</ul></body></html>".encode("utf-8")
+
+    @property
+    def index_url(self) -> str:
+        return self.base_url + "/"
+
+
+# ─── Vector store ───────────────────────────────────────────────────────────
+@dataclass
+class _Namespace:
+    ids: List[str] = field(default_factory=list)
+    rows: Dict[str, int] = field(default_factory=dict)
+    metadata: List[dict] = field(default_factory=list)
+    buf: Optional[np.ndarray] = None   # grows by doubling; rows past len(ids) are unused
+
+    @property
+    def vectors(self) -> Optional[np.ndarray]:
+        return self.buf[:len(self.ids)] if self.ids else None
+
+    def append(self, block: np.ndarray) -> None:
+        n = len(self.ids) - len(block)
+        if self.buf is None or len(self.ids) > len(self.buf):
+            grown = np.zeros((max(1024, 2 * len(self.ids)), block.shape[1]), dtype=np.float32)
+            if self.buf is not None:
+                grown[:n] = self.buf[:n]
+            self.buf = grown
+        self.buf[n:len(self.ids)] = block
+
+
+class MemoryIndex:
+    """
+    Exact cosine search with the subset of the Pinecone `Index` interface the
+    app uses: upsert / query / fetch / delete / describe_index_stats.
+    `latency` adds a fixed delay per call to mimic the network round trip.
+    """
+
+    accepts_arrays = True
+
+    def __init__(self, dimension: int = 384, latency: float = 0.0):
+        self.dimension = dimension
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._namespaces: Dict[str, _Namespace] = {}
+        self.calls = {"upsert": 0, "query": 0}
+
+    def _wait(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+    def upsert(self, vectors: Sequence[Any], namespace: str = "", **_: Any) -> dict:
+        self._wait()
+        with self._lock:
+            self.calls["upsert"] += 1
+            ns = self._namespaces.setdefault(namespace, _Namespace())
+            pending: Dict[str, tuple] = {}
+            for v in vectors:
+                if isinstance(v, dict):
+                    vid, values, meta = v["id"], v["values"], v.get("metadata") or {}
+                else:
+                    vid, values, meta = v[0], v[1], (v[2] if len(v) > 2 else {}) or {}
+                vec = np.asarray(values, dtype=np.float32)
+                norm = np.linalg.norm(vec)
+                vec = vec / norm if norm else vec
+                if vid in ns.rows:
+                    ns.vectors[ns.rows[vid]] = vec
+                    ns.metadata[ns.rows[vid]] = meta
+                else:
+                    pending[vid] = (vec, meta)
+            if pending:
+                for vid, (_, meta) in pending.items():
+                    ns.rows[vid] = len(ns.ids)
+                    ns.ids.append(vid)
+                    ns.metadata.append(meta)
+                ns.append(np.stack([vec for vec, _ in pending.values()]))
+        return {"upserted_count": len(vectors)}
+
+    def query(self, vector: Sequence[float], top_k: int = 10, include_metadata: bool = False,
+              namespace: str = "", filter: Optional[dict] = None, **_: Any) -> SimpleNamespace:
+        self._wait()
+        with self._lock:
+            self.calls["query"] += 1
+            ns = self._namespaces.get(namespace)
+            if ns is None or ns.vectors is None:
+                return SimpleNamespace(matches=[], namespace=namespace)
+            q = np.asarray(vector, dtype=np.float32)
+            norm = np.linalg.norm(q)
+            scores = ns.vectors @ (q / norm if norm else q)
+            if filter:
+                mask = np.array([matches_filter(m, filter) for m in ns.metadata], dtype=bool)
+                scores = np.where(mask, scores, -np.inf)
+            k = min(top_k, len(ns.ids))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            matches = [
+                SimpleNamespace(
+                    id=ns.ids[i],
+                    score=float(scores[i]),
+                    metadata=dict(ns.metadata[i]) if include_metadata else None,
+                )
+                for i in top if np.isfinite(scores[i])
+            ]
+        return SimpleNamespace(matches=matches, namespace=namespace)
+
+    def fetch(self, ids: Sequence[str], namespace: str = "") -> SimpleNamespace:
+        with self._lock:
+            ns = self._namespaces.get(namespace, _Namespace())
+            found = {
+                vid: SimpleNamespace(id=vid, values=ns.vectors[ns.rows[vid]].tolist(),
+                                     metadata=ns.metadata[ns.rows[vid]])
+                for vid in ids if vid in ns.rows
+            }
+        return SimpleNamespace(vectors=found, namespace=namespace)
+
+    def delete(self, ids: Optional[Sequence[str]] = None, delete_all: bool = False,
+               namespace: str = "", **_: Any) -> dict:
+        with self._lock:
+            if delete_all:
+                self._namespaces.pop(namespace, None)
+                return {}
+            ns = self._namespaces.get(namespace)
+            if ns is None or not ids:
+                return {}
+            drop = set(ids)
+            keep = [i for i, vid in enumerate(ns.ids) if vid not in drop]
+            ns.ids = [ns.ids[i] for i in keep]
+            ns.metadata = [ns.metadata[i] for i in keep]
+            ns.buf = ns.buf[keep] if keep else None
+            ns.rows = {vid: i for i, vid in enumerate(ns.ids)}
+        return {}
+
+    def describe_index_stats(self, **_: Any) -> dict:
+        with self._lock:
+            namespaces = {name: {"vector_count": len(ns.ids)} for name, ns in self._namespaces.items()}
+        return {
+            "dimension": self.dimension,
+            "namespaces": namespaces,
+            "total_vector_count": sum(n["vector_count"] for n in namespaces.values()),
+        }
+
+
+# ─── Embeddings ─────────────────────────────────────────────────────────────
+class HashEmbedder:
+    """
+    Hashed bag-of-words vectors: deterministic and dependency-free, with
+    similar texts landing close together. Use when the real model is not
+    installed; its throughput says nothing about SentenceTransformer's.
+    """
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def _embed(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dimension, dtype=np.float32)
+        for word in text.lower().split():
+            h = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+            vec[h % self.dimension] += 1.0 if (h >> 32) & 1 else -1.0
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def encode(self, texts: Sequence[str], **_: Any) -> np.ndarray:
+        return np.stack([self._embed(t) for t in texts]) if texts else np.zeros((0, self.dimension))
+
+
+# ─── OpenAI ─────────────────────────────────────────────────────────────────
+class _OpenAIHandler(_QuietHandler):
+    def do_POST(self) -> None:
+        fake: FakeOpenAI = self.stub
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        fake.requests += 1
+
+        delay = max(0.0, random.gauss(fake.latency, fake.jitter))
+        if delay:
+            time.sleep(delay)
+        if fake.error_rate and random.random() < fake.error_rate:
+            body = json.dumps({"error": {"message": "Rate limit reached (fake)", "type": "requests"}}).encode()
+            self.send_response(429)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Retry-After", "0.05")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        if self.path.endswith("/chat/completions"):
+            body = fake.chat_response(payload)
+        elif self.path.endswith("/embeddings"):
+            body = fake.embedding_response(payload)
+        else:
+            return self._send(404, b'{"error": {"message": "not found"}}', "application/json")
+        self._send(200, json.dumps(body, ensure_ascii=False).encode("utf-8"), "application/json")
+
+
+class FakeOpenAI(_Server):
+    """
+    OpenAI-compatible server for /v1/chat/completions and /v1/embeddings.
+
+    Latency per call is drawn from N(latency, jitter) seconds; `error_rate`
+    answers that share of calls with 429 to exercise retries. Point the app
+    at `base_url` (OPENAI_BASE_URL).
+    """
+
+    handler_class = _OpenAIHandler
+
+    def __init__(self, latency: float = 0.3, jitter: float = 0.05, error_rate: float = 0.0,
+                 answer: str = "Conform legislației rutiere, răspunsul este cel din fragmentele citate."):
+        super().__init__()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.answer = answer
+        self.requests = 0
+        self._embedder = HashEmbedder(1536)
+
+    @property
+    def base_url(self) -> str:
+        return super().base_url + "/v1"
+
+    def chat_response(self, payload: dict) -> dict:
+        messages = payload.get("messages") or []
+        prompt = "\n".join(m.get("content") or "" for m in messages)
+        if "You are a classifier" in prompt:
+            content = "LEGISLATION"
+        elif "question rewriting assistant" in prompt and messages:
+            # echo the quoted follow-up back as the "standalone" question
+            last = messages[-1].get("content") or ""
+            content = last.split('"', 1)[1].rsplit('"', 1)[0] if last.count('"') >= 2 else last
+        else:
+            content = self.answer
+        prompt_tokens = len(prompt) // 4 + 4 * len(messages)
+        completion_tokens = len(content) // 4 + 1
+        return {
+            "id": f"chatcmpl-fake-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "gpt-4o-mini"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def embedding_response(self, payload: dict) -> dict:
+        texts = payload.get("input") or []
+        if isinstance(texts, str):
+            texts = [texts]
+        vectors = self._embedder.encode(texts)
+        return {
+            "object": "list",
+            "model": payload.get("model", "text-embedding-3-small"),
+            "data": [{"object": "embedding", "index": i, "embedding": v.tolist()} for i, v in enumerate(vectors)],
+            "usage": {"prompt_tokens": sum(len(t) // 4 for t in texts), "total_tokens": sum(len(t) // 4 for t in texts)},
+        }
+
+
+def offline_environment(workdir: str) -> Dict[str, str]:
+    """
+    Settings for running the app against the stand-ins; existing environment
+    variables win. Must be applied before the server's settings are imported.
+    """
+    env = {
+        "OPENAI_API_KEY": "offline",
+        "PINECONE_API_KEY": "offline",
+        "PINECONE_ENV": "offline",
+        "PINECONE_INDEX": "offline",
+        "JWT_SECRET": "offline-bench-secret",
+        "DB_USER": "bench", "DB_PASSWORD": "bench", "DB_HOST": "localhost", "DB_PORT": "0", "DB_NAME": "bench",
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.sqlite3')}",
+        "ADMIN_USERNAME": "admin",
+        "ADMIN_PASSWORD_HASH": "unused-offline",
+        "CHUNK_STORE_PATH": os.path.join(os.path.abspath(workdir), "chunks.sqlite3"),
+    }
+    for key, value in env.items():
+        os.environ.setdefault(key, value)
+    return env
@@ -0,0 +1,124 @@
+# backend/scrape_api/acts.py
+#
+# Which legal act a chunk belongs to, and which acts a question is about.
+#
+# Acts are named canonically as "<TYPE> <number>/<year>", e.g. "OUG 195/2002",
+# "HG 1391/2006", "LEGE 38/2003". At ingest every chunk gets the act of its
+# document (parsed from the page header, "LEGE (A) 38 20/01/2003 - Portal
+# Legislativ" or "ORDONANȚĂ nr. 7 din 29 ianuarie 2010 ...") as `act`
+# metadata. At query time the same names are recognised in free text
+# ("O.U.G. nr. 195/2002", "Legea 38 din 2003", "codul rutier") so retrieval
+# can be scoped to them with a vector-store metadata filter.
+
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+# (canonical type, pattern over lower-case ASCII text); longer forms first
+_TYPES = (
+    ("OUG", r"o\.?\s?u\.?\s?g\.?|ord(?:onant(?:a|ei|e))?\.?\s+de\s+urgenta(?:\s+a\s+guvernului)?"),
+    ("OG", r"o\.?\s?g\.?|ordonant(?:a|ei|e)(?:\s+a)?(?:\s+guvernului)?"),
+    ("HG", r"h\.?\s?g\.?|hot(?:arar|arir)(?:e|ea|ii)(?:\s+a)?(?:\s+guvernului)?"),
+    ("LEGE", r"leg(?:e|ea|ii)"),
+    ("ORDIN", r"ordin(?:ul|ului)?"),
+    ("DECRET", r"decret(?:ul|ului)?"),
+    ("REGULAMENT UE", r"regulament(?:ul|ului)?\s+\(?ue\)?"),
+)
+_MENTION = re.compile(
+    r"\b(?:" + "|".join(f"(?P<t{i}>{p})" for i, (_, p) in enumerate(_TYPES)) + r")"
+    r"\s*(?:\([ar]\)\s*)?(?:nr\.?\s*)?(?P<number>\d\.\d{3}|\d{1,4})"
+    r"\s*(?:/\s*|\s+din\s+(?:\d{1,2}(?:\s+[a-z]+\s+|[./]\d{1,2}[./]))?)(?P<year>\d{4})\b"
+)
+# Page header on legislatie.just.ro: "LEGE (A) 38 20/01/2003", "ORD DE URGENTA 21 29/03/2019"
+_HEADER = re.compile(
+    r"^\s*(?:" + "|".join(f"(?P<t{i}>{p})" for i, (_, p) in enumerate(_TYPES)) + r")"
+    r"\s*(?:\([ar]\)\s*)?(?P<number>\d{1,4})\s+\d{2}/\d{2}/(?P<year>\d{4})\b"
+)
+# Names users give the main acts instead of their number
+ALIASES = (
+    (re.compile(r"\bcod(?:ul|ului)\s+rutier\b"), "OUG 195/2002"),
+    (re.compile(r"\bregulament(?:ul|ului)\s+de\s+aplicare\b"), "HG 1391/2006"),
+)
+
+
+def _fold(text: str) -> str:
+    """Lower-case ASCII: diacritics (ș/ş, ț/ţ, ă, â, î) dropped."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _name(match: re.Match) -> str:
+    kind = next(_TYPES[i][0] for i in range(len(_TYPES)) if match.group(f"t{i}"))
+    return f"{kind} {int(match.group('number').replace('.', ''))}/{match.group('year')}"
+
+
+def mentioned_acts(text: str) -> List[str]:
+    """Canonical names of the acts `text` refers to, in order of first mention."""
+    folded = _fold(text or "")
+    found = [(m.start(), _name(m)) for m in _MENTION.finditer(folded)]
+    found += [(m.start(), act) for pattern, act in ALIASES for m in pattern.finditer(folded)]
+    seen: List[str] = []
+    for _, act in sorted(found):
+        if act not in seen:
+            seen.append(act)
+    return seen
+
+
+def act_from_header(text: str) -> Optional[str]:
+    """The act a document's first chunk introduces, or None."""
+    folded = _fold(text or "")
+    m = _HEADER.match(folded)
+    if m is not None:
+        return _name(m)
+    acts = mentioned_acts(folded[:200])
+    return acts[0] if acts else None
+
+
+def canonical_act(name: str) -> str:
+    """"o.u.g. nr. 195/2002" -> "OUG 195/2002"; names that do not parse are kept as given."""
+    acts = mentioned_acts(name)
+    return acts[0] if acts else name.strip()
+
+
+def tag_acts(items: Iterable[Dict], known: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Set item["act"] on chunk dicts from the header in their document's first
+    chunk (chunk_index 0, or a single unchunked text). `known` maps URL -> act
+    and carries over between calls, for callers streaming one document across
+    batches. Returns it.
+    """
+    known = {} if known is None else known
+    items = list(items)
+    for item in items:
+        url = item.get("url")
+        if url not in known and item.get("chunk_index") in (0, None):
+            act = act_from_header(item.get("text", ""))
+            if act:
+                known[url] = act
+    for item in items:
+        act = known.get(item.get("url"))
+        if act:
+            item["act"] = act
+    return known
+
+
+def metadata_filter(acts: Iterable[str] = (), url: Optional[str] = None,
+                    version: Optional[str] = None) -> Optional[dict]:
+    """
+    Pinecone metadata filter restricting a query to `acts` (any of), a page
+    `url` and/or a document `version` (the legislatie.just.ro document id,
+    stored as `name`). None when nothing restricts the query.
+    """
+    clauses = []
+    acts = list(dict.fromkeys(acts))
+    if len(acts) == 1:
+        clauses.append({"act": {"$eq": acts[0]}})
+    elif acts:
+        clauses.append({"act": {"$in": acts}})
+    if url:
+        clauses.append({"url": {"$eq": url}})
+    if version:
+        clauses.append({"name": {"$eq": version}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
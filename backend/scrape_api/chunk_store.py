@@ -0,0 +1,132 @@
+# backend/scrape_api/chunk_store.py
+
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Metadata fields small enough to keep on the vector itself; the chunk text
+# lives in the ChunkStore, keyed by vector ID, when there is a shared one.
+VECTOR_METADATA_FIELDS = ('url', 'name', 'chunk_index', 'act')
+
+# SQLite caps bound parameters per statement (999 on older builds)
+_MAX_PARAMS = 900
+
+
+def slim_metadata(item: Dict) -> Dict:
+    """
+    Return the vector-store metadata for a chunk: small fields only, no text.
+    None values are dropped since Pinecone rejects null metadata.
+    """
+    return {k: item[k] for k in VECTOR_METADATA_FIELDS if item.get(k) is not None}
+
+
+def vector_metadata(item: Dict, with_text: bool) -> Dict:
+    """
+    slim_metadata plus, `with_text`, the chunk text: for vectors whose text is
+    not written to a chunk store every server process reads.
+    """
+    meta = slim_metadata(item)
+    if with_text and item.get('text'):
+        meta['text'] = item['text']
+    return meta
+
+
+class ChunkStore:
+    """
+    Local SQLite table of chunk texts keyed by vector ID.
+
+    Safe to share between threads; writes are serialized behind a lock and the
+    database runs in WAL mode so readers are not blocked by an ingest.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS chunks ('
+            '  id          TEXT PRIMARY KEY,'
+            '  url         TEXT,'
+            '  chunk_index INTEGER,'
+            '  text        TEXT NOT NULL'
+            ')'
+        )
+        self._conn.commit()
+
+    def put_many(self, rows: Iterable[Tuple[str, Optional[str], Optional[int], str]]) -> int:
+        """
+        Insert or replace (id, url, chunk_index, text) rows in one transaction.
+        """
+        rows = list(rows)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO chunks (id, url, chunk_index, text) VALUES (?, ?, ?, ?)',
+                rows,
+            )
+        return len(rows)
+
+    def get_many(self, ids: List[str]) -> Dict[str, str]:
+        """
+        Fetch texts for `ids` in bulk. Missing IDs are simply absent from the result.
+        """
+        out: Dict[str, str] = {}
+        for i in range(0, len(ids), _MAX_PARAMS):
+            part = ids[i:i + _MAX_PARAMS]
+            marks = ','.join('?' * len(part))
+            with self._lock:
+                cur = self._conn.execute(f'SELECT id, text FROM chunks WHERE id IN ({marks})', part)
+                out.update(cur.fetchall())
+        return out
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM chunks').fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ChunkTextCache:
+    """
+    Bounded in-memory LRU in front of a ChunkStore. Misses are fetched in one bulk query.
+    """
+
+    def __init__(self, store: ChunkStore, maxsize: int = 4096):
+        self.store = store
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data: 'OrderedDict[str, str]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, ids: List[str]) -> Dict[str, str]:
+        return self.lookup(ids)[0]
+
+    def lookup(self, ids: List[str]) -> Tuple[Dict[str, str], int]:
+        """Like get_many, also returning how many IDs were served from memory."""
+        found: Dict[str, str] = {}
+        missing: List[str] = []
+        with self._lock:
+            for vid in ids:
+                if vid in self._data:
+                    self._data.move_to_end(vid)
+                    found[vid] = self._data[vid]
+                else:
+                    missing.append(vid)
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        if missing:
+            fetched = self.store.get_many(missing)
+            found.update(fetched)
+            with self._lock:
+                for vid, text in fetched.items():
+                    self._data[vid] = text
+                    self._data.move_to_end(vid)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+        return found, len(ids) - len(missing)
@@ -1,12 +1,16 @@
 import json
 import os
+import logging
 import click
 from urllib.parse import urlparse, unquote, quote_plus
 from .crawler import crawl
+from .frontier import Frontier
 from .html_parser import parse_html, chunk_text
 from uuid import uuid4
 from uvicorn import run
 
+logger = logging.getLogger(__name__)
+
 def get_name_from_url(url: str) -> str:
     """
     Derive a filesystem-safe human-readable name from a URL by extracting the last path segment
@@ -16,12 +20,12 @@ def get_name_from_url(url: str) -> str:
     segment = parsed.path.rstrip('/').split('/')[-1]
     name = unquote(segment) if segment else ''
     
-    print('name: ', name)
+    logger.debug("name from %s: %r", url, name)
     if name == "PDF":
         return str(uuid4())
     if not name:
         # fallback to URL-encoded host+path
-        print('not name...')
+        logger.debug("no path segment in %s; using encoded host+path", url)
         name = quote_plus(parsed.netloc + parsed.path)
     # Replace or remove problematic filesystem chars
     return name.replace(' ', '_')
@@ -29,12 +33,31 @@ def get_name_from_url(url: str) -> str:
 @click.command()
 @click.argument('start_url')
 @click.option('--out_dir', default='output', help='Directory to store per-URL JSON files')
-def main(start_url, out_dir):
+@click.option('--max_depth', default=1, show_default=True, help='Link levels followed from START_URL')
+@click.option('--checkpoint', default=None,
+              help='SQLite file holding the crawl frontier; rerun with the same file to resume')
+@click.option('--max_pages', type=int, default=None, help='Stop after this many fetched pages (across resumes)')
+@click.option('--max_bytes', type=int, default=None, help='Stop after downloading this many bytes (across resumes)')
+def main(start_url, out_dir, max_depth, checkpoint, max_pages, max_bytes):
     """Crawl and parse legislation site; write one JSON file per parsed URL."""
     # Ensure output directory exists
     os.makedirs(out_dir, exist_ok=True)
 
-    data = crawl(start_url, max_depth=1)
+    frontier = Frontier(checkpoint or ':memory:')
+    if frontier.resumed:
+        click.echo(f"Resuming crawl from {checkpoint}: {frontier.summary()['pages']} pages done, "
+                   f"{len(frontier)} queued")
+    try:
+        data = crawl(start_url, max_depth=max_depth, frontier=frontier,
+                     max_pages=max_pages, max_bytes=max_bytes)
+        stats = frontier.summary()
+    finally:
+        frontier.close()
+    click.echo(
+        f"Crawled {stats['pages']} pages ({stats['bytes']} bytes, {stats['failed']} failed); "
+        f"{stats['frontier']} URLs left in the frontier (peak {stats['max_frontier']}), "
+        f"link dedup rate {stats['dedup_rate']:.1%}"
+    )
     # Group entries by URL
     grouped = {}
     for e in data:
@@ -1,12 +1,15 @@
 # src/scraper/crawler.py
 
+import logging
+from typing import Optional
+
 import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
+from .frontier import Frontier
+from .html_extract import extract_page
 from .pdf_extractor import extract_text as extract_pdf_text
 
-# Keep track of visited URLs to avoid infinite loops
-visited = set()
+logger = logging.getLogger(__name__)
 
 
 def is_pdf_link(url: str) -> bool:
@@ -32,88 +35,138 @@ def is_pdf_link(url: str) -> bool:
     return False
 
 
-def get_links(page_url: str) -> list[dict]:
-    """
-    Fetch an HTML page and extract all internal <a> links on the same domain.
-
-    Returns:
-        A list of dicts with:
-          - 'text': link text
-          - 'url': absolute URL
-    """
-    resp = requests.get(page_url)
-    resp.raise_for_status()
-    soup = BeautifulSoup(resp.content, 'html.parser')
+def _same_domain_links(raw_links: list[tuple[str, str]], page_url: str) -> list[dict]:
     base = urlparse(page_url).netloc
     links = []
 
-    for a in soup.find_all('a', href=True):
-        href = a['href'].strip()
-        full_url = urljoin(page_url, href)
+    for href, text in raw_links:
+        full_url = urljoin(page_url, href.strip())
         parsed = urlparse(full_url)
 
         # Only follow links within the same domain
         if parsed.netloc.endswith(base):
             links.append({
-                'text': a.get_text(strip=True),
+                'text': text,
                 'url': full_url
             })
-            
-    print('links: ', links)
+
+    logger.debug("found %d same-domain links on %s", len(links), page_url)
 
     return links
 
 
+def get_links(page_url: str) -> list[dict]:
+    """
+    Fetch an HTML page and extract all internal <a> links on the same domain.
+
+    Returns:
+        A list of dicts with:
+          - 'text': link text
+          - 'url': absolute URL
+    """
+    return fetch_html(page_url)[1]
+
+
 def extract_html_text(page_url: str) -> str:
     """
-    Download an HTML page and return its visible text.
+    Download an HTML page and return the text of its main content region.
+    """
+    return fetch_html(page_url, with_links=False)[0]
+
+
+def fetch_html(page_url: str, with_links: bool = True) -> tuple[str, list[dict], int]:
+    """
+    Download an HTML page once and return (main-content text, same-domain links, bytes).
+    The parser backend comes from HTML_PARSER (see html_extract.py).
     """
-    print('page_url: ', page_url)
+    logger.debug("fetching %s", page_url)
     resp = requests.get(page_url)
     resp.raise_for_status()
-    soup = BeautifulSoup(resp.content, 'html.parser')
-    return soup.get_text(separator='\n', strip=True)
+    text, raw_links = extract_page(resp.content)
+    links = _same_domain_links(raw_links, page_url) if with_links else []
+    return text, links, len(resp.content)
 
 
-def crawl(start_url: str, max_depth: int = 1) -> list[dict]:
+def score_link(start_url: str, link: dict) -> float:
+    """
+    Crawl priority of a discovered link within its depth: pages under the start
+    URL's directory and PDF documents (acts) are fetched before the rest.
+    """
+    start_dir = urlparse(start_url).path.rsplit('/', 1)[0]
+    path = urlparse(link['url']).path
+    score = 0.0
+    if path.startswith(start_dir):
+        score += 1.0
+    if path.lower().endswith('.pdf') or '/pdf' in path.lower():
+        score += 1.0
+    return score
+
+
+def crawl(
+    start_url: str,
+    max_depth: int = 1,
+    frontier: Optional[Frontier] = None,
+    max_pages: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> list[dict]:
     """
     Crawl from start_url up to max_depth levels (0 = only start_url, 1 = start_url + direct children).
     Returns a list of entries: {'type','url','text','links'?}
-    """
-    parsed = []
 
-    def _crawl(url: str, depth: int):
-        if url in visited or depth > max_depth:
-            return
-        visited.add(url)
+    Pages are taken from `frontier` (an in-memory one by default) shallowest
+    and best-scored first. With a checkpointed Frontier an interrupted crawl
+    resumes where it stopped and the result includes the earlier pages. The
+    crawl stops early, leaving the rest queued, once `max_pages` pages or
+    `max_bytes` downloaded bytes (totals across resumes) are reached.
+    """
+    own = frontier is None
+    if own:
+        frontier = Frontier()
+    if not frontier.resumed:
+        frontier.push(start_url, 0, score=1.0)
 
-        # Handle PDF links immediately
-        if is_pdf_link(url):
+    try:
+        while True:
+            if max_pages is not None and frontier.stats['pages'] >= max_pages:
+                logger.info("page budget of %d reached; %d URLs left queued", max_pages, len(frontier))
+                break
+            if max_bytes is not None and frontier.stats['bytes'] >= max_bytes:
+                logger.info("byte budget of %d reached; %d URLs left queued", max_bytes, len(frontier))
+                break
+            nxt = frontier.pop()
+            if nxt is None:
+                break
+            url, depth = nxt
+
+            # Handle PDF links immediately
+            if is_pdf_link(url):
+                nbytes = 0
+                try:
+                    resp = requests.get(url)
+                    resp.raise_for_status()
+                    nbytes = len(resp.content)
+                    text = extract_pdf_text(resp.content)
+                except Exception:
+                    text = ''
+                frontier.done(url, {'type': 'pdf', 'url': url, 'text': text}, nbytes)
+                continue
+
+            # Handle HTML page
             try:
-                resp = requests.get(url)
-                resp.raise_for_status()
-                text = extract_pdf_text(resp.content)
+                text, children, nbytes = fetch_html(url, with_links=depth < max_depth)
             except Exception:
-                text = ''
-            parsed.append({'type': 'pdf', 'url': url, 'text': text})
-            return
-
-        # Handle HTML page
-        try:
-            text = extract_html_text(url)
-            children = []
-            if depth < max_depth:
-                children = get_links(url)
-        except Exception:
-            return
-
-        parsed.append({'type': 'html', 'url': url, 'text': text, 'links': children})
-        # Only recurse one more level
-        if depth < max_depth:
-            for child in children:
-                _crawl(child['url'], depth + 1)
+                frontier.done(url, None)
+                continue
 
-    _crawl(start_url, 0)
-    return parsed
-
-    
\ No newline at end of file
+            # children are queued before the page is marked done, so a
+            # checkpoint never holds a finished page with its links missing
+            for child in children:
+                frontier.push(child['url'], depth + 1, score=score_link(start_url, child))
+            frontier.done(url, {'type': 'html', 'url': url, 'text': text, 'links': children}, nbytes)
+
+        frontier.checkpoint()
+        logger.info("crawl stats: %s", frontier.summary())
+        return frontier.entries()
+    finally:
+        if own:
+            frontier.close()
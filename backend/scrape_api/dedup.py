@@ -0,0 +1,127 @@
+# backend/scrape_api/dedup.py
+#
+# Near-duplicate chunk detection with MinHash + banded LSH.
+#
+# Crawled acts repeat a lot of text (portal boilerplate, publication notes,
+# consolidated versions of the same law, amending acts quoting whole
+# articles). Each chunk gets a MinHash signature over its word shingles; the
+# signature is split into bands and any chunk sharing a band bucket with an
+# earlier one is a candidate, confirmed when the estimated Jaccard similarity
+# reaches `threshold`. With the defaults (64 hashes, 8 bands of 8 rows) pairs
+# above ~0.8 similarity are found with high probability.
+#
+# Used at query time to collapse near-identical matches (see
+# `collapse_matches`). Ingest keeps every chunk: each page, and so every
+# consolidated version and act, holds its own copy of shared text and stays
+# retrievable by a url / version / act filter.
+
+import zlib
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_MASK32 = np.uint64(0xFFFFFFFF)
+
+
+def shingles(text: str, size: int = 5) -> np.ndarray:
+    """32-bit hashes of the overlapping `size`-word shingles of `text` (lowercased)."""
+    words = text.lower().split()
+    if len(words) <= size:
+        grams = [" ".join(words)]
+    else:
+        grams = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in set(grams)), dtype=np.uint64)
+
+
+class NearDuplicateIndex:
+    """
+    Streaming MinHash LSH index.
+
+        index = NearDuplicateIndex()
+        for key, text in chunks:
+            canonical = index.check_and_add(key, text)
+            if canonical is not None:
+                ...  # near-duplicate of `canonical`
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 8, threshold: float = 0.8,
+                 shingle_size: int = 5, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        rng = np.random.default_rng(seed)
+        # multiply-shift hashing: h(x) = (a*x + b) >> 32, wrapping in uint64
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self._buckets: List[Dict[bytes, List[Hashable]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+        self.seen = 0
+        self.duplicates = 0
+
+    def signature(self, text: str) -> np.ndarray:
+        x = shingles(text, self.shingle_size)
+        with np.errstate(over="ignore"):
+            hashed = (self._a[:, None] * x[None, :] + self._b[:, None]) >> np.uint64(32)
+        return (hashed & _MASK32).min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, sig: np.ndarray) -> List[bytes]:
+        return [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def query(self, sig: np.ndarray) -> Optional[Tuple[Hashable, float]]:
+        """Most similar indexed key at or above the threshold, with its similarity."""
+        best: Optional[Tuple[Hashable, float]] = None
+        checked = set()
+        for band, key in zip(self._buckets, self._band_keys(sig)):
+            for other in band.get(key, ()):
+                if other in checked:
+                    continue
+                checked.add(other)
+                sim = float(np.count_nonzero(self._signatures[other] == sig)) / self.num_perm
+                if sim >= self.threshold and (best is None or sim > best[1]):
+                    best = (other, sim)
+        return best
+
+    def add(self, key: Hashable, sig: np.ndarray) -> None:
+        self._signatures[key] = sig
+        for band, bkey in zip(self._buckets, self._band_keys(sig)):
+            band.setdefault(bkey, []).append(key)
+
+    def check_and_add(self, key: Hashable, text: str) -> Optional[Hashable]:
+        """Return the key this text near-duplicates, or index it and return None."""
+        self.seen += 1
+        sig = self.signature(text)
+        hit = self.query(sig)
+        if hit is not None:
+            self.duplicates += 1
+            return hit[0]
+        self.add(key, sig)
+        return None
+
+    @property
+    def dedup_ratio(self) -> float:
+        """Share of checked chunks that were near-duplicates."""
+        return self.duplicates / self.seen if self.seen else 0.0
+
+
+def collapse_matches(matches: Sequence, texts: Dict[str, str], threshold: float = 0.8,
+                     limit: Optional[int] = None) -> Tuple[list, int]:
+    """
+    Keep the first (best-scored) match of every near-duplicate group, up to
+    `limit`. Matches without a known text are kept as they are. Returns the
+    kept matches and how many were collapsed away.
+    """
+    index = NearDuplicateIndex(threshold=threshold)
+    kept, collapsed = [], 0
+    for m in matches:
+        text = texts.get(m.id)
+        if text and index.check_and_add(m.id, text) is not None:
+            collapsed += 1
+            continue
+        kept.append(m)
+        if limit is not None and len(kept) >= limit:
+            break
+    return kept, collapsed
@@ -0,0 +1,171 @@
+# backend/scrape_api/encoder.py
+#
+# Bulk corpus encoding: length-bucketed batches spread over a process pool.
+#
+# A transformer batch costs (batch size × longest sequence in it), so a batch
+# mixing a 5-word chunk with a 200-word one pays for 200 words twice. Inputs
+# are sorted by token length and cut into batches under a token budget: short
+# chunks go in large batches, long ones in small batches, and there is little
+# padding in either. Batches are encoded in order on this process, or on
+# `processes` workers that each load their own copy of the model; the
+# embeddings are put back in input order either way.
+
+import os
+import time
+import multiprocessing
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Batch = Tuple[int, List[int]]   # (longest token length, input positions)
+
+# Per-worker model, loaded once by _init_worker
+_worker_model = None
+
+
+def token_lengths(model: Any, texts: Sequence[str]) -> List[int]:
+    """
+    Token count of each text as the model will see it (truncated to its
+    max_seq_length); whitespace words when the model has no tokenizer.
+    """
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is None:
+        return [len(t.split()) + 2 for t in texts]
+    max_len = getattr(model, "max_seq_length", None) or 512
+    ids = tokenizer(list(texts), add_special_tokens=True, truncation=True, max_length=max_len)["input_ids"]
+    return [len(x) for x in ids]
+
+
+def plan_batches(lengths: Sequence[int], max_batch_tokens: int, max_batch_size: int) -> List[Batch]:
+    """
+    Sort positions by length and cut them into batches whose padded size
+    (count × longest) stays within `max_batch_tokens`, at most
+    `max_batch_size` inputs each. Longest batches come first, so the slowest
+    work starts early and the pool drains evenly.
+    """
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    batches: List[Batch] = []
+    current: List[int] = []
+    for pos in order:
+        longest = max(lengths[pos], 1)
+        if current and ((len(current) + 1) * longest > max_batch_tokens or len(current) >= max_batch_size):
+            batches.append((max(lengths[current[-1]], 1), current))
+            current = []
+        current.append(pos)
+    if current:
+        batches.append((max(lengths[current[-1]], 1), current))
+    batches.reverse()
+    return batches
+
+
+def padded_tokens(lengths: Sequence[int], batches: Sequence[Sequence[int]]) -> int:
+    """Tokens a model processes for `batches` of positions, padding included."""
+    return sum(len(b) * max((lengths[i] for i in b), default=0) for b in batches)
+
+
+def _init_worker(factory: Callable[[], Any], threads: int) -> None:
+    global _worker_model
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _worker_model = factory()
+
+
+def _encode_batch(job: Tuple[int, List[str]], model: Any = None) -> Tuple[int, np.ndarray]:
+    batch_no, texts = job
+    model = model if model is not None else _worker_model
+    emb = model.encode(texts, batch_size=len(texts), show_progress_bar=False)
+    return batch_no, np.asarray(emb, dtype=np.float32)
+
+
+class BulkEncoder:
+    """
+    Encode lists of texts with length-bucketed batches, on `processes` worker
+    processes (1 = in this process with `model`).
+
+    `factory` builds the model in each worker and must be picklable (a class,
+    a module-level function or a functools.partial of one). `model` is used
+    for token lengths and for in-process encoding; it is built with `factory`
+    when not given. Use as a context manager, or call close(), to stop the pool.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        model: Any = None,
+        processes: int = 1,
+        max_batch_tokens: int = 16384,
+        max_batch_size: int = 256,
+    ):
+        self.model = model if model is not None else factory()
+        self.processes = processes or os.cpu_count() or 1
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.encoded = 0
+        self.tokens = 0
+        self.padded = 0
+        self.elapsed = 0.0
+        self._pool = None
+        if self.processes > 1:
+            threads = max(1, (os.cpu_count() or 1) // self.processes)
+            # spawn: a forked copy of an initialised torch runtime can deadlock
+            ctx = multiprocessing.get_context("spawn")
+            self._pool = ctx.Pool(self.processes, initializer=_init_worker, initargs=(factory, threads))
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Embeddings of `texts` as a float32 array, in input order."""
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        start = time.perf_counter()
+        lengths = token_lengths(self.model, texts)
+        # at least one batch per worker, so a small call still uses every process
+        per_worker = -(-len(texts) // self.processes)
+        batches = plan_batches(lengths, self.max_batch_tokens, min(self.max_batch_size, per_worker))
+        jobs = [(n, [texts[i] for i in positions]) for n, (_, positions) in enumerate(batches)]
+
+        out: Optional[np.ndarray] = None
+        if self._pool is None:
+            results = (_encode_batch(job, self.model) for job in jobs)
+        else:
+            results = self._pool.imap_unordered(_encode_batch, jobs)
+        for batch_no, emb in results:
+            if out is None:
+                out = np.empty((len(texts), emb.shape[1]), dtype=np.float32)
+            out[batches[batch_no][1]] = emb
+
+        self.encoded += len(texts)
+        self.tokens += sum(lengths)
+        self.padded += sum(longest * len(positions) for longest, positions in batches)
+        self.elapsed += time.perf_counter() - start
+        return out
+
+    @property
+    def dimension(self) -> int:
+        get = getattr(self.model, "get_sentence_embedding_dimension", None)
+        return get() if get is not None else self.model.dimension
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.encoded / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def padding_ratio(self) -> float:
+        """Share of processed tokens that were padding."""
+        return 1 - self.tokens / self.padded if self.padded else 0.0
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self) -> "BulkEncoder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
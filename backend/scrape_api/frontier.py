@@ -0,0 +1,151 @@
+# backend/scrape_api/frontier.py
+#
+# Crawl frontier: a priority queue of URLs still to fetch plus the set of URLs
+# already seen, checkpointed to SQLite so an interrupted crawl can resume.
+#
+# URLs are popped by (depth, -score, discovery order): shallow pages first,
+# and within a depth the better-scored links first. Every URL ever queued is
+# a row in `frontier`, so the visited set and the queue are one table; fetched
+# pages are kept in `pages` so a resumed crawl still returns them.
+#
+#   frontier = Frontier("crawl.sqlite3")     # ":memory:" for a throwaway crawl
+#   crawl(start_url, max_depth=3, frontier=frontier, max_pages=500)
+#
+# A URL that was popped but not finished when the process died is queued
+# again on resume.
+
+import json
+import heapq
+import sqlite3
+import itertools
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urldefrag
+
+
+def canonical_url(url: str) -> str:
+    """URL without its #fragment, which never changes the fetched document."""
+    return urldefrag(url)[0]
+
+
+class Frontier:
+    """
+    SQLite-backed crawl frontier. Not thread-safe; one crawl per frontier.
+    """
+
+    def __init__(self, path: str = ":memory:", checkpoint_every: int = 10):
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS frontier ('
+            '  url    TEXT PRIMARY KEY,'
+            '  depth  INTEGER NOT NULL,'
+            '  score  REAL NOT NULL,'
+            '  seq    INTEGER NOT NULL,'
+            "  state  TEXT NOT NULL DEFAULT 'queued'"   # queued | fetching | done | failed
+            ')'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            '  seq    INTEGER PRIMARY KEY,'
+            '  entry  TEXT NOT NULL'
+            ')'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS crawl_stats ('
+            '  key    TEXT PRIMARY KEY,'
+            '  value  REAL NOT NULL'
+            ')'
+        )
+        # a crash leaves the URL being fetched half-done: fetch it again
+        self._conn.execute("UPDATE frontier SET state = 'queued' WHERE state = 'fetching'")
+        self._conn.commit()
+
+        self._heap: List[Tuple[int, float, int, str]] = [
+            (depth, -score, seq, url)
+            for url, depth, score, seq in self._conn.execute(
+                "SELECT url, depth, score, seq FROM frontier WHERE state = 'queued'"
+            )
+        ]
+        heapq.heapify(self._heap)
+        self._seen = {url for (url,) in self._conn.execute('SELECT url FROM frontier')}
+        next_seq = self._conn.execute('SELECT COALESCE(MAX(seq), -1) + 1 FROM frontier').fetchone()[0]
+        self._seq = itertools.count(next_seq)
+        self.stats: Dict[str, float] = dict(self._conn.execute('SELECT key, value FROM crawl_stats'))
+        for key in ('pages', 'bytes', 'failed', 'links', 'duplicate_links', 'max_frontier'):
+            self.stats.setdefault(key, 0)
+        self._since_checkpoint = 0
+
+    @property
+    def resumed(self) -> bool:
+        """True when the checkpoint already held a crawl."""
+        return bool(self._seen)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, url: str, depth: int, score: float = 0.0) -> bool:
+        """Queue `url` unless it was seen before. Returns whether it was queued."""
+        url = canonical_url(url)
+        self.stats['links'] += 1
+        if url in self._seen:
+            self.stats['duplicate_links'] += 1
+            return False
+        self._seen.add(url)
+        seq = next(self._seq)
+        self._conn.execute(
+            'INSERT INTO frontier (url, depth, score, seq) VALUES (?, ?, ?, ?)',
+            (url, depth, score, seq),
+        )
+        heapq.heappush(self._heap, (depth, -score, seq, url))
+        self.stats['max_frontier'] = max(self.stats['max_frontier'], len(self._heap))
+        return True
+
+    def pop(self) -> Optional[Tuple[str, int]]:
+        """Next (url, depth) to fetch, or None when the frontier is empty."""
+        if not self._heap:
+            return None
+        depth, _, _, url = heapq.heappop(self._heap)
+        self._conn.execute("UPDATE frontier SET state = 'fetching' WHERE url = ?", (url,))
+        return url, depth
+
+    def done(self, url: str, entry: Optional[dict], nbytes: int = 0) -> None:
+        """Record a finished URL; `entry` None marks it failed."""
+        self._conn.execute(
+            'UPDATE frontier SET state = ? WHERE url = ?', ('failed' if entry is None else 'done', url)
+        )
+        if entry is None:
+            self.stats['failed'] += 1
+        else:
+            self._conn.execute('INSERT INTO pages (entry) VALUES (?)', (json.dumps(entry, ensure_ascii=False),))
+            self.stats['pages'] += 1
+            self.stats['bytes'] += nbytes
+        self._since_checkpoint += 1
+        if self._since_checkpoint >= self.checkpoint_every:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        self._conn.executemany(
+            'INSERT OR REPLACE INTO crawl_stats (key, value) VALUES (?, ?)', self.stats.items()
+        )
+        self._conn.commit()
+        self._since_checkpoint = 0
+
+    def entries(self) -> List[dict]:
+        """Every page fetched so far, in fetch order (including before a resume)."""
+        return [json.loads(e) for (e,) in self._conn.execute('SELECT entry FROM pages ORDER BY seq')]
+
+    def summary(self) -> Dict[str, float]:
+        """Crawl counters plus the current frontier size and link dedup rate."""
+        links = self.stats['links']
+        return {
+            **{k: int(v) for k, v in self.stats.items()},
+            'frontier': len(self._heap),
+            'seen': len(self._seen),
+            'dedup_rate': round(self.stats['duplicate_links'] / links, 4) if links else 0.0,
+        }
+
+    def close(self) -> None:
+        self.checkpoint()
+        self._conn.close()
@@ -0,0 +1,196 @@
+# backend/scrape_api/html_extract.py
+#
+# Page text + link extraction with a pluggable HTML parser backend.
+#
+#   selectolax   Lexbor (C) parser, fastest
+#   lxml         libxml2 parser, one start/end walk for text and links
+#   bs4          BeautifulSoup with the pure-Python html.parser (always there)
+#
+# "auto" (the default, or HTML_PARSER in the environment) takes the first one
+# installed. The text is the page's main content region only: the act body on
+# legislatie.just.ro pages, otherwise <main>/<article>/#content, else <body>;
+# navigation, headers, footers, forms and scripts are left out in every case.
+# Links are collected from the whole page, menus included, for the crawler.
+
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+Links = List[Tuple[str, str]]   # (href, anchor text)
+
+HTML_PARSER = os.getenv("HTML_PARSER", "auto")
+
+# Elements whose text is never page content
+BOILERPLATE_TAGS = (
+    "script", "style", "noscript", "template", "nav", "header", "footer",
+    "aside", "form", "select", "button", "iframe", "svg",
+)
+
+# Main content regions, most specific first: the act body on legislatie.just.ro
+# (current and consolidated form), then the generic landmarks
+MAIN_CONTENT_SELECTORS = (
+    "#textdocumentleg", "#div_Formaconsolidata",
+    "main", "article", "[role=main]", "#content", "#main",
+)
+
+
+def _decode(content: bytes) -> str:
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        from bs4 import UnicodeDammit
+
+        return UnicodeDammit(content, is_html=True).unicode_markup
+
+
+def _join(title: Optional[str], parts: List[str]) -> str:
+    if title and (not parts or parts[0] != title):
+        parts = [title] + parts
+    return "\n".join(parts)
+
+
+# ─── selectolax ─────────────────────────────────────────────────────────────
+def _parse_selectolax(content: bytes) -> Tuple[str, Links]:
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(_decode(content))
+    links = [(a.attributes.get("href") or "", a.text(strip=True)) for a in tree.css("a[href]")]
+    title_node = tree.css_first("title")
+    title = title_node.text(strip=True) if title_node is not None else None
+
+    body = tree.body
+    if body is None:
+        return title or "", links
+    body.strip_tags(list(BOILERPLATE_TAGS), recursive=True)
+    text = ""
+    for selector in MAIN_CONTENT_SELECTORS:
+        node = body.css_first(selector)
+        if node is not None:
+            text = node.text(separator="\n", strip=True)
+            if text:
+                break
+    if not text:
+        text = body.text(separator="\n", strip=True)
+    return _join(title, [p for p in text.split("\n") if p]), links
+
+
+# ─── lxml ───────────────────────────────────────────────────────────────────
+def _lxml_find_main(root):
+    for selector in MAIN_CONTENT_SELECTORS:
+        if selector.startswith("#"):
+            found = root.xpath("//*[@id=$v]", v=selector[1:])
+        elif selector.startswith("[role="):
+            found = root.xpath("//*[@role=$v]", v=selector[6:-1])
+        else:
+            found = root.xpath(f"//{selector}")
+        if found:
+            return found[0]
+    return None
+
+
+def _lxml_walk(root, main) -> Tuple[Optional[str], List[str], Links]:
+    """One start/end walk: title, text inside `main` (all if None) outside boilerplate, every link."""
+    from lxml import etree
+
+    title, parts, links = None, [], []
+    skip = 0
+    inside = main is None
+    for event, el in etree.iterwalk(root, events=("start", "end", "comment", "pi")):
+        tag = el.tag if isinstance(el.tag, str) else None
+        if event in ("comment", "pi"):
+            if inside and not skip and el.tail and el.tail.strip():
+                parts.append(el.tail.strip())
+        elif event == "start":
+            if el is main:
+                inside = True
+            if tag in BOILERPLATE_TAGS:
+                skip += 1
+            elif tag == "title" and title is None:
+                title = (el.text or "").strip() or None
+            if tag == "a" and el.get("href") is not None:
+                links.append((el.get("href"), " ".join(el.text_content().split())))
+            if tag != "title" and inside and not skip and el.text and el.text.strip():
+                parts.append(el.text.strip())
+        else:
+            if tag in BOILERPLATE_TAGS:
+                skip -= 1
+            if el is main:
+                inside = False
+            # the tail is text of the parent, after this element
+            if inside and not skip and el.tail and el.tail.strip():
+                parts.append(el.tail.strip())
+    return title, parts, links
+
+
+def _parse_lxml(content: bytes) -> Tuple[str, Links]:
+    import lxml.html
+
+    root = lxml.html.document_fromstring(_decode(content))
+    main = _lxml_find_main(root)
+    title, parts, links = _lxml_walk(root, main)
+    if main is not None and not parts:
+        # main region rendered empty (filled in by script): fall back to the whole page
+        _, parts, _ = _lxml_walk(root, None)
+    return _join(title, parts), links
+
+
+# ─── BeautifulSoup (html.parser) ────────────────────────────────────────────
+def _parse_bs4(content: bytes) -> Tuple[str, Links]:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, "html.parser")
+    links = [(a["href"].strip(), a.get_text(strip=True)) for a in soup.find_all("a", href=True)]
+    title = soup.title.get_text(strip=True) if soup.title else None
+
+    for el in soup.find_all(BOILERPLATE_TAGS):
+        el.decompose()
+    text = ""
+    for selector in MAIN_CONTENT_SELECTORS:
+        node = soup.select_one(selector)
+        if node is not None:
+            text = node.get_text(separator="\n", strip=True)
+            if text:
+                break
+    if not text:
+        node = soup.body or soup
+        text = node.get_text(separator="\n", strip=True)
+    return _join(title, [p for p in text.split("\n") if p]), links
+
+
+# ─── Backend selection ──────────────────────────────────────────────────────
+BACKENDS: Dict[str, Callable[[bytes], Tuple[str, Links]]] = {
+    "selectolax": _parse_selectolax,
+    "lxml": _parse_lxml,
+    "bs4": _parse_bs4,
+}
+_IMPORTS = {"selectolax": "selectolax.lexbor", "lxml": "lxml.html", "bs4": "bs4"}
+_resolved: Dict[str, str] = {}
+
+
+def resolve_backend(name: str = "auto") -> str:
+    """Name of the backend `name` stands for; "auto" picks the fastest installed."""
+    if name in _resolved:
+        return _resolved[name]
+    import importlib
+
+    candidates = list(BACKENDS) if name == "auto" else [name]
+    for candidate in candidates:
+        if candidate not in BACKENDS:
+            raise ValueError(f"unknown HTML parser backend {candidate!r}; choose from {', '.join(BACKENDS)}")
+        try:
+            importlib.import_module(_IMPORTS[candidate])
+        except ImportError:
+            if name != "auto":
+                raise
+            continue
+        _resolved[name] = candidate
+        return candidate
+    raise ImportError("no HTML parser available")
+
+
+def extract_page(content: bytes, backend: Optional[str] = None) -> Tuple[str, Links]:
+    """
+    Return (main-content text, [(href, anchor text), ...]) of an HTML page.
+    Text nodes are stripped and joined with newlines, like bs4's
+    get_text(separator='\\n', strip=True); hrefs are returned as written.
+    """
+    return BACKENDS[resolve_backend(backend or HTML_PARSER)](content)
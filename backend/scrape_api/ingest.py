@@ -1,95 +1,239 @@
 # src/python_be/ingest.py
 
-import os
-import json
+import contextlib
+import functools
+import hashlib
+
 import click
 from sentence_transformers import SentenceTransformer
 
 # Pinecone v2 client
 from pinecone import Pinecone, ServerlessSpec
 
+from .acts import tag_acts
+from .chunk_store import ChunkStore, vector_metadata
+from .encoder import BulkEncoder
+from .loader import iter_chunk_batches
+from .upsert import UpsertDispatcher, vector_id
+from .vector_store import CODECS, LocalIndex
+
 @click.command()
 @click.argument('dir', type=click.Path(exists=True))
 @click.option('--model_name', default='sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2')
-@click.option('--pinecone_api_key', envvar='PINECONE_API_KEY', required=True, help='Pinecone API key')
-@click.option('--pinecone_env',    envvar='PINECONE_ENV',    required=True, help='Pinecone environment/region')
+@click.option('--pinecone_api_key', envvar='PINECONE_API_KEY', help='Pinecone API key')
+@click.option('--pinecone_env',    envvar='PINECONE_ENV',    help='Pinecone environment/region')
 @click.option('--pinecone_index', default='road-legislation-index', help='Pinecone index name')
-def main(dir, model_name, pinecone_api_key, pinecone_env, pinecone_index):
-    """Embed JSON text chunks under DIR and upsert to Pinecone."""
-    # Instantiate Pinecone client
-    pc = Pinecone(api_key=pinecone_api_key, environment=pinecone_env)
-
-    # Create index if missing (adjust `dimension` to your model’s output size)
-    existing = pc.list_indexes().names()
-    if pinecone_index not in existing:
-        pc.create_index(
-            name=pinecone_index,
-            dimension=384,           # e.g. 384 for MiniLM-L12-v2
-            metric='cosine',
-            spec=ServerlessSpec(
-                cloud='aws',         # or 'gcp', 'azure'
-                region=pinecone_env
-            )
+@click.option('--workers', default=4, show_default=True, help='Threads used to read and parse JSON files')
+@click.option('--batch_size', default=256, show_default=True, help='Chunks encoded and upserted per batch')
+@click.option('--processes', default=1, show_default=True,
+              help='Encoder worker processes, each with its own model copy (0 = one per CPU core)')
+@click.option('--max_batch_tokens', default=16384, show_default=True,
+              help='Padded tokens per encoder batch; inputs are bucketed by length under this budget')
+@click.option('--max_in_flight', default=4, show_default=True, help='Concurrent upsert requests to Pinecone')
+@click.option('--chunk_store', envvar='CHUNK_STORE_PATH', default=None,
+              type=click.Path(dir_okay=False, resolve_path=True),
+              help='SQLite file for chunk texts keyed by vector ID, on a volume every API process reads '
+                   '(its CHUNK_STORE_PATH); without it the texts stay in the vector metadata')
+@click.option('--database_url', envvar='DATABASE_URL', default=None,
+              help='App database holding the index generations and the ingested-sources registry '
+                   '(required for a new generation or --promote)')
+@click.option('--generation', default='live', show_default=True,
+              help='"live" to add to the live generation, "new" to build a fresh one, '
+                   'or the namespace of a generation still building')
+@click.option('--promote', is_flag=True, help='Make the generation live once it validates')
+@click.option('--generation_stale_hours', envvar='GENERATION_STALE_HOURS', default=24.0, show_default=True,
+              help='With --generation live, builds older than this are abandoned and not written to')
+@click.option('--local_index', default=None, type=click.Path(file_okay=False),
+              help='Write to a local memory-mapped index in this directory instead of Pinecone')
+@click.option('--codec', type=click.Choice(CODECS), default='float16', show_default=True,
+              help='Vector storage of a new --local_index (pq codebooks are trained after the upsert)')
+def main(dir, model_name, pinecone_api_key, pinecone_env, pinecone_index, workers, batch_size, processes,
+         max_batch_tokens, max_in_flight, chunk_store, database_url, generation, promote, generation_stale_hours,
+         local_index, codec):
+    """Embed JSON text chunks under DIR and upsert to Pinecone.
+
+    Files are parsed on a thread pool and streamed through the encoder in
+    fixed-size batches. Repeated chunk IDs are only checked within one page
+    (the scraper writes a page's chunks together), so memory use grows with
+    the largest page and one registry entry per URL, not with the number of
+    chunks. Near-duplicate text is kept and collapsed at query time. With
+    --chunk_store the chunk texts go to that store and vectors only carry small
+    metadata; without it each vector carries its text.
+    Each batch is sorted by token length and encoded in padding-tight
+    sub-batches, spread over --processes workers (scrape_api/encoder.py);
+    with several processes a --batch_size of a few thousand keeps them busy.
+
+    A full re-index should use `--generation new --promote`: vectors go to a
+    fresh namespace that queries do not read until it has been validated and
+    promoted (see backend/server/netlify/utils/generations.py). With
+    `--generation live` they go to the live namespace and to every
+    generation still building, like the admin ingest, so a rebuild running
+    meanwhile does not lose them when it is promoted.
+
+    With --local_index the vectors go to a LocalIndex directory instead
+    (serve it with VECTOR_BACKEND=local); see scrape_api/vector_store.py.
+
+    Only --database_url is needed from the server configuration, and only to
+    follow the live generation and record the ingested URLs; without it the
+    vectors go to the default namespace. URLs are recorded only when the
+    vectors reached the live namespace (`--generation live`, or --promote).
+    """
+    if local_index is None and not (pinecone_api_key and pinecone_env):
+        raise click.UsageError('--pinecone_api_key and --pinecone_env are required without --local_index')
+
+    if database_url is None and (generation != 'live' or promote):
+        raise click.UsageError('--database_url (or DATABASE_URL) is required to build or promote a generation')
+
+    db = gen = None
+    if database_url is not None:
+        # the generations and sources registries live in the app database
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import Session
+        from backend.server.netlify.utils import generations as gens
+        from backend.server.netlify.utils.sources import record_sources
+
+        db = Session(create_engine(database_url))
+    if db is None:
+        namespaces = ['']
+        click.echo('No --database_url: writing to the default namespace; URLs are not recorded as ingested')
+    elif generation == 'live':
+        # the live generation first, then any rebuild in progress
+        namespaces = gens.write_namespaces(db, stale_hours=generation_stale_hours)
+    elif generation == 'new':
+        gen = gens.new_generation(db, embedding_model=model_name)
+        namespaces = [gen.namespace]
+    else:
+        gen = gens.get_generation(db, generation)
+        if gen is None or gen.status != 'building':
+            raise click.BadParameter(f"no generation {generation!r} is building", param_hint='--generation')
+        namespaces = [gen.namespace]
+    click.echo(f"Writing to namespace(s) {', '.join(repr(ns or '(default)') for ns in namespaces)}")
+
+    # an interrupted or crashed build is marked failed, not left 'building'
+    with gens.failing_on_error(db, gen) if gen is not None else contextlib.nullcontext():
+        # Load embedding model (and one copy per encoder process)
+        model = SentenceTransformer(model_name)
+        encoder = BulkEncoder(functools.partial(SentenceTransformer, model_name), model=model,
+                              processes=processes, max_batch_tokens=max_batch_tokens)
+        dimension = model.get_sentence_embedding_dimension()
+
+        if local_index is not None:
+            index = LocalIndex(local_index, dimension=dimension, codec=codec)
+            pinecone_index = local_index
+        else:
+            # Instantiate Pinecone client
+            pc = Pinecone(api_key=pinecone_api_key, environment=pinecone_env)
+
+            # Create index if missing, sized to the model's output
+            existing = pc.list_indexes().names()
+            if pinecone_index not in existing:
+                pc.create_index(
+                    name=pinecone_index,
+                    dimension=dimension,     # e.g. 384 for MiniLM-L12-v2
+                    metric='cosine',
+                    spec=ServerlessSpec(
+                        cloud='aws',         # or 'gcp', 'azure'
+                        region=pinecone_env
+                    )
+                )
+
+            # Connect to it
+            index = pc.Index(pinecone_index)
+
+        store = ChunkStore(chunk_store) if chunk_store else None
+
+        # Stream batches: parse -> encode -> upsert, then drop the batch
+        page = None          # url whose chunks are being read
+        page_ids = set()
+        embedded = 0
+        acts = {}   # url -> act, from each document's header chunk
+        sources = {}   # url -> (vectors, sha256 over their IDs), for ingested_sources
+        probe = None
+        with encoder, contextlib.ExitStack() as upserts:
+            dispatchers = [
+                upserts.enter_context(UpsertDispatcher(index, namespace=ns, max_in_flight=max_in_flight))
+                for ns in namespaces
+            ]
+            for raw in iter_chunk_batches(dir, batch_size=batch_size, workers=workers, echo=click.echo):
+                batch, ids = [], []
+                tag_acts(raw, acts)
+                for item in raw:
+                    if item['url'] != page:
+                        page = item['url']
+                        page_ids.clear()
+                    vid = vector_id(item['url'], item['chunk_index'], item['text'])
+                    if vid in page_ids:
+                        continue   # exact repeat, already queued
+                    page_ids.add(vid)
+                    embedded += 1
+                    batch.append(item)
+                    ids.append(vid)
+                    count, digest = sources.get(item['url']) or (0, hashlib.sha256())
+                    digest.update((('\n' if count else '') + vid).encode('utf-8'))
+                    sources[item['url']] = (count + 1, digest)
+                if not batch:
+                    continue
+
+                embeddings = encoder.encode([item['text'] for item in batch])
+                if probe is None and len(embeddings):
+                    probe = embeddings[0].tolist()
+                # Text first, so a queryable vector always has its text available
+                if store is not None:
+                    store.put_many(
+                        (vid, item['url'], item['chunk_index'], item['text'])
+                        for vid, item in zip(ids, batch)
+                    )
+                # numpy rows: the dispatcher converts them per request only if the index needs lists
+                vectors = [
+                    (vid, emb, vector_metadata(item, with_text=store is None))
+                    for vid, item, emb in zip(ids, batch, embeddings)
+                ]
+                for dispatcher in dispatchers:
+                    dispatcher.submit(vectors)
+                click.echo(f"Queued {len(vectors)} vectors for '{pinecone_index}'")
+                del embeddings, batch, vectors, ids, raw
+
+        if store is not None:
+            store.close()
+
+        click.echo(
+            f"Encoded {encoder.encoded} chunks in {encoder.elapsed:.1f}s on {encoder.processes} process(es) "
+            f"({encoder.chunks_per_second:.1f} chunks/s, {encoder.padding_ratio:.1%} padding)"
         )
-
-    # Connect to it
-    index = pc.Index(pinecone_index)
-
-    # Load embedding model
-    model = SentenceTransformer(model_name)
-
-    texts, metadata = [], []
-
-    # Read all JSON chunk files
-    for fname in os.listdir(dir):
-        if not fname.endswith('.json'):
-            continue
-
-        path = os.path.join(dir, fname)
-        with open(path, 'r', encoding='utf-8') as f:
-            try:
-                data = json.load(f)
-            except json.JSONDecodeError as e:
-                click.echo(f"❌ Failed to parse {fname}: {e}", err=True)
-                continue
-
-        # If you wrote one object per file instead of a list, wrap it
-        if isinstance(data, dict):
-            data = [data]
-        elif not isinstance(data, list):
-            click.echo(f"⚠️ Unexpected JSON top‐level type in {fname}: {type(data).__name__}", err=True)
-            continue
-
-        for item in data:
-            if 'text' not in item:
-                click.echo(f"⚠️ Skipping entry in {fname} without 'text': {item}", err=True)
-                continue
-            texts.append(item['text'])
-            metadata.append({
-                'url':         item.get('url'),
-                'name':        item.get('name'),
-                'chunk_index': item.get('chunk_index'),
-                'text': item.get('text')
-            })
-
-        click.echo(f"✅ Loaded {len(data)} items from {fname}")
-
-    # Encode
-    embeddings = model.encode(texts, show_progress_bar=True)
-
-    # Upsert in batches
-    batch_size = 100
-    for i in range(0, len(embeddings), batch_size):
-        batch_emb = embeddings[i:i+batch_size]
-        batch_meta = metadata[i:i+batch_size]
-        vectors = [
-            (str(i + j), emb.tolist(), batch_meta[j])
-            for j, emb in enumerate(batch_emb)
-        ]
-        index.upsert(vectors=vectors)
-        click.echo(f"Upserted {len(vectors)} vectors to '{pinecone_index}'")
-
-    click.echo("✅ All embeddings upserted to Pinecone.")
+        for ns, dispatcher in zip(namespaces, dispatchers):
+            click.echo(
+                f"Upserted {dispatcher.upserted} vectors to '{ns or '(default)'}' in {dispatcher.elapsed:.1f}s "
+                f"({dispatcher.vectors_per_second:.1f} vectors/s, {dispatcher.retries} retries)"
+            )
+        click.echo(f"✅ All embeddings upserted to {'the local index' if local_index else 'Pinecone'}.")
+
+        if isinstance(index, LocalIndex):
+            if index.codec == 'pq':
+                click.echo(f"Trained PQ codebooks on {index.train()} vectors")
+            index.flush()
+
+        if gen is not None:
+            if not gens.validate_generation(db, gen, index, expected=embedded, probe=probe):
+                click.echo(f"❌ Generation '{gen.namespace}' failed validation "
+                           f"({gen.vector_count}/{embedded} vectors); it stays unused.")
+                db.close()
+                raise SystemExit(1)
+            click.echo(f"Generation '{gen.namespace}' is ready ({gen.vector_count} vectors).")
+            if promote:
+                gens.promote(db, gen.namespace)
+                click.echo(f"Generation '{gen.namespace}' is now live.")
+
+        # the admin endpoint's duplicate check and URL listing read this
+        # registry, so it only lists URLs whose vectors queries can reach
+        if db is not None and (gen is None or promote):
+            record_sources(db, {url: count for url, (count, _) in sources.items()},
+                           {url: digest.hexdigest() for url, (_, digest) in sources.items()})
+            click.echo(f"Recorded {len(sources)} URLs as ingested.")
+        elif gen is not None:
+            click.echo(f"URLs are not recorded as ingested until '{gen.namespace}' is live; after promoting it, run "
+                       f"`python -m backend.server.netlify.utils.sources backfill --namespace {gen.namespace}`.")
+    if db is not None:
+        db.close()
 
 if __name__ == '__main__':
     main()
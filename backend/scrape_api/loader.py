@@ -0,0 +1,128 @@
+# backend/scrape_api/loader.py
+
+import os
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Faster JSON parser if available, stdlib otherwise
+try:
+    import orjson
+
+    def _loads(raw: bytes):
+        return orjson.loads(raw)
+
+    _JSONDecodeError = orjson.JSONDecodeError
+except ImportError:
+    def _loads(raw: bytes):
+        return json.loads(raw)
+
+    _JSONDecodeError = json.JSONDecodeError
+
+
+def list_chunk_files(dir: str) -> List[str]:
+    """
+    Return the sorted paths of every *.json chunk file directly under `dir`.
+    Sorting keeps batch order (and therefore vector order) stable between runs.
+    """
+    return [
+        os.path.join(dir, fname)
+        for fname in sorted(os.listdir(dir))
+        if fname.endswith('.json')
+    ]
+
+
+def read_chunk_file(path: str) -> List[Dict]:
+    """
+    Read and parse one chunk file. A single top-level object is wrapped in a list.
+    Raises ValueError for malformed JSON or an unexpected top-level type.
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+    try:
+        data = _loads(raw)
+    except _JSONDecodeError as e:
+        raise ValueError(f"Failed to parse {os.path.basename(path)}: {e}") from e
+
+    # If you wrote one object per file instead of a list, wrap it
+    if isinstance(data, dict):
+        return [data]
+    if not isinstance(data, list):
+        raise ValueError(
+            f"Unexpected JSON top-level type in {os.path.basename(path)}: {type(data).__name__}"
+        )
+    return data
+
+
+def iter_parsed_files(
+    paths: List[str],
+    workers: int = 4,
+) -> Iterator[tuple]:
+    """
+    Read and parse `paths` on a thread pool, yielding (path, items, error) in input order.
+
+    At most `2 * workers` files are in flight at once, so memory stays bounded
+    by the pool window rather than the size of the directory.
+    """
+    workers = max(1, workers)
+    window = workers * 2
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending: deque = deque()
+        it = iter(paths)
+        for path in it:
+            pending.append((path, pool.submit(read_chunk_file, path)))
+            if len(pending) >= window:
+                break
+        while pending:
+            path, fut = pending.popleft()
+            try:
+                yield path, fut.result(), None
+            except (OSError, ValueError) as e:
+                yield path, None, e
+            nxt = next(it, None)
+            if nxt is not None:
+                pending.append((nxt, pool.submit(read_chunk_file, nxt)))
+
+
+def iter_chunk_batches(
+    dir: str,
+    batch_size: int = 256,
+    workers: int = 4,
+    echo: Optional[Callable[..., None]] = None,
+) -> Iterator[List[Dict]]:
+    """
+    Stream chunk items from every JSON file under `dir` in fixed-size batches.
+
+    Each yielded batch is a fresh list of at most `batch_size` items holding
+    'url', 'name', 'chunk_index' and 'text'; once the caller drops it nothing
+    else keeps a reference, so peak memory is independent of corpus size.
+    Entries without 'text' are skipped. `echo(msg, err=bool)` receives progress
+    and warnings (e.g. `click.echo`).
+    """
+    echo = echo or (lambda *a, **kw: None)
+    batch: List[Dict] = []
+    for path, data, err in iter_parsed_files(list_chunk_files(dir), workers=workers):
+        fname = os.path.basename(path)
+        if err is not None:
+            echo(f"❌ {err}", err=True)
+            continue
+
+        for item in data:
+            if not isinstance(item, dict) or 'text' not in item:
+                echo(f"⚠️ Skipping entry in {fname} without 'text': {item}", err=True)
+                continue
+            batch.append({
+                'url':         item.get('url'),
+                'name':        item.get('name'),
+                'chunk_index': item.get('chunk_index'),
+                'text':        item.get('text'),
+            })
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        echo(f"✅ Loaded {len(data)} items from {fname}")
+
+    if batch:
+        yield batch
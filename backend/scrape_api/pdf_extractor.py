@@ -1,4 +1,5 @@
 import io
+import logging
 import tempfile
 
 # Primary: use PyPDF2 for text extraction
@@ -13,6 +14,8 @@ try:
 except ImportError:
     _pdfminer_extract = None
 
+logger = logging.getLogger(__name__)
+
 def extract_text(pdf_bytes: bytes) -> str:
     """
     Extract and return human-readable text from PDF bytes using the best available library.
@@ -23,7 +26,7 @@ def extract_text(pdf_bytes: bytes) -> str:
         text = []
         for page in reader.pages:
             page_text = page.extract_text()
-            print('page_text: ', page_text)
+            logger.debug("extracted %d chars from PDF page", len(page_text or ""))
             if page_text:
                 text.append(page_text)
         combined = '\n'.join(text).strip()
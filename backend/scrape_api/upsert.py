@@ -0,0 +1,199 @@
+# backend/scrape_api/upsert.py
+
+import json
+import time
+import random
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+Vector = Tuple[str, Sequence[float], Dict[str, Any]]   # values: list or numpy row
+
+# Pinecone rejects upsert requests above 2MB or 1000 vectors
+MAX_REQUEST_BYTES = 2 * 1024 * 1024
+MAX_BATCH_VECTORS = 1000
+
+
+def content_hash(text: str) -> str:
+    """
+    Short, stable fingerprint of a chunk's text.
+    """
+    return hashlib.sha1((text or '').encode('utf-8')).hexdigest()[:16]
+
+
+def vector_id(url: Optional[str], chunk_index: Optional[int], text: str) -> str:
+    """
+    Deterministic vector ID derived from (url, chunk_index, content hash).
+
+    Re-ingesting the same chunk overwrites its own vector, while different
+    sources or edited text never collide. The URL is hashed so IDs stay well
+    under Pinecone's 512-byte limit.
+    """
+    url_hash = hashlib.sha1((url or '').encode('utf-8')).hexdigest()[:16]
+    idx = '' if chunk_index is None else str(chunk_index)
+    return f"{url_hash}-{idx}-{content_hash(text)}"
+
+
+def _estimate_bytes(vector: Vector) -> int:
+    """
+    Rough JSON payload size of one vector: ~12 bytes per float plus id and metadata.
+    """
+    vid, values, meta = vector
+    return len(vid) + 12 * len(values) + len(json.dumps(meta, ensure_ascii=False)) + 32
+
+
+def _is_payload_too_large(err: Exception) -> bool:
+    status = getattr(err, 'status', None) or getattr(err, 'status_code', None)
+    if status == 413:
+        return True
+    msg = str(err).lower()
+    return 'too large' in msg or 'message length' in msg or ('payload' in msg and 'size' in msg)
+
+
+class UpsertDispatcher:
+    """
+    Send vector upserts to a Pinecone `Index` concurrently.
+
+    - at most `max_in_flight` requests run at once; `submit` blocks when the
+      window is full, which keeps memory bounded for streaming callers
+    - batches are cut by both vector count and estimated request size, and a
+      batch rejected as too large is split in half and the limit lowered
+    - failed requests are retried with jittered exponential backoff
+
+    Use as a context manager, or call `flush()` / `close()` explicitly.
+    """
+
+    def __init__(
+        self,
+        index,
+        namespace: str = '',
+        max_in_flight: int = 4,
+        max_batch_vectors: int = 100,
+        max_request_bytes: int = MAX_REQUEST_BYTES,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+    ):
+        self.index = index
+        self.namespace = namespace
+        self.max_batch_vectors = min(max_batch_vectors, MAX_BATCH_VECTORS)
+        self.max_request_bytes = max_request_bytes
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='upsert')
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self._futures: List[Future] = []
+
+        self.upserted = 0
+        self.requests = 0
+        self.retries = 0
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+
+    # ─── batching ──────────────────────────────────────────────────────────
+    def _split(self, vectors: Sequence[Vector]) -> List[List[Vector]]:
+        batches, batch, size = [], [], 0
+        for v in vectors:
+            v_size = _estimate_bytes(v)
+            if batch and (len(batch) >= self.max_batch_vectors or size + v_size > self.max_request_bytes):
+                batches.append(batch)
+                batch, size = [], 0
+            batch.append(v)
+            size += v_size
+        if batch:
+            batches.append(batch)
+        return batches
+
+    # ─── sending ───────────────────────────────────────────────────────────
+    def _send(self, batch: List[Vector]) -> int:
+        if not getattr(self.index, 'accepts_arrays', False):
+            # the Pinecone client serializes plain lists; convert here, off the caller's thread
+            batch = [(vid, values.tolist() if hasattr(values, 'tolist') else values, meta)
+                     for vid, values, meta in batch]
+        attempt = 0
+        while True:
+            try:
+                self.index.upsert(vectors=batch, namespace=self.namespace)
+                break
+            except Exception as err:
+                if _is_payload_too_large(err) and len(batch) > 1:
+                    with self._lock:
+                        self.max_batch_vectors = max(1, min(self.max_batch_vectors, len(batch) // 2))
+                    mid = len(batch) // 2
+                    return self._send(batch[:mid]) + self._send(batch[mid:])
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                with self._lock:
+                    self.retries += 1
+                time.sleep(self.backoff * (2 ** (attempt - 1)) * (0.5 + random.random()))
+
+        with self._lock:
+            self.upserted += len(batch)
+            self.requests += 1
+            self._finished = time.perf_counter()
+        return len(batch)
+
+    def _release(self, _fut: Future) -> None:
+        self._slots.release()
+
+    def submit(self, vectors: Sequence[Vector]) -> None:
+        """
+        Queue `vectors` for upsert. Blocks while `max_in_flight` requests are pending.
+        """
+        if self._started is None:
+            self._started = time.perf_counter()
+        for batch in self._split(vectors):
+            self._slots.acquire()
+            fut = self._pool.submit(self._send, batch)
+            fut.add_done_callback(self._release)
+            self._futures.append(fut)
+        self._reap()
+
+    def _reap(self) -> None:
+        # Surface failures early and drop finished futures
+        still_pending = []
+        for fut in self._futures:
+            if fut.done():
+                fut.result()
+            else:
+                still_pending.append(fut)
+        self._futures = still_pending
+
+    def flush(self) -> int:
+        """
+        Wait for every queued upsert; re-raises the first failure. Returns vectors upserted so far.
+        """
+        futures, self._futures = self._futures, []
+        for fut in futures:
+            fut.result()
+        return self.upserted
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            self._pool.shutdown(wait=True)
+
+    def __enter__(self) -> 'UpsertDispatcher':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+    # ─── stats ─────────────────────────────────────────────────────────────
+    @property
+    def elapsed(self) -> float:
+        if self._started is None:
+            return 0.0
+        end = self._finished or time.perf_counter()
+        return max(end - self._started, 1e-9)
+
+    @property
+    def vectors_per_second(self) -> float:
+        return self.upserted / self.elapsed if self.upserted else 0.0
@@ -0,0 +1,830 @@
+# backend/scrape_api/vector_store.py
+#
+# Local vector index with compressed, memory-mapped storage, speaking the
+# subset of the Pinecone `Index` API the app uses (upsert / query / fetch /
+# list / delete / describe_index_stats), so it can stand in for Pinecone on a single
+# node (VECTOR_BACKEND=local) or be filled by `ingest --local_index`.
+#
+# Vectors are L2-normalised (cosine metric, like the Pinecone index) and kept
+# in a file mapped with np.memmap, so the OS pages them in on demand:
+#
+#   float32   exact, 4 bytes per dimension
+#   float16   2 bytes per dimension, scores within ~1e-3 of float32
+#   pq        product quantisation: `pq_m` one-byte codes per vector (48 bytes
+#             for 384 dimensions) are scanned, then the best `rescore`
+#             candidates are re-scored exactly against the float16 copy, which
+#             stays on disk and is only touched for those rows
+#
+# Ids, namespaces, metadata and the partition postings live in SQLite next
+# to the vector files; in RAM a process keeps only the namespace of each row
+# (4 bytes), which is what the scan masks on. Deleted rows are reused by
+# later upserts. A pq index answers from float16 until `train()` has fitted
+# the codebooks (ingest does this at the end).
+#
+# Several processes may open the same directory (the server, `ingest
+# --local_index`, admin ingest, a generation promotion). Writes run in a
+# SQLite `BEGIN IMMEDIATE` transaction, so one process at a time allocates
+# rows, and append every row they touch to a change log. Other processes
+# replay the log since the last entry they applied, at most every
+# `refresh_seconds`, without holding the query lock; one that fell more than
+# CHANGE_LOG_ROWS behind reloads the row namespaces instead.
+#
+# Metadata filters on the PARTITION_FIELDS (act, url, name) are answered from
+# the postings table (value -> rows) before anything is scored: the query
+# only ranks that sub-index, exactly, instead of ranking everything and
+# filtering the candidates afterwards.
+#
+#   poetry run python -m backend.scrape_api.vector_store stats vectors/
+#   poetry run python -m backend.scrape_api.vector_store train vectors/ --sample 50000
+
+import os
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import click
+import numpy as np
+
+CODECS = ("float32", "float16", "pq")
+
+# Metadata fields whose values select rows before scoring
+PARTITION_FIELDS = ("act", "url", "name")
+
+# Row changes kept for other processes to replay; one further behind reloads every row
+CHANGE_LOG_ROWS = 1_000_000
+
+# Partition values whose row sets are cached between writes
+POSTING_CACHE_SIZE = 64
+
+
+def matches_filter(metadata: dict, flt: dict) -> bool:
+    """Pinecone metadata filter subset: equality, $eq, $ne, $in, $nin, $and, $or."""
+    for key, cond in flt.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, c) for c in cond):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_filter(metadata, c) for c in cond):
+                return False
+            continue
+        value = metadata.get(key)
+        if not isinstance(cond, dict):
+            cond = {"$eq": cond}
+        for op, arg in cond.items():
+            if op == "$eq" and value != arg:
+                return False
+            if op == "$ne" and value == arg:
+                return False
+            if op == "$in" and value not in arg:
+                return False
+            if op == "$nin" and value in arg:
+                return False
+    return True
+
+
+def _condition_values(cond: Any) -> Optional[set]:
+    """Values an equality / $eq / $in condition accepts; None for anything else."""
+    if not isinstance(cond, dict):
+        return {cond}
+    values = None
+    for op, arg in cond.items():
+        if op == "$eq":
+            accepted = {arg}
+        elif op == "$in":
+            accepted = set(arg)
+        else:
+            return None
+        values = accepted if values is None else values & accepted
+    return values
+
+
+def _partition_keys(metadata: dict) -> List[Tuple[str, str]]:
+    """(field, JSON-encoded value) of each partition field set in `metadata`."""
+    return [
+        (field, json.dumps(metadata[field])) for field in PARTITION_FIELDS
+        if isinstance(metadata.get(field), (str, int, float, bool))
+    ]
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    return x / np.where(norms == 0, 1, norms)
+
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k best finite scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    idx = idx[np.argsort(-scores[idx], kind="stable")]
+    return idx[np.isfinite(scores[idx])]
+
+
+class ProductQuantizer:
+    """
+    Splits vectors into `m` sub-vectors and codes each as the nearest of 256
+    k-means centroids. Inner products are estimated from per-query lookup
+    tables (asymmetric distance computation).
+    """
+
+    def __init__(self, dimension: int, m: int, seed: int = 1):
+        if dimension % m:
+            raise ValueError(f"dimension {dimension} is not divisible by pq_m={m}")
+        self.dimension = dimension
+        self.m = m
+        self.dsub = dimension // m
+        self.seed = seed
+        self.codebooks: Optional[np.ndarray] = None   # (m, 256, dsub)
+
+    @property
+    def trained(self) -> bool:
+        return self.codebooks is not None
+
+    def _subspace(self, x: np.ndarray, j: int) -> np.ndarray:
+        return x[:, j * self.dsub:(j + 1) * self.dsub]
+
+    @staticmethod
+    def _assign(sub: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        # argmin ||x - c||² = argmax (x·c - ||c||²/2)
+        return np.argmax(sub @ centroids.T - 0.5 * np.einsum("kd,kd->k", centroids, centroids), axis=1)
+
+    def fit(self, x: np.ndarray, iters: int = 20) -> "ProductQuantizer":
+        x = np.asarray(x, dtype=np.float32)
+        rng = np.random.default_rng(self.seed)
+        books = np.empty((self.m, 256, self.dsub), dtype=np.float32)
+        for j in range(self.m):
+            sub = self._subspace(x, j)
+            centroids = sub[rng.choice(len(sub), 256, replace=len(sub) < 256)].copy()
+            for _ in range(iters):
+                assign = self._assign(sub, centroids)
+                counts = np.bincount(assign, minlength=256)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assign, sub)
+                filled = counts > 0
+                centroids[filled] = sums[filled] / counts[filled, None]
+            books[j] = centroids
+        self.codebooks = books
+        return self
+
+    def encode(self, x: np.ndarray) -> np.ndarray:
+        x = np.asarray(x, dtype=np.float32)
+        codes = np.empty((len(x), self.m), dtype=np.uint8)
+        for j in range(self.m):
+            codes[:, j] = self._assign(self._subspace(x, j), self.codebooks[j])
+        return codes
+
+    def tables(self, q: np.ndarray) -> np.ndarray:
+        """(m, 256) partial inner products of `q` with every centroid."""
+        return np.einsum("mkd,md->mk", self.codebooks, q.reshape(self.m, self.dsub))
+
+    def scan(self, tables: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Estimated inner products for a block of codes."""
+        return tables[np.arange(self.m), codes].sum(axis=1)
+
+
+class LocalIndex:
+    """
+    Memory-mapped vector index under directory `path`. Safe to share between
+    threads: writers are serialized, queries score a snapshot of the row
+    bookkeeping outside the lock and read ids and metadata from SQLite.
+
+    `dimension`, `codec` and `pq_m` are fixed when the index is created and
+    read back from it afterwards.
+    """
+
+    accepts_arrays = True   # UpsertDispatcher may pass numpy rows as-is
+
+    def __init__(self, path: str, dimension: Optional[int] = None, codec: str = "float16",
+                 pq_m: Optional[int] = None, rescore: int = 100, block_rows: int = 65536,
+                 refresh_seconds: float = 1.0):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.rescore = rescore
+        self.block_rows = block_rows
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()            # in-memory state
+        self._write_lock = threading.Lock()       # one writer per process (SQLite serializes processes)
+        self._refresh_lock = threading.Lock()
+        self._local = threading.local()           # per-thread read connections
+        self._readers: List[sqlite3.Connection] = []
+        self._db = self._connect()
+        self._db.execute('CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS rows ('
+            '  row       INTEGER PRIMARY KEY,'
+            '  namespace TEXT NOT NULL,'
+            '  id        TEXT NOT NULL,'
+            '  metadata  TEXT,'
+            '  UNIQUE (namespace, id)'
+            ')'
+        )
+        # partition value (JSON-encoded) -> rows, for pre-filtering
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS postings ('
+            '  field TEXT NOT NULL,'
+            '  value TEXT NOT NULL,'
+            '  row   INTEGER NOT NULL,'
+            '  PRIMARY KEY (field, value, row)'
+            ') WITHOUT ROWID'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS ix_postings_row ON postings (row)')
+        # every row a write touched (namespace NULL: deleted), replayed by the other processes
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS changes ('
+            '  seq       INTEGER PRIMARY KEY AUTOINCREMENT,'
+            '  row       INTEGER NOT NULL,'
+            '  namespace TEXT'
+            ')'
+        )
+
+        stored = dict(self._db.execute('SELECT key, value FROM settings'))
+        if stored:
+            if dimension is not None and int(stored["dimension"]) != dimension:
+                raise ValueError(f"{path} holds {stored['dimension']}-dimensional vectors, not {dimension}")
+            dimension, codec, pq_m = int(stored["dimension"]), stored["codec"], int(stored["pq_m"])
+        else:
+            if dimension is None:
+                raise ValueError(f"{path} is a new index; its dimension is required")
+            if codec not in CODECS:
+                raise ValueError(f"unknown codec {codec!r}; choose from {', '.join(CODECS)}")
+            pq_m = pq_m or max(1, dimension // 8)
+            self._db.executemany('INSERT INTO settings (key, value) VALUES (?, ?)',
+                                 [("dimension", str(dimension)), ("codec", codec), ("pq_m", str(pq_m))])
+        if "postings" not in stored:
+            self._backfill_postings()
+        self._db.commit()
+        self.dimension = dimension
+        self.codec = codec
+        self.pq = ProductQuantizer(dimension, pq_m) if codec == "pq" else None
+        self._codebooks_mtime = None
+
+        self._namespaces: Dict[str, int] = {}
+        self._row_ns = np.full(0, -1, dtype=np.int32)   # namespace code per row, -1 for a free row
+        self._posting_cache: 'OrderedDict[Tuple[str, str], frozenset]' = OrderedDict()
+        self._n = 0
+        self._seq = 0            # last change applied
+        self._capacity = 0
+        self._vectors: Optional[np.memmap] = None
+        self._codes: Optional[np.memmap] = None
+        self._map(1024)
+        self._sync(self._db, force_reload=True)
+        self._next_check = time.monotonic() + self.refresh_seconds
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(os.path.join(self.path, "index.sqlite3"), timeout=60, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @property
+    def _reader(self) -> sqlite3.Connection:
+        """This thread's read connection (autocommit), so readers never wait on each other."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            conn.isolation_level = None
+            with self._lock:
+                self._readers.append(conn)
+        return conn
+
+    def _backfill_postings(self) -> None:
+        """Index the partition values of an index created before the postings table."""
+        cur = self._db.execute('SELECT row, metadata FROM rows')
+        while True:
+            part = cur.fetchmany(10_000)
+            if not part:
+                break
+            self._db.executemany(
+                'INSERT OR IGNORE INTO postings (field, value, row) VALUES (?, ?, ?)',
+                [key + (row,) for row, meta in part for key in _partition_keys(json.loads(meta or "{}"))],
+            )
+        self._db.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('postings', '1')")
+
+    # ─── keeping up with other processes ───────────────────────────────────
+    def _sync(self, conn: sqlite3.Connection, force_reload: bool = False) -> None:
+        """
+        Bring the row bookkeeping up to what `conn` sees committed: replay the
+        change log since the last applied entry, or reload every row when
+        the log no longer reaches back that far. The reads run without the
+        lock; only applying them takes it.
+        """
+        begun = not conn.in_transaction
+        if begun:
+            conn.execute('BEGIN')   # one snapshot for the queries below
+        try:
+            first = conn.execute('SELECT MIN(seq) FROM changes').fetchone()[0]
+            if force_reload or (first is not None and first > self._seq + 1):
+                seq = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM changes').fetchone()[0]
+                namespaces: Dict[str, int] = {}
+                n = conn.execute('SELECT COALESCE(MAX(row), -1) + 1 FROM rows').fetchone()[0]
+                row_ns = np.full(max(1024, 2 * n), -1, dtype=np.int32)
+                for row, namespace in conn.execute('SELECT row, namespace FROM rows'):
+                    row_ns[row] = namespaces.setdefault(namespace, len(namespaces))
+                changes = None
+            else:
+                changes = conn.execute(
+                    'SELECT seq, row, namespace FROM changes WHERE seq > ? ORDER BY seq', (self._seq,)
+                ).fetchall()
+        finally:
+            if begun:
+                conn.execute('COMMIT')
+
+        with self._lock:
+            if changes is None:
+                if seq < self._seq:
+                    return   # a concurrent sync got further
+                self._namespaces, self._row_ns, self._n, self._seq = namespaces, row_ns, n, seq
+            else:
+                for seq, row, namespace in changes:
+                    if seq <= self._seq:
+                        continue   # already applied by a concurrent sync
+                    self._grow_bookkeeping(row + 1)
+                    self._row_ns[row] = -1 if namespace is None else self._namespace_code(namespace)
+                    self._n = max(self._n, row + 1)
+                    self._seq = seq
+            if changes is None or changes:
+                self._posting_cache.clear()
+            if self._n > self._capacity:
+                self._map(max(self._n, 2 * self._capacity))
+            self._load_codebooks()
+
+    def _load_codebooks(self) -> None:
+        path = self._file("pq.npy")
+        mtime = os.path.getmtime(path) if self.pq is not None and os.path.exists(path) else None
+        if mtime is not None and mtime != self._codebooks_mtime:
+            self.pq.codebooks = np.load(path)
+            self._codebooks_mtime = mtime
+
+    def _refresh(self) -> None:
+        """Catch up with other processes' writes, at most every refresh_seconds."""
+        now = time.monotonic()
+        if now < self._next_check or not self._refresh_lock.acquire(blocking=False):
+            return   # checked recently, or another thread is catching up: use the current snapshot
+        try:
+            self._next_check = now + self.refresh_seconds
+            self._sync(self._reader)
+        finally:
+            self._refresh_lock.release()
+
+    @contextmanager
+    def _writing(self) -> Iterator[sqlite3.Connection]:
+        """
+        Hold SQLite's write lock, on up-to-date bookkeeping; commit, log
+        pruning included, at the end and apply the changes made.
+        """
+        with self._write_lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                self._sync(self._db)
+                yield self._db
+                self._db.execute(
+                    'DELETE FROM changes WHERE seq <= (SELECT MAX(seq) FROM changes) - ?', (CHANGE_LOG_ROWS,)
+                )
+            except BaseException:
+                self._db.rollback()
+                raise
+            self._db.commit()
+            self._sync(self._db)
+
+    # ─── storage ───────────────────────────────────────────────────────────
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @property
+    def _vector_dtype(self):
+        return np.float32 if self.codec == "float32" else np.float16
+
+    def _map(self, capacity: int) -> None:
+        """(Re)map the vector and code files with room for `capacity` rows."""
+        files = [("vectors.bin", self._vector_dtype, self.dimension)]
+        if self.pq is not None:
+            files.append(("codes.bin", np.uint8, self.pq.m))
+        maps = []
+        for name, dtype, width in files:
+            path = self._file(name)
+            size = capacity * width * np.dtype(dtype).itemsize
+            with open(path, "ab") as f:
+                if f.tell() < size:
+                    f.truncate(size)
+            maps.append(np.memmap(path, dtype=dtype, mode="r+", shape=(capacity, width)))
+        if self._vectors is not None:
+            self._vectors.flush()
+        self._vectors = maps[0]
+        self._codes = maps[1] if len(maps) > 1 else None
+        self._capacity = capacity
+
+    def _grow_bookkeeping(self, n: int) -> None:
+        if n > len(self._row_ns):
+            grown = np.full(max(1024, 2 * n), -1, dtype=np.int32)
+            grown[:len(self._row_ns)] = self._row_ns
+            self._row_ns = grown
+
+    def _namespace_code(self, namespace: str) -> int:
+        code = self._namespaces.get(namespace)
+        if code is None:
+            code = self._namespaces[namespace] = len(self._namespaces)
+        return code
+
+    def _posting_rows(self, field: str, values: set) -> set:
+        rows = set()
+        for value in values:
+            rows |= self._posting(field, json.dumps(value))
+        return rows
+
+    def _posting(self, field: str, value: str) -> frozenset:
+        """Rows with `field` = `value`, from a small cache emptied whenever the rows change."""
+        key = (field, value)
+        with self._lock:
+            seq, cached = self._seq, self._posting_cache.get(key)
+            if cached is not None:
+                self._posting_cache.move_to_end(key)
+                return cached
+        rows = frozenset(row for row, in self._reader.execute(
+            'SELECT row FROM postings WHERE field = ? AND value = ?', key
+        ))
+        with self._lock:
+            if self._seq == seq:   # nothing changed while reading
+                self._posting_cache[key] = rows
+                while len(self._posting_cache) > POSTING_CACHE_SIZE:
+                    self._posting_cache.popitem(last=False)
+        return rows
+
+    def _select(self, flt: dict) -> Tuple[Optional[set], bool]:
+        """
+        Rows a filter can only match within, from its clauses on partition
+        fields (None when it has none usable), and whether those clauses are
+        the whole filter so the rows need no further check.
+        """
+        rows: Optional[set] = None
+        complete = True
+
+        def narrow(selected: set) -> None:
+            nonlocal rows
+            rows = selected if rows is None else rows & selected
+
+        for key, cond in flt.items():
+            if key == "$and":
+                for sub in cond:
+                    selected, ok = self._select(sub)
+                    complete &= ok
+                    if selected is not None:
+                        narrow(selected)
+            elif key == "$or":
+                subs = [self._select(sub) for sub in cond]
+                complete &= all(ok for _, ok in subs)
+                if subs and all(selected is not None for selected, _ in subs):
+                    narrow(set().union(*(selected for selected, _ in subs)))
+            elif key in PARTITION_FIELDS and _condition_values(cond) is not None:
+                narrow(self._posting_rows(key, _condition_values(cond)))
+            else:
+                complete = False
+        return rows, complete
+
+    def _existing_rows(self, conn: sqlite3.Connection, namespace: str, ids: Sequence[str]) -> Dict[str, int]:
+        found: Dict[str, int] = {}
+        for i in range(0, len(ids), 900):
+            part = list(ids[i:i + 900])
+            cur = conn.execute(
+                f"SELECT id, row FROM rows WHERE namespace = ? AND id IN ({','.join('?' * len(part))})",
+                [namespace, *part],
+            )
+            found.update(cur)
+        return found
+
+    @staticmethod
+    def _drop_postings(conn: sqlite3.Connection, rows: Sequence[int]) -> None:
+        conn.executemany('DELETE FROM postings WHERE row = ?', [(row,) for row in rows])
+
+    # ─── Pinecone Index API ────────────────────────────────────────────────
+    def upsert(self, vectors: Sequence[Any], namespace: str = "", **_: Any) -> dict:
+        latest: Dict[str, Tuple[Any, dict]] = {}
+        for v in vectors:
+            if isinstance(v, dict):
+                latest[v["id"]] = (v["values"], v.get("metadata") or {})
+            else:
+                latest[v[0]] = (v[1], (v[2] if len(v) > 2 else {}) or {})
+        if not latest:
+            return {"upserted_count": 0}
+        values = _normalize(np.asarray([val for val, _ in latest.values()], dtype=np.float32))
+        if values.shape[1] != self.dimension:
+            raise ValueError(f"vector dimension {values.shape[1]} does not match index dimension {self.dimension}")
+
+        with self._writing() as db:
+            codes = self.pq.encode(values) if self.pq is not None and self.pq.trained else None
+            existing = self._existing_rows(db, namespace, list(latest))
+            with self._lock:
+                n = self._n
+                free = iter(np.flatnonzero(self._row_ns[:n] < 0).tolist())
+            rows = []
+            for vid in latest:
+                row = existing.get(vid)
+                if row is None:
+                    row = next(free, None)
+                    if row is None:
+                        row, n = n, n + 1
+                rows.append(row)
+            with self._lock:
+                if n > self._capacity:
+                    self._map(max(n, 2 * self._capacity))
+                vectors_map, codes_map = self._vectors, self._codes
+            idx = np.asarray(rows)
+            vectors_map[idx] = values.astype(self._vector_dtype)
+            if codes is not None:
+                codes_map[idx] = codes
+            db.executemany(
+                'INSERT OR REPLACE INTO rows (row, namespace, id, metadata) VALUES (?, ?, ?, ?)',
+                [(row, namespace, vid, json.dumps(meta, ensure_ascii=False))
+                 for row, (vid, (_, meta)) in zip(rows, latest.items())],
+            )
+            self._drop_postings(db, rows)
+            db.executemany(
+                'INSERT INTO postings (field, value, row) VALUES (?, ?, ?)',
+                [key + (row,) for row, (_, meta) in zip(rows, latest.values()) for key in _partition_keys(meta)],
+            )
+            db.executemany('INSERT INTO changes (row, namespace) VALUES (?, ?)', [(row, namespace) for row in rows])
+        return {"upserted_count": len(latest)}
+
+    def _scores(self, q: np.ndarray, mask: np.ndarray, vectors: np.ndarray,
+                codes: Optional[np.ndarray]) -> np.ndarray:
+        """Scores for every row in blocks (exact, or PQ estimates when `codes` is given); -inf outside `mask`."""
+        n = len(mask)
+        scores = np.full(n, -np.inf, dtype=np.float32)
+        tables = self.pq.tables(q) if codes is not None else None
+        for start in range(0, n, self.block_rows):
+            end = min(start + self.block_rows, n)
+            block_mask = mask[start:end]
+            if not block_mask.any():
+                continue
+            if codes is not None:
+                block = self.pq.scan(tables, codes[start:end])
+            else:
+                block = np.asarray(vectors[start:end], dtype=np.float32) @ q
+            scores[start:end] = np.where(block_mask, block, -np.inf)
+        return scores
+
+    def _rescore(self, q: np.ndarray, rows: np.ndarray, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        order = np.sort(rows)   # sequential reads from the memmap
+        exact = np.asarray(vectors[order], dtype=np.float32) @ q
+        best = np.argsort(-exact, kind="stable")
+        return order[best], exact[best]
+
+    def _ranked(self, q: np.ndarray, mask: np.ndarray, vectors: np.ndarray, codes: Optional[np.ndarray],
+                top_k: int, filter: Optional[dict], include_metadata: bool):
+        """Rank every row in `mask`, widening the candidate pool until `filter` keeps top_k."""
+        scores = self._scores(q, mask, vectors, codes)
+        live = int(mask.sum())
+        pool = top_k * 4 if filter else top_k
+        while True:
+            if codes is not None:
+                rows, exact = self._rescore(q, _top(scores, max(self.rescore, pool)), vectors)
+            else:
+                rows = _top(scores, pool)
+                exact = scores[rows]
+            metadata = self._metadata(rows) if (filter or include_metadata) else {}
+            keep = [
+                i for i, row in enumerate(rows)
+                if not filter or matches_filter(metadata.get(int(row), {}), filter)
+            ][:top_k]
+            if len(keep) >= top_k or len(rows) >= live:
+                return rows, exact, keep, metadata
+            pool *= 4
+
+    def query(self, vector: Sequence[float], top_k: int = 10, include_metadata: bool = False,
+              include_values: bool = False, namespace: str = "", filter: Optional[dict] = None,
+              **_: Any) -> SimpleNamespace:
+        q = _normalize(np.asarray(vector, dtype=np.float32))
+        self._refresh()
+        with self._lock:
+            code = self._namespaces.get(namespace)
+            n = self._n
+            mask = self._row_ns[:n] == code if code is not None else None
+            vectors, codes = self._vectors, self._codes
+            use_pq = self.pq is not None and self.pq.trained
+        if mask is None or not mask.any():
+            return SimpleNamespace(matches=[], namespace=namespace)
+        selected, complete = self._select(filter) if filter else (None, True)
+        if selected is not None:
+            subset = np.fromiter(selected, dtype=np.int64, count=len(selected))
+            subset = subset[subset < n]   # rows committed since the snapshot are not in it
+
+        post = None if complete else filter
+        if selected is not None and len(subset) > self.block_rows:
+            # a large share of the index: scan it as usual, masked to the selection
+            selected_mask = np.zeros(n, dtype=bool)
+            selected_mask[subset] = True
+            mask &= selected_mask
+            selected = None
+        elif selected is not None:
+            # pre-filtered sub-index: rank only its rows, exactly
+            subset.sort()
+            subset = subset[mask[subset]]
+            scores = np.asarray(vectors[subset], dtype=np.float32) @ q
+            order = np.argsort(-scores, kind="stable")
+            rows, exact = subset[order], scores[order]
+            if post is None:
+                keep = list(range(min(top_k, len(rows))))
+                metadata = self._metadata(rows[:top_k]) if include_metadata else {}
+            else:
+                # check the rest of the filter best-first, a page of metadata at a time
+                keep, metadata, page = [], {}, max(64, top_k * 4)
+                for start in range(0, len(rows), page):
+                    part = self._metadata(rows[start:start + page])
+                    metadata.update(part)
+                    keep += [
+                        start + j for j, row in enumerate(rows[start:start + page])
+                        if matches_filter(part.get(int(row), {}), post)
+                    ]
+                    if len(keep) >= top_k:
+                        break
+                keep = keep[:top_k]
+        if selected is None:
+            if not mask.any():
+                return SimpleNamespace(matches=[], namespace=namespace)
+            rows, exact, keep, metadata = self._ranked(q, mask, vectors, codes if use_pq else None,
+                                                       top_k, post, include_metadata)
+
+        ids = self._row_ids([rows[i] for i in keep])
+        matches = [
+            SimpleNamespace(
+                id=ids[int(rows[i])],
+                score=float(exact[i]),
+                metadata=dict(metadata.get(int(rows[i]), {})) if include_metadata else None,
+                values=np.asarray(vectors[int(rows[i])], dtype=np.float32).tolist() if include_values else None,
+            )
+            for i in keep if int(rows[i]) in ids   # a row deleted meanwhile is dropped
+        ]
+        return SimpleNamespace(matches=matches, namespace=namespace)
+
+    def _rows_where(self, columns: str, rows: Sequence[int]) -> Iterator[tuple]:
+        rows = [int(r) for r in rows]
+        for i in range(0, len(rows), 900):
+            part = rows[i:i + 900]
+            yield from self._reader.execute(
+                f"SELECT row, {columns} FROM rows WHERE row IN ({','.join('?' * len(part))})", part
+            )
+
+    def _metadata(self, rows: Sequence[int]) -> Dict[int, dict]:
+        return {row: json.loads(meta or "{}") for row, meta in self._rows_where("metadata", rows)}
+
+    def _row_ids(self, rows: Sequence[int]) -> Dict[int, str]:
+        return dict(self._rows_where("id", rows))
+
+    def fetch(self, ids: Sequence[str], namespace: str = "", **_: Any) -> SimpleNamespace:
+        self._refresh()
+        with self._lock:
+            n, vectors = self._n, self._vectors
+        ids = list(ids)
+        found = {}
+        for i in range(0, len(ids), 900):
+            part = ids[i:i + 900]
+            cur = self._reader.execute(
+                f"SELECT id, row, metadata FROM rows WHERE namespace = ? AND id IN ({','.join('?' * len(part))})",
+                [namespace, *part],
+            )
+            found.update(
+                (vid, SimpleNamespace(id=vid, values=np.asarray(vectors[row], dtype=np.float32).tolist(),
+                                      metadata=json.loads(meta or "{}")))
+                for vid, row, meta in cur if row < n
+            )
+        return SimpleNamespace(vectors=found, namespace=namespace)
+
+    def list(self, prefix: Optional[str] = None, limit: int = 100, namespace: str = "",
+             **_: Any) -> Iterator[List[str]]:
+        """The IDs in `namespace` (starting with `prefix`), in sorted pages of `limit`, like Pinecone's."""
+        prefix = prefix or ""
+        after = None
+        while True:
+            page = [vid for vid, in self._reader.execute(
+                'SELECT id FROM rows WHERE namespace = ? AND id >= ? AND (? IS NULL OR id > ?)'
+                ' AND substr(id, 1, ?) = ? ORDER BY id LIMIT ?',
+                (namespace, prefix, after, after, len(prefix), prefix, limit),
+            )]
+            if not page:
+                return
+            yield page
+            after = page[-1]
+
+    def delete(self, ids: Optional[Sequence[str]] = None, delete_all: bool = False,
+               namespace: str = "", **_: Any) -> dict:
+        with self._writing() as db:
+            if delete_all:
+                rows = [row for row, in db.execute('SELECT row FROM rows WHERE namespace = ?', (namespace,))]
+            else:
+                rows = list(self._existing_rows(db, namespace, list(ids or ())).values())
+            self._drop_postings(db, rows)
+            db.executemany('DELETE FROM rows WHERE row = ?', [(row,) for row in rows])
+            db.executemany('INSERT INTO changes (row, namespace) VALUES (?, NULL)', [(row,) for row in rows])
+        return {}
+
+    def describe_index_stats(self, **_: Any) -> dict:
+        self._refresh()
+        with self._lock:
+            counts = np.bincount(self._row_ns[:self._n][self._row_ns[:self._n] >= 0],
+                                 minlength=len(self._namespaces))
+            namespaces = {
+                name: {"vector_count": int(counts[code])}
+                for name, code in self._namespaces.items() if counts[code]
+            }
+        return {
+            "dimension": self.dimension,
+            "namespaces": namespaces,
+            "total_vector_count": sum(n["vector_count"] for n in namespaces.values()),
+            "codec": self.codec,
+            **self.footprint(),
+        }
+
+    # ─── maintenance ───────────────────────────────────────────────────────
+    def train(self, sample: int = 50_000, iters: int = 20) -> int:
+        """
+        Fit the PQ codebooks on up to `sample` stored vectors and encode every
+        row. Returns the number of training vectors (0 for non-pq codecs).
+        """
+        if self.pq is None:
+            return 0
+        with self._writing():
+            with self._lock:
+                n, vectors, codes = self._n, self._vectors, self._codes
+                live = np.flatnonzero(self._row_ns[:n] >= 0)
+            if not len(live):
+                return 0
+            rng = np.random.default_rng(self.pq.seed)
+            picked = np.sort(rng.choice(live, min(sample, len(live)), replace=False))
+            self.pq.fit(np.asarray(vectors[picked], dtype=np.float32), iters=iters)
+            for start in range(0, n, self.block_rows):
+                end = min(start + self.block_rows, n)
+                codes[start:end] = self.pq.encode(np.asarray(vectors[start:end], dtype=np.float32))
+            codes.flush()
+            np.save(self._file("pq.npy"), self.pq.codebooks)
+            self._codebooks_mtime = os.path.getmtime(self._file("pq.npy"))
+        return len(picked)
+
+    def footprint(self) -> Dict[str, int]:
+        """
+        Bytes scanned per query (kept hot in RAM), held in RAM for the row
+        bookkeeping (ids, metadata and postings stay in SQLite), and stored
+        in the vector files.
+        """
+        n = self._n
+        vector_bytes = n * self.dimension * np.dtype(self._vector_dtype).itemsize
+        code_bytes = n * self.pq.m if self.pq is not None else 0
+        scanned = code_bytes if self.pq is not None and self.pq.trained else vector_bytes
+        return {"scanned_bytes": scanned, "bookkeeping_bytes": int(self._row_ns.nbytes),
+                "stored_bytes": vector_bytes + code_bytes}
+
+    def flush(self) -> None:
+        with self._lock:
+            self._vectors.flush()
+            if self._codes is not None:
+                self._codes.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._db.close()
+        with self._lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+
+
+# ─── Admin CLI ──────────────────────────────────────────────────────────────
+def _open(path: str) -> LocalIndex:
+    if not os.path.exists(os.path.join(path, "index.sqlite3")):
+        raise click.ClickException(f"{path} is not a local vector index")
+    return LocalIndex(path)
+
+
+@click.group()
+def main():
+    """Inspect and maintain a local vector index."""
+
+
+@main.command("stats")
+@click.argument("path", type=click.Path(exists=True, file_okay=False))
+def stats_cmd(path):
+    """Vector counts per namespace and storage footprint."""
+    index = _open(path)
+    click.echo(json.dumps(index.describe_index_stats(), indent=2))
+    index.close()
+
+
+@main.command("train")
+@click.argument("path", type=click.Path(exists=True, file_okay=False))
+@click.option("--sample", default=50_000, show_default=True, help="Vectors used to fit the PQ codebooks")
+@click.option("--iters", default=20, show_default=True, help="k-means iterations per sub-space")
+def train_cmd(path, sample, iters):
+    """(Re)fit the PQ codebooks and re-encode every vector."""
+    index = _open(path)
+    used = index.train(sample=sample, iters=iters)
+    click.echo(f"Trained on {used} vectors ({index.codec}).")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
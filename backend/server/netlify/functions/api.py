@@ -1,18 +1,31 @@
+import logging
+from typing import Optional
+
 from mangum import Mangum
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, BackgroundTasks, Depends, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from backend.server.netlify.functions.handlers.admin_ingest import IngestResponse, ingest_legislation_admin
+from backend.server.netlify.functions.handlers.batch import answer_batch_handler, query_batch_handler
 from backend.server.netlify.functions.handlers.chat import chat_handler
 from backend.server.netlify.functions.handlers.conversation import get_conversation_handler, list_conversations_handler
 from backend.server.netlify.functions.handlers.list_ingested_urls import UrlsResponse, list_ingested_urls_handler
 
 from .handlers.auth    import register_handler
 from .handlers.login   import login_handler
-from .db.db            import get_db
-from ..utils.auth import get_current_admin_user, get_current_user
-from .schemas.schemas import ChatRequest, ChatResponse, ConversationHistory, ConversationSummary, IngestRequest, QueryRequest, QueryResponse, AnswerResponse, RegisterRequest, RegisterResponse, LoginRequest, LoginResponse
+from .db.db            import get_db, track_queries
+from ..utils.auth import get_current_admin_user, get_current_user, require_known_user
+from ..utils.settings import settings
+from ..utils.metrics import CONTENT_TYPE, observe_request, registry
+from ..utils.tracing import start_trace
+from .schemas.schemas import BatchQueryRequest, ChatRequest, ChatResponse, ConversationHistory, ConversationPage, IngestRequest, QueryRequest, QueryResponse, AnswerResponse, RegisterRequest, RegisterResponse, LoginRequest, LoginResponse
+
+logging.basicConfig(
+    level=settings.LOG_LEVEL,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
 
 app = FastAPI(title="Road Legislation QA")
 
@@ -27,8 +40,48 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Trace-Id"],
 )
 
+@app.middleware("http")
+async def db_query_stats(request: Request, call_next):
+    """
+    Report per-request SQL statement count and time, and the time spent
+    getting a connection, e.g. for regression tests.
+    """
+    with track_queries() as stats:
+        response = await call_next(request)
+    response.headers["X-DB-Queries"] = str(stats.count)
+    response.headers["X-DB-Time-Ms"] = f"{stats.total_ms:.1f}"
+    response.headers["X-DB-Acquire-Ms"] = f"{stats.acquire_ms:.1f}"
+    return response
+
+@app.middleware("http")
+async def request_trace(request: Request, call_next):
+    """
+    Trace every request; per-stage timings are returned as a Server-Timing header
+    and recorded in the /metrics histograms.
+    """
+    with start_trace(f"{request.method} {request.url.path}") as trace:
+        response = await call_next(request)
+        trace.root.attributes["status_code"] = response.status_code
+        response.headers["Server-Timing"] = trace.server_timing()
+        response.headers["X-Trace-Id"] = trace.trace_id
+    # label by route template, not raw path, to keep series bounded
+    route = getattr(request.scope.get("route"), "path", None)
+    if route is None:
+        # plain Starlette routes (docs, openapi) have fixed paths
+        route = request.url.path if "endpoint" in request.scope else "unmatched"
+    observe_request(request.method, route, response.status_code, trace)
+    return response
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Prometheus scrape endpoint (aggregated across workers when configured).
+    """
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
 @app.post(
     "/admin/ingest_legislation",
     response_model=IngestResponse,
@@ -36,9 +89,10 @@ app.add_middleware(
 )
 async def ingest_legislation(
     req: IngestRequest,
+    db: Session = Depends(get_db),
     user_id: str = Depends(get_current_admin_user),
 ):
-    return await ingest_legislation_admin(req, user_id)
+    return await ingest_legislation_admin(req, db, user_id)
 
 @app.get(
     "/admin/ingested_urls",
@@ -46,50 +100,91 @@ async def ingest_legislation(
     summary="[ADMIN] List already-ingested legislation URLs",
 )
 async def ingested_urls(
+    limit: int = Query(100, ge=1, le=500),
+    after: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    db: Session = Depends(get_db),
     user_id: str = Depends(get_current_admin_user),
 ):
-    return list_ingested_urls_handler(user_id)
+    return await run_in_threadpool(list_ingested_urls_handler, db, user_id, limit=limit, after=after)
 
 @app.post("/chat", response_model=ChatResponse)
 async def chat(
     req: ChatRequest,
+    background: BackgroundTasks,
     db: Session            = Depends(get_db),
     user_id: str = Depends(get_current_user),
 ):
-    return await chat_handler(req, db, user_id)
+    return await chat_handler(req, db, user_id, background)
+
+@app.post(
+    "/query/batch",
+    summary="Retrieve matches for many questions; streams one JSON line per question (NDJSON)",
+    description="Lines are streamed under uvicorn; behind Mangum (Netlify Functions) the response is buffered.",
+)
+async def query_batch(
+    req: BatchQueryRequest,
+    db: Session = Depends(get_db),
+    user_id: str = Depends(get_current_user),
+):
+    await _known_user(db, user_id)
+    return await query_batch_handler(req)
+
+@app.post(
+    "/answer/batch",
+    summary="Answer many questions; streams one JSON line per question (NDJSON)",
+    description=(
+        "Lines are streamed under uvicorn; behind Mangum (Netlify Functions) the response is "
+        "buffered, so batches there are capped at BATCH_MAX_ANSWERS_SERVERLESS questions."
+    ),
+)
+async def answer_batch(
+    req: BatchQueryRequest,
+    db: Session = Depends(get_db),
+    user_id: str = Depends(get_current_user),
+):
+    await _known_user(db, user_id)
+    return await answer_batch_handler(req)
+
+async def _known_user(db: Session, user_id: str) -> None:
+    """Reject tokens of deleted users, then free the connection before the batch streams."""
+    try:
+        await run_in_threadpool(require_known_user, db, user_id)
+    finally:
+        db.close()
 
 @app.post("/register")
 async def register(req: RegisterRequest, db: Session = Depends(get_db)):
-    return register_handler(req, db)
+    return await register_handler(req, db)
 
 @app.post("/login", response_model=LoginResponse)
-def login(req: LoginRequest, conn=Depends(get_db)):
-    try:
-        return login_handler(req, conn)
-    finally:
-        conn.close()
-        
+async def login(req: LoginRequest, db: Session = Depends(get_db)):
+    return await login_handler(req, db)
+
 @app.get(
     "/conversations",
-    response_model=list[ConversationSummary],
-    summary="List past conversations for current user"
+    response_model=ConversationPage,
+    summary="List past conversations for current user (newest first, paginated)"
 )
 async def list_conversations(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     db: Session = Depends(get_db),
     user_id: str = Depends(get_current_user)
 ):
-    return await list_conversations_handler(db, user_id)
+    return await list_conversations_handler(db, user_id, limit=limit, cursor=cursor)
 
 @app.get(
     "/conversations/{conversation_id}",
     response_model=ConversationHistory,
-    summary="Get a single conversation’s full history"
+    summary="Get a page of a single conversation’s history (newest messages first page)"
 )
 async def get_conversation(
     conversation_id: int,
+    limit: int = Query(100, ge=1, le=500),
+    before: Optional[int] = Query(None, description="next_cursor from the previous page"),
     db: Session = Depends(get_db),
     user_id: str = Depends(get_current_user)
 ):
-    return await get_conversation_handler(conversation_id, db, user_id)
+    return await get_conversation_handler(conversation_id, db, user_id, limit=limit, before=before)
 
 handler = Mangum(app)
@@ -0,0 +1,267 @@
+# backend/server/netlify/functions/db/conversations.py
+#
+# Data-access helpers for /chat and the conversation endpoints. Reads are a
+# single column-only SQL statement each (no ORM hydration), so a request costs
+# a known, small number of round trips.
+
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import insert, select, true, tuple_, update
+from sqlalchemy.orm import Session
+
+from ..models.models import Conversation, Message
+
+
+def load_memory(
+    db: Session,
+    conversation_id: int,
+    user_id: int,
+    window: int,
+) -> Optional[Tuple[str, List[dict]]]:
+    """
+    Verify ownership and fetch the rolling memory summary plus the last `window`
+    messages (oldest first) in one query, so the cost does not grow with the
+    conversation. Returns None if the conversation does not exist or belongs
+    to another user.
+    """
+    recent = (
+        select(Message.id, Message.role, Message.content)
+        .where(Message.conversation_id == conversation_id)
+        .order_by(Message.id.desc())
+        .limit(window)
+        .subquery()
+    )
+    stmt = (
+        select(Conversation.memory_summary, recent.c.id, recent.c.role, recent.c.content)
+        .select_from(Conversation)
+        .outerjoin(recent, true())
+        .where(Conversation.id == conversation_id, Conversation.user_id == user_id)
+        .order_by(recent.c.id)
+    )
+    rows = db.execute(stmt).all()
+    if not rows:
+        return None
+    memory_summary = rows[0].memory_summary or ""
+    return memory_summary, [{"role": r.role, "content": r.content} for r in rows if r.role is not None]
+
+
+def save_turn(
+    db: Session,
+    conversation_id: Optional[int],
+    user_id: int,
+    messages: List[Tuple[str, str, datetime]],
+    summary: Optional[str] = None,
+    memory_summary: Optional[str] = None,
+) -> int:
+    """
+    Persist one chat turn in a single transaction:
+      - create the conversation (INSERT … RETURNING) when `conversation_id` is None,
+        otherwise update its summary and rolling memory summary (those given)
+      - insert every (role, content, created_at) message in one multi-row INSERT
+    Returns the conversation id.
+    """
+    values = {}
+    if summary is not None:
+        values["summary"] = summary
+    if memory_summary is not None:
+        values["memory_summary"] = memory_summary
+    try:
+        if conversation_id is None:
+            conversation_id = db.execute(
+                insert(Conversation)
+                .values(user_id=user_id, created_at=messages[0][2], **values)
+                .returning(Conversation.id)
+            ).scalar_one()
+        elif values:
+            db.execute(
+                update(Conversation)
+                .where(Conversation.id == conversation_id)
+                .values(**values)
+            )
+
+        db.execute(
+            insert(Message),
+            [
+                {
+                    "conversation_id": conversation_id,
+                    "role": role,
+                    "content": content,
+                    "created_at": created_at,
+                }
+                for role, content, created_at in messages
+            ],
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return conversation_id
+
+
+def read_summary_inputs(
+    db: Session,
+    conversation_id: int,
+    unfolded_limit: int,
+    recent_limit: int,
+) -> Optional[Tuple[str, int, List[dict], List[dict]]]:
+    """
+    Everything a summary refresh needs, in two queries: the rolling memory
+    summary, its fold watermark, the first `unfolded_limit` messages after the
+    watermark (oldest first, with ids) and the last `recent_limit` messages
+    (oldest first) for the title. Returns None if the conversation is gone.
+    """
+    conv = select(Conversation.memory_summary, Conversation.memory_folded_through).where(
+        Conversation.id == conversation_id
+    ).subquery()
+    unfolded = (
+        select(Message.id, Message.role, Message.content)
+        .where(Message.conversation_id == conversation_id, Message.id > conv.c.memory_folded_through)
+        .order_by(Message.id)
+        .limit(unfolded_limit)
+        .subquery()
+    )
+    stmt = (
+        select(conv.c.memory_summary, conv.c.memory_folded_through, unfolded.c.id, unfolded.c.role, unfolded.c.content)
+        .select_from(conv)
+        .outerjoin(unfolded, true())
+        .order_by(unfolded.c.id)
+    )
+    rows = db.execute(stmt).all()
+    if not rows:
+        return None
+
+    recent = (
+        select(Message.role, Message.content)
+        .where(Message.conversation_id == conversation_id)
+        .order_by(Message.id.desc())
+        .limit(recent_limit)
+    )
+    recent_rows = db.execute(recent).all()
+    return (
+        rows[0].memory_summary or "",
+        rows[0].memory_folded_through or 0,
+        [{"id": r.id, "role": r.role, "content": r.content} for r in rows if r.id is not None],
+        [{"role": r.role, "content": r.content} for r in reversed(recent_rows)],
+    )
+
+
+def save_summaries(
+    db: Session,
+    conversation_id: int,
+    summary: str,
+    memory_summary: Optional[str] = None,
+    folded_through: Optional[int] = None,
+    previous_folded_through: int = 0,
+) -> None:
+    """
+    Update the title summary and, if given, the rolling memory summary with
+    its new watermark `folded_through`, in one transaction. The memory update
+    applies only while the watermark is still `previous_folded_through`, so a
+    concurrent refresh that folded first is never overwritten or folded twice.
+    """
+    try:
+        db.execute(update(Conversation).where(Conversation.id == conversation_id).values(summary=summary))
+        if memory_summary is not None:
+            db.execute(
+                update(Conversation)
+                .where(
+                    Conversation.id == conversation_id,
+                    Conversation.memory_folded_through == previous_folded_through,
+                )
+                .values(memory_summary=memory_summary, memory_folded_through=folded_through)
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+# ─── Keyset pagination ──────────────────────────────────────────────────────
+def encode_conversation_cursor(created_at: datetime, conversation_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{conversation_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_conversation_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Raises ValueError for a malformed cursor.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, conversation_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(conversation_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def list_conversation_page(
+    db: Session,
+    user_id: int,
+    limit: int,
+    before: Optional[Tuple[datetime, int]] = None,
+) -> Tuple[List[dict], Optional[Tuple[datetime, int]]]:
+    """
+    One page of a user's conversations, newest first, served from the
+    (user_id, created_at) index. `before` is the (created_at, id) of the last
+    row of the previous page. Returns (rows, next_key or None).
+    """
+    stmt = (
+        select(Conversation.id, Conversation.created_at, Conversation.summary)
+        .where(Conversation.user_id == user_id)
+        .order_by(Conversation.created_at.desc(), Conversation.id.desc())
+        .limit(limit + 1)
+    )
+    if before is not None:
+        stmt = stmt.where(tuple_(Conversation.created_at, Conversation.id) < tuple_(*before))
+    rows = db.execute(stmt).all()
+
+    page = rows[:limit]
+    next_key = (page[-1].created_at, page[-1].id) if len(rows) > limit else None
+    return [
+        {"conversation_id": r.id, "created_at": r.created_at, "summary": r.summary or ""}
+        for r in page
+    ], next_key
+
+
+def message_page(
+    db: Session,
+    conversation_id: int,
+    user_id: int,
+    limit: int,
+    before: Optional[int] = None,
+) -> Optional[Tuple[List[dict], Optional[int]]]:
+    """
+    Verify ownership and fetch the newest `limit` messages older than message id
+    `before` (oldest first), in one query served from the (conversation_id, id)
+    index. Returns None if the conversation is not the user's, otherwise
+    (messages, next_before or None) — pass next_before back to load older messages.
+    """
+    page = select(Message.id, Message.role, Message.content, Message.created_at).where(
+        Message.conversation_id == conversation_id
+    )
+    if before is not None:
+        page = page.where(Message.id < before)
+    page = page.order_by(Message.id.desc()).limit(limit + 1).subquery()
+
+    stmt = (
+        select(Conversation.id.label("conversation_id"), page.c.id, page.c.role, page.c.content, page.c.created_at)
+        .select_from(Conversation)
+        .outerjoin(page, true())
+        .where(Conversation.id == conversation_id, Conversation.user_id == user_id)
+        .order_by(page.c.id)
+    )
+    rows = db.execute(stmt).all()
+    if not rows:
+        return None
+
+    msgs = [r for r in rows if r.id is not None]
+    next_before = None
+    if len(msgs) > limit:
+        msgs = msgs[1:]
+        next_before = msgs[0].id
+    return [
+        {"role": r.role, "content": r.content, "created_at": r.created_at}
+        for r in msgs
+    ], next_before
@@ -0,0 +1,37 @@
+"""ingested sources registry
+
+Revision ID: 0001_ingested_sources
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001_ingested_sources"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ingested_sources",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("url", sa.String(length=2048), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=True),
+        sa.Column("chunk_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("ingested_at", sa.DateTime(), nullable=True),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="in_progress"),
+        sa.Column("claimed_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_ingested_sources_id", "ingested_sources", ["id"])
+    op.create_index("ix_ingested_sources_url", "ingested_sources", ["url"], unique=True)
+    op.create_index("ix_ingested_sources_status_id", "ingested_sources", ["status", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ingested_sources_status_id", table_name="ingested_sources")
+    op.drop_index("ix_ingested_sources_url", table_name="ingested_sources")
+    op.drop_index("ix_ingested_sources_id", table_name="ingested_sources")
+    op.drop_table("ingested_sources")
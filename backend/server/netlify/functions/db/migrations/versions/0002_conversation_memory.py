@@ -0,0 +1,30 @@
+"""conversation rolling memory summary and its fold watermark
+
+Revision ID: 0002_conversation_memory
+Revises: 0001_ingested_sources
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002_conversation_memory"
+down_revision = "0001_ingested_sources"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "conversations",
+        sa.Column("memory_summary", sa.Text(), nullable=True, server_default=""),
+    )
+    op.add_column(
+        "conversations",
+        sa.Column("memory_folded_through", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("conversations", "memory_folded_through")
+    op.drop_column("conversations", "memory_summary")
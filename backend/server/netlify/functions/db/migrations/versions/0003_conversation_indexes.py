@@ -0,0 +1,27 @@
+"""composite indexes for keyset pagination
+
+Revision ID: 0003_conversation_indexes
+Revises: 0002_conversation_memory
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+
+revision = "0003_conversation_indexes"
+down_revision = "0002_conversation_memory"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_conversations_user_id_created_at", "conversations", ["user_id", "created_at"]
+    )
+    op.create_index(
+        "ix_messages_conversation_id_id", "messages", ["conversation_id", "id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_messages_conversation_id_id", table_name="messages")
+    op.drop_index("ix_conversations_user_id_created_at", table_name="conversations")
@@ -0,0 +1,38 @@
+"""index generations registry (blue/green re-indexing)
+
+Revision ID: 0004_index_generations
+Revises: 0003_conversation_indexes
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004_index_generations"
+down_revision = "0003_conversation_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "index_generations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("namespace", sa.String(length=64), nullable=False, unique=True),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="building"),
+        sa.Column("embedding_model", sa.String(length=255), nullable=True),
+        sa.Column("vector_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("promoted_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_index_generations_id", "index_generations", ["id"])
+    op.create_index(
+        "ux_index_generations_live", "index_generations", ["status"], unique=True,
+        postgresql_where=sa.text("status = 'live'"), sqlite_where=sa.text("status = 'live'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ux_index_generations_live", table_name="index_generations")
+    op.drop_index("ix_index_generations_id", table_name="index_generations")
+    op.drop_table("index_generations")
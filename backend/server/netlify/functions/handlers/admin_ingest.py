@@ -2,21 +2,32 @@
 
 import os
 import sys
+import time
+import hashlib
+from datetime import datetime, timedelta
 from typing import List
-from fastapi import HTTPException, Depends
+from fastapi import HTTPException, Depends, status
 from pydantic import BaseModel, HttpUrl
-from pinecone import Pinecone, ServerlessSpec
-from sentence_transformers import SentenceTransformer
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 
 # ─── Settings / environment ─────────────────────────────────────────────────
-from backend.scrape_api.crawler import crawl
+from backend.scrape_api.acts import tag_acts
+from backend.scrape_api.chunk_store import vector_metadata
 from backend.scrape_api.html_parser import chunk_text, parse_html
+from backend.scrape_api.upsert import UpsertDispatcher, vector_id
+from backend.server.netlify.functions.models.models import IngestedSource
+from backend.server.netlify.utils.container import chunk_store, embedder, pinecone_index
+from backend.server.netlify.utils.generations import write_namespaces
+from backend.server.netlify.utils.metrics import (
+    CRAWL_LINKS, CRAWL_PAGES, CRAWL_SECONDS, UPSERT_SECONDS, VECTORS_UPSERTED,
+)
 from backend.server.netlify.utils.settings import settings
+from backend.server.netlify.utils.tracing import set_attrs, span
 
-PINECONE_KEY   = settings.PINECONE_API_KEY
-PINECONE_ENV   = settings.PINECONE_ENV
-PINECONE_INDEX = settings.PINECONE_INDEX
+UPSERT_MAX_IN_FLIGHT = int(os.getenv("UPSERT_MAX_IN_FLIGHT", "4"))
 
 # ─── Pydantic request/response schemas ──────────────────────────────────────
 class IngestRequest(BaseModel):
@@ -24,6 +35,7 @@ class IngestRequest(BaseModel):
 
 class IngestResponse(BaseModel):
     inserted_chunks: int
+    vectors_per_second: float = 0.0
 
 # ─── URL → “name” helper ─────────────────────────────────────────────────────
 def get_name_from_url(url: str) -> str:
@@ -39,51 +51,95 @@ def get_name_from_url(url: str) -> str:
         name = quote_plus(parsed.netloc + parsed.path)
     return name.replace(" ", "_")
 
-# ─── Pinecone + model initialization ────────────────────────────────────────
-pc = Pinecone(api_key=PINECONE_KEY, environment=PINECONE_ENV)
-if PINECONE_INDEX not in pc.list_indexes().names():
-    pc.create_index(
-        name=PINECONE_INDEX,
-        dimension=384,
-        metric="cosine",
-        spec=ServerlessSpec(cloud="aws", region=PINECONE_ENV),
+# Pinecone, the embedding model and the chunk store come from utils/container.py
+# and are built on first use; the index itself is created by the admin step
+# `python -m backend.server.netlify.utils.pinecone`.
+
+
+def _claim_source(db: Session, url: str) -> IngestedSource:
+    """
+    Look the URL up in the ingested-sources registry (unique index) and mark it
+    in_progress. A completed or running ingest is rejected; a failed one is
+    retried, and so is one claimed more than INGEST_CLAIM_STALE_MINUTES ago
+    (its process died or its Lambda timed out before it could finish).
+    """
+    now = datetime.utcnow()
+    stale_before = now - timedelta(minutes=settings.INGEST_CLAIM_STALE_MINUTES)
+    busy = HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Legislation at URL {url} is already being ingested."
     )
-_index = pc.Index(PINECONE_INDEX)
-
-EMBED_MODEL = os.getenv(
-    "EMBEDDING_MODEL",
-    "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
-)
-_model = SentenceTransformer(EMBED_MODEL)
+    source = db.query(IngestedSource).filter(IngestedSource.url == url).first()
+    if source is None:
+        source = IngestedSource(url=url, status="in_progress", chunk_count=0, claimed_at=now)
+        db.add(source)
+        try:
+            db.commit()
+        except IntegrityError:
+            # a concurrent request claimed the same URL first
+            db.rollback()
+            raise busy
+        return source
+
+    if source.status == "done":
+        raise HTTPException(
+            status_code=400,
+            detail=f"Legislation at URL {url} has already been ingested."
+        )
+    if source.status == "in_progress" and source.claimed_at is not None and source.claimed_at >= stale_before:
+        raise busy
+
+    # take the row over only if nobody else did since it was read
+    claimed_at = IngestedSource.claimed_at
+    taken = db.query(IngestedSource).filter(
+        IngestedSource.id == source.id,
+        IngestedSource.status == source.status,
+        (claimed_at == source.claimed_at) if source.claimed_at is not None else claimed_at.is_(None),
+    ).update({"status": "in_progress", "claimed_at": now}, synchronize_session=False)
+    db.commit()
+    if not taken:
+        raise busy
+    db.refresh(source)
+    return source
 
 
 async def ingest_legislation_admin(
     req: IngestRequest,
+    db: Session,
     user_id: str = Depends(...),  # use your get_current_admin_user here
 ) -> IngestResponse:
     # ─── 0) Prevent duplicate ingestion ───────────────────────────────────
-    stats = _index.describe_index_stats()
-    dim = stats["dimension"]
-    # dummy zero-vector to allow use of metadata filter
-    dummy_vector = [0.0] * dim
-    dup_check = _index.query(
-        vector=dummy_vector,
-        filter={"url": {"$in": [req.url]}},
-        top_k=1,
-        include_metadata=False,
-    )
-    if dup_check.matches:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Legislation at URL {req.url} has already been ingested."
-        )
+    url = str(req.url)
+    # crawl, encode, upsert and the DB work all block; keep them off the event loop
+    source = await run_in_threadpool(_claim_source, db, url)
+    return await run_in_threadpool(_ingest, db, url, source)
+
+
+def _ingest(db: Session, url: str, source: IngestedSource) -> IngestResponse:
+    # the crawler pulls in requests/bs4/pdf libraries; only load them when ingesting
+    from backend.scrape_api.crawler import crawl
+    from backend.scrape_api.frontier import Frontier
 
     try:
         # ─── 1) Crawl + chunk ───────────────────────────────────────────────
-        data = crawl(req.url, max_depth=1)
+        crawl_start = time.perf_counter()
+        with span("crawl"):
+            frontier = Frontier()
+            try:
+                data = crawl(url, max_depth=settings.CRAWL_MAX_DEPTH, frontier=frontier,
+                             max_pages=settings.CRAWL_MAX_PAGES, max_bytes=settings.CRAWL_MAX_BYTES)
+                crawl_stats = frontier.summary()
+            finally:
+                frontier.close()
+            set_attrs(entries=len(data), frontier_left=crawl_stats["frontier"],
+                      link_dedup_rate=crawl_stats["dedup_rate"])
+        CRAWL_LINKS.inc(crawl_stats["links"] - crawl_stats["duplicate_links"], outcome="queued")
+        CRAWL_LINKS.inc(crawl_stats["duplicate_links"], outcome="duplicate")
         grouped: dict[str, List[dict]] = {}
         for e in data:
             grouped.setdefault(e["url"], []).append(e)
+        CRAWL_PAGES.inc(len(grouped))
+        CRAWL_SECONDS.inc(time.perf_counter() - crawl_start)
 
         texts: List[str] = []
         metas: List[dict] = []
@@ -118,27 +174,76 @@ async def ingest_legislation_admin(
                         "text":        txt,
                     })
 
+        if not metas:
+            # the start URL failed to fetch or held no text: leave the source retryable
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Nothing could be ingested from {url}."
+            )
+
+        # act metadata ("OUG 195/2002"), for queries scoped to one act
+        tag_acts(metas)
+
+        ids = [vector_id(m["url"], m["chunk_index"], m["text"]) for m in metas]
+
         # ─── 2) Embed ────────────────────────────────────────────────────────
-        embeddings = _model.encode(texts, show_progress_bar=False)
-
-        # ─── 3) Upsert in batches ────────────────────────────────────────────
-        batch_size = 100
-        total = 0
-        for i in range(0, len(embeddings), batch_size):
-            batch_emb  = embeddings[i : i + batch_size]
-            batch_meta = metas[i : i + batch_size]
-            vectors = [
-                (
-                    f"{page_url}#{i+j}",
-                    emb.tolist() if hasattr(emb, "tolist") else emb,
-                    batch_meta[j],
+        with span("embed", chunks=len(texts)):
+            embeddings = embedder().encode(texts, show_progress_bar=False)
+
+        # ─── 3) Copy texts into the chunk store, if there is one ────────────
+        # Unless CHUNK_STORE_SHARED says every instance reads this file, the
+        # vectors below carry their text as well: on Lambda the store is a
+        # per-instance file, and only the metadata copy reaches the others.
+        store = chunk_store()
+        with_text = store is None or not settings.CHUNK_STORE_SHARED
+        if store is not None:
+            with span("chunks.store"):
+                store.put_many(
+                    (vid, m["url"], m["chunk_index"], m["text"]) for vid, m in zip(ids, metas)
                 )
-                for j, emb in enumerate(batch_emb)
-            ]
-            _index.upsert(vectors=vectors)
-            total += len(vectors)
 
-        return IngestResponse(inserted_chunks=total)
+        # ─── 4) Upsert concurrently, IDs derived from each chunk's own url ───
+        # into the live generation and any generation still being built
+        vectors = [
+            (vid, emb, vector_metadata(meta, with_text=with_text))   # numpy rows; converted per request if needed
+            for vid, meta, emb in zip(ids, metas, embeddings)
+        ]
+        namespaces = write_namespaces(db)
+        if not namespaces:
+            raise RuntimeError("no index namespace to write to")   # the live one is always listed first
+        dispatchers = []
+        with span("vector.upsert"):
+            for namespace in namespaces:
+                with UpsertDispatcher(pinecone_index(), namespace=namespace,
+                                      max_in_flight=UPSERT_MAX_IN_FLIGHT) as d:
+                    d.submit(vectors)
+                dispatchers.append(d)
+                VECTORS_UPSERTED.inc(d.upserted)
+                UPSERT_SECONDS.inc(d.elapsed)
+            set_attrs(namespaces=len(dispatchers), upsert_requests=sum(d.requests for d in dispatchers))
+        dispatcher = dispatchers[0]   # the live generation
+        if dispatcher.upserted == 0:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"No vectors were written for {url}."
+            )
+
+        # ─── 5) Record the completed source ─────────────────────────────────
+        source.status       = "done"
+        source.chunk_count  = dispatcher.upserted
+        source.content_hash = hashlib.sha256("\n".join(ids).encode("utf-8")).hexdigest()
+        source.ingested_at  = datetime.utcnow()
+        db.commit()
+
+        return IngestResponse(
+            inserted_chunks=dispatcher.upserted,
+            vectors_per_second=round(dispatcher.vectors_per_second, 1),
+        )
 
     except Exception as err:
+        db.rollback()
+        source.status = "failed"
+        db.commit()
+        if isinstance(err, HTTPException):
+            raise
         raise HTTPException(status_code=500, detail=str(err))
@@ -1,22 +1,50 @@
 # backend/server/netlify/functions/handlers/answer.py
 
-from openai import OpenAI
+import asyncio
+import logging
+from typing import Dict, Optional
+
 from fastapi import HTTPException
 from backend.server.netlify.functions.schemas.schemas import AnswerResponse, QueryResponse
-from backend.server.netlify.utils.settings import settings
+from backend.server.netlify.utils.container import llm
+from backend.server.netlify.utils.metrics import CHUNK_TEXT_MISSING
+from backend.server.netlify.utils.openai_client import Priority
+from backend.server.netlify.utils.tracing import span
+from .query import fetch_texts
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+logger = logging.getLogger(__name__)
 
-async def answer_handler(qr: QueryResponse) -> AnswerResponse:
+async def answer_handler(
+    qr: QueryResponse,
+    texts: Optional[Dict[str, str]] = None,
+    priority: Priority = Priority.INTERACTIVE,
+) -> AnswerResponse:
+    """
+    Answer `qr.prompt` from its matches. `texts` is a chunk text map shared
+    across a batch (see query.fetch_texts); batch answers run at BACKGROUND
+    priority so they never hold up /chat. Matches whose text is in neither
+    the chunk store nor their metadata are left out (and counted); if none
+    has a text the request fails instead of answering from no context.
+    """
     if not qr.matches:
         return AnswerResponse(answer="Nu am găsit pasaje relevante.")
 
+    # Chunk texts are kept out of vector metadata; fetch them by vector ID
+    # (a SQLite read on a cache miss, so off the event loop)
+    ids = [m.id for m in qr.matches if m.id]
+    with span("chunks.fetch", requested=len(ids)):
+        texts = await asyncio.to_thread(fetch_texts, ids, texts)
+
     snippets = []
+    missing = []
     for m in qr.matches:
-        # Extract directly from metadata
         url = m.metadata.get("url", "")
         idx = m.metadata.get("chunk_index", None)
-        text = m.metadata.get("text", "")
+        # Older vectors still carry their text in metadata
+        text = texts.get(m.id) or m.metadata.get("text", "")
+        if not text:
+            missing.append(m.id)
+            continue
 
         # Clean up and truncate if desired
         snippet_text = text.replace("\n", " ").strip()
@@ -24,6 +52,13 @@ async def answer_handler(qr: QueryResponse) -> AnswerResponse:
 
         snippets.append(f"* (score {m.score:.3f}) “{snippet_text}” — {url}")
 
+    if missing:
+        CHUNK_TEXT_MISSING.inc(len(missing))
+        logger.warning("no chunk text for %d of %d matches (e.g. %s) in the chunk store or their metadata",
+                       len(missing), len(qr.matches), missing[0])
+    if not snippets:
+        raise HTTPException(status_code=503, detail="Retrieved passages have no text in the chunk store or the index.")
+
     # System/user messages for the LLM
     system_msg = {
         "role": "system",
@@ -44,12 +79,14 @@ async def answer_handler(qr: QueryResponse) -> AnswerResponse:
     }
 
     try:
-        resp = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[system_msg, user_msg],
-            temperature=0.2,
-            max_tokens=600
-        )
+        with span("llm.answer"):
+            resp = await llm().complete(
+                model="gpt-4o",
+                priority=priority,
+                messages=[system_msg, user_msg],
+                temperature=0.2,
+                max_tokens=600
+            )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"OpenAI error: {e}")
 
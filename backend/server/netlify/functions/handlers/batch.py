@@ -0,0 +1,159 @@
+# backend/server/netlify/functions/handlers/batch.py
+#
+# Bulk retrieval and answering for /query/batch and /answer/batch.
+#
+# A batch skips everything /chat does per turn (database, classifier,
+# rewriter): the questions are embedded in one encode call, identical
+# questions (same text and scope) are retrieved and answered once, vector
+# queries run on worker threads BATCH_CONCURRENCY at a time, and a chunk text
+# is fetched once per batch however many questions retrieve it. Each result is
+# streamed as one NDJSON line as soon as it is ready, so lines come out of
+# order; `index` is the question's position in the request.
+#
+# Streaming needs an ASGI server that sends chunks as they are produced
+# (uvicorn, as in `netlify dev`). Behind Mangum on Lambda / Netlify Functions
+# the whole response is buffered and returned at the end, within the function
+# timeout, so /answer/batch accepts at most BATCH_MAX_ANSWERS_SERVERLESS
+# questions there.
+
+import asyncio
+import os
+from typing import Any, AsyncIterator, Callable, Dict, List, Tuple
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from backend.scrape_api.acts import mentioned_acts
+from ...utils.container import embedder
+from ...utils.metrics import BATCH_QUERIES
+from ...utils.openai_client import Priority
+from ...utils.settings import settings
+from ...utils.tracing import set_attrs, span
+from ..schemas.schemas import BatchAnswerItem, BatchQueryItem, BatchQueryRequest, QueryRequest, QueryResponse
+from .answer import answer_handler
+from .query import retrieve
+
+NDJSON = "application/x-ndjson"
+
+
+def serverless() -> bool:
+    """Running as an AWS Lambda (Netlify Functions), i.e. behind Mangum."""
+    return bool(os.getenv("AWS_LAMBDA_FUNCTION_NAME"))
+
+
+def _key(q: QueryRequest) -> tuple:
+    return (" ".join(q.query.split()), q.top_k, q.act, q.url, q.version)
+
+
+async def _prepare(req: BatchQueryRequest, endpoint: str) -> Tuple[List[QueryRequest], List[List[int]], list]:
+    """
+    Validate the batch, group identical questions and embed one of each.
+    Returns (unique questions, request positions of each, their vectors).
+    """
+    limit = settings.BATCH_MAX_QUERIES
+    if endpoint == "answer" and serverless():
+        limit = min(limit, settings.BATCH_MAX_ANSWERS_SERVERLESS)
+    if len(req.queries) > limit:
+        raise HTTPException(413, f"At most {limit} queries per batch"
+                                 + (" on serverless; run the API under uvicorn for larger ones"
+                                    if limit < settings.BATCH_MAX_QUERIES else ""))
+    groups: Dict[tuple, List[int]] = {}
+    for i, q in enumerate(req.queries):
+        groups.setdefault(_key(q), []).append(i)
+    unique = [req.queries[positions[0]] for positions in groups.values()]
+    BATCH_QUERIES.inc(len(req.queries) - len(unique), endpoint=endpoint, outcome="duplicate")
+    if not unique:
+        return [], [], []
+
+    # One encode call for the whole batch, off the event loop
+    try:
+        with span("embed", queries=len(unique)):
+            vecs = await asyncio.to_thread(
+                embedder().encode, [q.query for q in unique], show_progress_bar=False
+            )
+    except Exception as e:
+        raise HTTPException(500, f"Failed to embed queries: {e}")
+    set_attrs(queries=len(req.queries), unique=len(unique))
+    return unique, list(groups.values()), [v.tolist() for v in vecs]
+
+
+async def _retrieve(slots: asyncio.Semaphore, q: QueryRequest, vec: list, texts: Dict[str, str]) -> QueryResponse:
+    inferred = mentioned_acts(q.query) if settings.INFER_ACT_SCOPE else []
+    async with slots:
+        # the vector store clients are blocking; keep the loop free for other requests
+        return await asyncio.to_thread(retrieve, q, vec, inferred, texts)
+
+
+async def _stream(
+    endpoint: str,
+    unique: List[QueryRequest],
+    positions: List[List[int]],
+    run: Callable[[int], Any],
+    item: Callable[[int, QueryRequest, Any], Any],
+    failed: Callable[[int, QueryRequest, str], Any],
+) -> AsyncIterator[str]:
+    """
+    Run `run(n)` for every unique question and yield one NDJSON line per
+    request position as each finishes. Pending work is cancelled if the
+    client goes away.
+    """
+    async def job(n: int):
+        try:
+            return n, await run(n), None
+        except HTTPException as e:
+            return n, None, str(e.detail)
+        except Exception as e:
+            return n, None, str(e)
+
+    tasks = [asyncio.ensure_future(job(n)) for n in range(len(unique))]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            n, result, error = await next_done
+            BATCH_QUERIES.inc(len(positions[n]), endpoint=endpoint, outcome="error" if error else "ok")
+            for i in positions[n]:
+                line = failed(i, unique[n], error) if error else item(i, unique[n], result)
+                yield line.model_dump_json() + "\n"
+    finally:
+        for t in tasks:
+            t.cancel()
+
+
+async def query_batch_handler(req: BatchQueryRequest) -> StreamingResponse:
+    """
+    Retrieve matches for every question; one BatchQueryItem per line.
+    """
+    unique, positions, vecs = await _prepare(req, "query")
+    slots = asyncio.Semaphore(max(1, settings.BATCH_CONCURRENCY))
+    texts: Dict[str, str] = {}
+
+    lines = _stream(
+        "query", unique, positions,
+        run=lambda n: _retrieve(slots, unique[n], vecs[n], texts),
+        item=lambda i, q, qr: BatchQueryItem(index=i, query=q.query, matches=qr.matches),
+        failed=lambda i, q, error: BatchQueryItem(index=i, query=q.query, error=error),
+    )
+    return StreamingResponse(lines, media_type=NDJSON)
+
+
+async def answer_batch_handler(req: BatchQueryRequest) -> StreamingResponse:
+    """
+    Retrieve and answer every question; one BatchAnswerItem per line. The
+    answers go through the shared LLM client at BACKGROUND priority, whose
+    scheduler bounds them (OPENAI_MAX_IN_FLIGHT and the rate limits).
+    """
+    unique, positions, vecs = await _prepare(req, "answer")
+    slots = asyncio.Semaphore(max(1, settings.BATCH_CONCURRENCY))
+    texts: Dict[str, str] = {}
+
+    async def run(n: int) -> Tuple[QueryResponse, str]:
+        qr = await _retrieve(slots, unique[n], vecs[n], texts)
+        answer = await answer_handler(qr, texts, priority=Priority.BACKGROUND)
+        return qr, answer.answer
+
+    lines = _stream(
+        "answer", unique, positions,
+        run=run,
+        item=lambda i, q, res: BatchAnswerItem(index=i, query=q.query, answer=res[1], sources=res[0].matches),
+        failed=lambda i, q, error: BatchAnswerItem(index=i, query=q.query, error=error),
+    )
+    return StreamingResponse(lines, media_type=NDJSON)
@@ -1,15 +1,23 @@
 # src/python_be/server/handlers/chat.py
 
-from typing import List
+import asyncio
+import logging
+import weakref
+from typing import List, Optional
 from datetime import datetime
 
-from fastapi import Depends, HTTPException, status
+from fastapi import BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
 
-from openai import OpenAI
-
-from backend.server.netlify.functions.db.db import get_db
+from backend.scrape_api.acts import mentioned_acts
+from backend.server.netlify.functions.db.db import SessionLocal, get_db, get_engine
+from backend.server.netlify.functions.db.conversations import (
+    load_memory,
+    read_summary_inputs,
+    save_summaries,
+    save_turn,
+)
 from backend.server.netlify.functions.schemas.schemas import (
     ChatRequest,
     ChatResponse,
@@ -17,18 +25,29 @@ from backend.server.netlify.functions.schemas.schemas import (
     AnswerResponse,
     MessageItem,
 )
-from backend.server.netlify.utils.auth import get_current_user
-from backend.server.netlify.utils.summarizer import generate_conversation_summary
+from backend.server.netlify.utils.container import llm
+from backend.server.netlify.utils.openai_client import Priority
+from backend.server.netlify.utils.auth import get_current_user, require_known_user
+from backend.server.netlify.utils.memory import (
+    MEMORY_FOLD_BATCH,
+    build_prompt_messages,
+    fold_into_summary,
+    slide_window,
+    window_size,
+)
+from backend.server.netlify.utils.summarizer import TITLE_CONTEXT_MESSAGES, generate_conversation_summary
+from backend.server.netlify.utils.tracing import set_attrs, span
 from ...utils.settings import settings
-from ..models.models import Conversation, Message, User
 from .query import query_handler, QueryRequest
 from .answer import answer_handler
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+logger = logging.getLogger(__name__)
 
+# One summary refresh at a time per conversation, so a fold never starts from
+# a memory summary another turn is still rewriting
+_summary_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
 
-def is_road_legislation_question(text: str) -> bool:
-    print('in fct is_road_legislation_question....')
+async def is_road_legislation_question(text: str) -> bool:
     """
     Ask a lightweight OpenAI classifier whether `text` is about road legislation.
     Returns True if the LLM says “LEGISLATION”, False if “CHAT”.
@@ -42,14 +61,16 @@ def is_road_legislation_question(text: str) -> bool:
         f"\"\"\"\n{text.strip()}\n\"\"\"\n"
     )
 
-    resp = client.chat.completions.create(
+    resp = await llm().complete(
         model="gpt-4o-mini",
+        priority=Priority.INTERACTIVE,
         messages=[
             {"role": "system", "content": "You are a simple classifier."},
             {"role": "user", "content": prompt},
         ],
         temperature=0.0,
         max_tokens=1,
+        memoize=True,
     )
     verdict = resp.choices[0].message.content.strip().upper()
     if verdict.startswith("LEG"):
@@ -59,7 +80,7 @@ def is_road_legislation_question(text: str) -> bool:
     return False  # default to CHAT if unexpected
 
 
-def rewrite_followup_question(
+async def rewrite_followup_question(
     history: List[dict],
     current_question: str
 ) -> str:
@@ -90,129 +111,189 @@ def rewrite_followup_question(
         }
     )
 
-    resp = client.chat.completions.create(
+    resp = await llm().complete(
         model="gpt-4o-mini",
+        priority=Priority.INTERACTIVE,
         messages=rewriter_messages,
         temperature=0.0,
         max_tokens=64,
+        memoize=True,
     )
     return resp.choices[0].message.content.strip()
 
 
+def infer_acts(user_text: str, rewritten_query: str) -> List[str]:
+    """
+    Acts the question is about: those named in the message or its rewrite.
+    Earlier turns only count through the rewrite, which carries a follow-up's
+    context, so the scope ends as soon as the conversation moves on.
+    """
+    return mentioned_acts(f"{user_text}\n{rewritten_query}")
+
+
+async def refresh_summaries(conversation_id: int) -> None:
+    """
+    Fold every message that has left the window since the stored fold
+    watermark into the rolling memory summary and regenerate the title summary
+    from the last TITLE_CONTEXT_MESSAGES messages, then store both. Runs after
+    the /chat response is sent (BACKGROUND-priority LLM calls), on its own
+    session. Its input is read from the messages table, so turns a failed or
+    cut-short refresh did not fold are picked up by the next one.
+    """
+    lock = _summary_locks.get(conversation_id)
+    if lock is None:
+        lock = _summary_locks[conversation_id] = asyncio.Lock()
+    async with lock:
+        db = SessionLocal(bind=get_engine())
+        try:
+            def read():
+                try:
+                    return read_summary_inputs(
+                        db, conversation_id, MEMORY_FOLD_BATCH + window_size(), TITLE_CONTEXT_MESSAGES
+                    )
+                finally:
+                    db.rollback()   # no connection held through the LLM calls
+
+            inputs = await run_in_threadpool(read)
+            if inputs is None:
+                return
+            memory_summary, folded_through, unfolded, recent = inputs
+
+            _, evicted = slide_window(unfolded)
+            new_memory_summary = None
+            if evicted:
+                new_memory_summary = await fold_into_summary(memory_summary, evicted)
+            history_items: List[MessageItem] = [
+                MessageItem(role=m["role"], content=m["content"], created_at=None)
+                for m in recent
+            ]
+            summary_text = await generate_conversation_summary(history_items)
+            await run_in_threadpool(
+                save_summaries,
+                db,
+                conversation_id,
+                summary_text,
+                memory_summary=new_memory_summary,
+                folded_through=evicted[-1]["id"] if evicted else None,
+                previous_folded_through=folded_through,
+            )
+        except Exception:
+            logger.exception("summary refresh failed for conversation %s", conversation_id)
+        finally:
+            await run_in_threadpool(db.close)
+
+
 async def chat_handler(
     req: ChatRequest,
     db: Session = Depends(get_db),
     user_id: str = Depends(get_current_user),
+    background: Optional[BackgroundTasks] = None,
 ) -> ChatResponse:
     """
-    1) If no conversation_id provided, create a new Conversation row.
-    2) Insert the new user message (role="user") into the Message table.
-    3) Fetch the entire message history for this conversation.
-    4) If this is a follow-up question (>=2 user turns exist), rewrite it.
-    5) Classify (LEGISLATION vs. CHAT):
-         • If LEGISLATION → call RAG: query_handler + answer_handler.
-         • Otherwise → run a generic OpenAI chat completion on full history.
-    6) Insert assistant’s reply.
-    7) Generate a short summary of the updated conversation and store it in Conversation.summary.
-    8) Return ChatResponse.
+    1) Verify the user and, for an existing conversation, load its memory: the
+       rolling summary plus the last K turns (one query, constant size).
+    2) If this is a follow-up question (>=2 user turns in the window), rewrite it.
+    3) Classify (LEGISLATION vs. CHAT):
+         • If LEGISLATION → call RAG: query_handler + answer_handler, scoped
+           to the request's act/url/version or to the acts the question names.
+         • Otherwise → run a generic OpenAI chat completion on the token-budgeted
+           memory (summary + recent turns).
+    4) Persist the conversation (if new) and both messages in one transaction.
+    5) After the response is sent (`background`), fold the turns that left
+       the window into the rolling summary and regenerate the title summary.
+       Without `background` this runs before returning.
+    6) Return ChatResponse.
     """
 
-    # Verify user exists
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid user",
-        )
+    # The DB work below is synchronous SQLAlchemy: it runs in the threadpool
+    # so a slow query holds up this request only, not every request on the loop
+
+    # Verify user exists (cached; usually no DB round trip)
+    with span("auth.user"):
+        uid = await run_in_threadpool(require_known_user, db, user_id)
 
-    # 1) Create a new Conversation if no ID was passed
+    # 1) Load memory for an existing conversation; then end the transaction so
+    #    the connection goes back to the pool instead of being held through the
+    #    LLM calls (save_turn takes a new one)
     conv_id = req.conversation_id
-    if conv_id is None:
-        new_conv = Conversation(created_at=datetime.utcnow(), user_id=user.id, summary="")
-        db.add(new_conv)
-        db.commit()
-        db.refresh(new_conv)
-        conv_id = new_conv.id
-    else:
-        convo = db.query(Conversation).filter(
-            Conversation.id == conv_id,
-            Conversation.user_id == user.id,
-        ).first()
-        if convo is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Conversation not found",
-            )
 
-    # 2) Insert the new user message into the DB
-    user_msg = Message(
-        conversation_id=conv_id,
-        role="user",
-        content=req.message.strip(),
-        created_at=datetime.utcnow(),
-    )
-    db.add(user_msg)
-    db.commit()
-    db.refresh(user_msg)
+    def read_memory():
+        try:
+            return load_memory(db, conv_id, uid, window_size()) if conv_id is not None else ("", [])
+        finally:
+            db.rollback()
 
-    # 3) Fetch the full history (ordered by Message.id ascending)
-    stmt = select(Message).where(Message.conversation_id == conv_id).order_by(Message.id)
-    all_messages = db.execute(stmt).scalars().all()
+    with span("db.load_memory"):
+        memory = await run_in_threadpool(read_memory)
+    if memory is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversation not found",
+        )
+    memory_summary, window = memory
 
-    openai_history: List[dict] = [
-        {"role": msg.role, "content": msg.content} for msg in all_messages
-    ]
+    user_text = req.message.strip()
+    user_created_at = datetime.utcnow()
+    openai_history: List[dict] = window + [{"role": "user", "content": user_text}]
 
-    # 4) Rewrite follow-up if needed
+    # 2) Rewrite follow-up if needed
     user_turns = [m for m in openai_history if m["role"] == "user"]
     if len(user_turns) >= 2:
         context_for_rewriter = openai_history[-4:]
-        rewritten_query = rewrite_followup_question(context_for_rewriter, req.message)
+        with span("llm.rewrite"):
+            rewritten_query = await rewrite_followup_question(context_for_rewriter, req.message)
     else:
-        rewritten_query = req.message.strip()
+        rewritten_query = user_text
 
-    # 5) Classify and generate assistant reply
-    if is_road_legislation_question(rewritten_query):
-        print('road-legislation-question......')
-        qr = QueryRequest(query=rewritten_query)
-        query_resp: QueryResponse = await query_handler(qr)
+    # 3) Classify and generate assistant reply
+    with span("llm.classify"):
+        is_legislation = await is_road_legislation_question(rewritten_query)
+        set_attrs(route="legislation" if is_legislation else "chat")
+    logger.debug("chat route: %s", "legislation" if is_legislation else "chat")
+
+    if is_legislation:
+        qr = QueryRequest(query=rewritten_query, act=req.act, url=req.url, version=req.version)
+        inferred = infer_acts(user_text, rewritten_query) if settings.INFER_ACT_SCOPE else []
+        set_attrs(inferred_acts=",".join(inferred))
+        query_resp: QueryResponse = await query_handler(qr, inferred_acts=inferred)
         answer_resp: AnswerResponse = await answer_handler(query_resp)
         assistant_text = answer_resp.answer
     else:
-        chat_completion = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=openai_history,
-            temperature=0.7,
-            max_tokens=256,
-        )
+        with span("llm.chat"):
+            chat_completion = await llm().complete(
+                model="gpt-4o-mini",
+                priority=Priority.INTERACTIVE,
+                messages=build_prompt_messages(
+                    memory_summary, openai_history, settings.CHAT_MEMORY_TOKEN_BUDGET
+                ),
+                temperature=0.7,
+                max_tokens=256,
+            )
         assistant_text = chat_completion.choices[0].message.content.strip()
+    assistant_created_at = datetime.utcnow()
 
-    # 6) Persist the assistant’s reply
-    assistant_msg = Message(
-        conversation_id=conv_id,
-        role="assistant",
-        content=assistant_text,
-        created_at=datetime.utcnow(),
-    )
-    db.add(assistant_msg)
-    db.commit()
-    db.refresh(assistant_msg)
-
-    # 7) Generate and store conversation summary
-    stmt2 = select(Message).where(Message.conversation_id == conv_id).order_by(Message.created_at)
-    updated_messages = db.execute(stmt2).scalars().all()
-
-    history_items: List[MessageItem] = [
-        MessageItem(role=m.role, content=m.content, created_at=m.created_at)
-        for m in updated_messages
-    ]
-    summary_text = await generate_conversation_summary(history_items)
+    # 4) Persist the turn in one transaction
+    with span("db.save_turn"):
+        conv_id = await run_in_threadpool(
+            save_turn,
+            db,
+            conv_id,
+            uid,
+            [
+                ("user", user_text, user_created_at),
+                ("assistant", assistant_text, assistant_created_at),
+            ],
+        )
 
-    convo_obj = db.query(Conversation).filter(Conversation.id == conv_id).first()
-    convo_obj.summary = summary_text
-    db.commit()
+    # 5) The summaries are BACKGROUND-priority LLM calls, so they run off the
+    #    response path; they read what to fold from the DB, not from this request
+    if background is not None:
+        background.add_task(refresh_summaries, conv_id)
+    else:
+        with span("llm.summaries"):
+            await refresh_summaries(conv_id)
 
-    # 8) Return response
+    # 6) Return response
     return ChatResponse(
         conversation_id=conv_id,
         reply=assistant_text,
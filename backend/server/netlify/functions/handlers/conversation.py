@@ -1,79 +1,68 @@
 # src/python_be/server/netlify/functions/handlers/conversation.py
 
 from fastapi import HTTPException, status
-from typing import List
+from typing import Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
 
-from ..models.models import Conversation, Message, User
-from ..schemas.schemas import ConversationSummary, ConversationHistory, MessageItem
+from ..db.conversations import (
+    decode_conversation_cursor,
+    encode_conversation_cursor,
+    list_conversation_page,
+    message_page,
+)
+from ...utils.auth import require_known_user
+from ..schemas.schemas import ConversationPage, ConversationHistory
 
 async def list_conversations_handler(
     db: Session,
-    user_id: str
-) -> List[ConversationSummary]:
+    user_id: str,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> ConversationPage:
     """
-    Return a list of { conversation_id, created_at, summary } for this user.
+    Return one page of { conversation_id, created_at, summary } for this user,
+    newest first. Pass `next_cursor` back as `cursor` for the next page.
     """
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid user",
-        )
+    # synchronous SQLAlchemy: run it in the threadpool, off the event loop
+    uid = await run_in_threadpool(require_known_user, db, user_id)
 
-    stmt = select(Conversation).where(Conversation.user_id == user.id).order_by(Conversation.created_at.desc())
-    convos = db.execute(stmt).scalars().all()
+    try:
+        before = decode_conversation_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    return [
-        ConversationSummary(
-            conversation_id=c.id,
-            created_at=c.created_at,
-            summary=c.summary or ""
-        )
-        for c in convos
-    ]
+    rows, next_key = await run_in_threadpool(list_conversation_page, db, uid, limit, before)
+
+    return ConversationPage(
+        conversations=rows,
+        next_cursor=encode_conversation_cursor(*next_key) if next_key else None,
+    )
 
 
 async def get_conversation_handler(
     conversation_id: int,
     db: Session,
-    user_id: str
+    user_id: str,
+    limit: int = 100,
+    before: Optional[int] = None,
 ) -> ConversationHistory:
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid user",
-        )
+    """
+    Return the newest `limit` messages of a conversation (oldest first).
+    Pass `next_cursor` back as `before` to page towards older messages.
+    """
+    uid = await run_in_threadpool(require_known_user, db, user_id)
 
-    convo = (
-        db.query(Conversation)
-        .filter(
-            Conversation.id == conversation_id,
-            Conversation.user_id == user.id
-        )
-        .first()
-    )
-    if not convo:
+    page = await run_in_threadpool(message_page, db, conversation_id, uid, limit, before)
+    if page is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conversation not found",
         )
-
-    stmt_msgs = select(Message).where(Message.conversation_id == convo.id).order_by(Message.created_at)
-    db_messages = db.execute(stmt_msgs).scalars().all()
-
-    history_items = [
-        MessageItem(
-            role=m.role,
-            content=m.content,
-            created_at=m.created_at
-        )
-        for m in db_messages
-    ]
+    messages, next_before = page
 
     return ConversationHistory(
-        conversation_id=convo.id,
-        messages=history_items
+        conversation_id=conversation_id,
+        messages=messages,
+        next_cursor=next_before,
     )
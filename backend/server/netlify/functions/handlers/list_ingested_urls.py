@@ -1,40 +1,41 @@
 # backend/server/netlify/functions/handlers/list_ingested_urls.py
 
-import os
-import sys
-from typing import List
-from fastapi import Depends, HTTPException
+from typing import List, Optional
 from pydantic import BaseModel, HttpUrl
-from pinecone import Pinecone, PineconeApiException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
 
-from backend.server.netlify.utils.settings import settings
-from backend.server.netlify.utils.auth import get_current_admin_user
+from backend.server.netlify.functions.models.models import IngestedSource
+
+MAX_PAGE_SIZE = 500
 
 class UrlsResponse(BaseModel):
     urls: List[HttpUrl]
-
-# initialize Pinecone client & index
-pc = Pinecone(api_key=settings.PINECONE_API_KEY, environment=settings.PINECONE_ENV)
-if settings.PINECONE_INDEX not in pc.list_indexes().names():
-    raise RuntimeError(f"Index {settings.PINECONE_INDEX!r} does not exist")
-_index = pc.Index(settings.PINECONE_INDEX)
+    next_cursor: Optional[int] = None  # pass back as `after` for the next page
 
 def list_ingested_urls_handler(
-    user_id: str = Depends(get_current_admin_user),
+    db: Session,
+    user_id: str,
+    limit: int = 100,
+    after: Optional[int] = None,
 ) -> UrlsResponse:
     """
-    List all distinct URLs that have already been ingested
-    (requires that `url` was indexed in the metadata_config).
+    List URLs recorded as successfully ingested, oldest first.
+    Keyset-paginated on the registry's primary key: `after` is the
+    `next_cursor` returned by the previous page.
     """
-    try:
-        stats = _index.describe_index_stats()
-    except PineconeApiException as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
 
-    ns = stats.get("namespaces", {}).get("", {})
-    print('ns: ', ns)
-    meta_stats = ns.get("metadata_stats", {}) or ns.get("metadata", {})
-    print('meta_stats: ', meta_stats)
-    url_counts = meta_stats.get("url", {})
+    stmt = (
+        select(IngestedSource.id, IngestedSource.url)
+        .where(IngestedSource.status == "done")
+        .order_by(IngestedSource.id)
+        .limit(limit + 1)
+    )
+    if after is not None:
+        stmt = stmt.where(IngestedSource.id > after)
+    rows = db.execute(stmt).all()
 
-    return UrlsResponse(urls=list(url_counts.keys()))
+    page = rows[:limit]
+    next_cursor = page[-1].id if len(rows) > limit else None
+    return UrlsResponse(urls=[r.url for r in page], next_cursor=next_cursor)
@@ -1,49 +1,55 @@
 # src/python_be/server/handlers/login.py
 
-import jwt
 from fastapi import HTTPException, status
-from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from ..models.models import User
 from ..schemas.schemas import LoginRequest, LoginResponse
+from ...utils.auth import issue_token
+from ...utils.passwords import passwords
 from ...utils.settings import settings
 
-pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def login_handler(
+async def login_handler(
     req: LoginRequest,
     db: Session,
 ) -> LoginResponse:
-    # 1) look up the user by username
-    user = db.query(User).filter(User.username == req.username).first()
+    # 1) look up the user by username (sync DB work runs in the threadpool,
+    #    only the bcrypt call is awaited on the loop)
+    user = await run_in_threadpool(
+        lambda: db.query(User).filter(User.username == req.username).first()
+    )
 
-    # 2) verify user exists and password matches
-    if not user or not pwd_ctx.verify(req.password, user.hashed_password):
+    # 2) pick the single hash to check: the configured admin
+    #    account authenticates against ADMIN_PASSWORD_HASH only. Its row
+    #    must exist, but the password stored in it no longer logs it in
+    #    (it used to, without the admin claim); ADMIN_PASSWORD_HASH is
+    #    never rehashed, since it lives in the environment
+    is_admin_account = req.username == settings.ADMIN_USERNAME
+    expected_hash = settings.ADMIN_PASSWORD_HASH if is_admin_account else (user.hashed_password if user else None)
+
+    # 3) verify user exists and password matches (one bcrypt call, off the event loop)
+    ok, new_hash = (False, None)
+    if user and expected_hash:
+        ok, new_hash = await passwords.verify_and_update(req.password, expected_hash)
+    if not ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # 3) check admin credentials
-    #    we compare the incoming creds against your configured admin
-    is_admin = False
-    if req.username == settings.ADMIN_USERNAME:
-        # only verify password against the ADMIN_PASSWORD_HASH
-        if pwd_ctx.verify(req.password, settings.ADMIN_PASSWORD_HASH):
-            is_admin = True
-
-    # 4) issue JWT with an extra "admin" claim
-    payload = {
-        "sub": str(user.id),
-        "admin": is_admin,
-    }
-    token = jwt.encode(payload, settings.JWT_SECRET, algorithm="HS256")
-
-    # 5) return token + flag
+    # 4) rehash stored passwords made under an older cost policy
+    if new_hash and not is_admin_account:
+        user.hashed_password = new_hash
+        await run_in_threadpool(db.commit)
+
+    # 5) issue JWT with an extra "admin" claim and an expiry
+    token = issue_token(user.id, is_admin_account)
+
+    # 6) return token + flag
     return LoginResponse(
         access_token=token,
         token_type="bearer",
-        is_admin=is_admin,
+        is_admin=is_admin_account,
     )
@@ -1,45 +1,113 @@
-from pydantic import BaseModel
-from sentence_transformers import SentenceTransformer
-from pinecone import Pinecone
-from ...utils.settings import settings
+import asyncio
+from typing import Dict, Optional, Sequence
+
 from fastapi import HTTPException
+from backend.scrape_api.acts import canonical_act, metadata_filter
+from ...utils.container import chunk_texts, embedder, pinecone_index
+from ...utils.generations import live_namespace
+from ...utils.metrics import NEAR_DUPLICATES, SCOPED_QUERIES, record_cache
+from ...utils.settings import settings
+from ...utils.tracing import set_attrs, span
 from ..schemas.schemas import QueryRequest, Match, QueryResponse
 
-# Load the identical model you used at ingest time
-HF_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-hf_model      = SentenceTransformer(HF_MODEL_NAME)
-
-PINECONE_API_KEY = settings.PINECONE_API_KEY
-PINECONE_ENV     = settings.PINECONE_ENV
-PINECONE_INDEX   = settings.PINECONE_INDEX
+# The embedding model (same one used at ingest time) and the Pinecone index
+# handle are built on first use by utils/container.py.
 
-if not PINECONE_API_KEY or not PINECONE_ENV:
-    raise RuntimeError("Missing PINECONE_API_KEY or PINECONE_ENV")
+def _search(vec: list, top_k: int, namespace: str, flt: Optional[dict]):
+    kwargs = {"filter": flt} if flt else {}
+    # Metadata carries the url and chunk position the answer cites. It is only
+    # small for vectors ingested with a shared chunk store (the CLI's
+    # --chunk_store, or CHUNK_STORE_SHARED); the others still carry their text.
+    with span("vector.query", top_k=top_k, namespace=namespace, filtered=bool(flt)):
+        resp = pinecone_index().query(
+            vector=vec,
+            top_k=top_k,
+            include_metadata=True,
+            namespace=namespace,
+            **kwargs,
+        )
+        set_attrs(matches=len(resp.matches))
+    return resp
 
-# Pinecone client + index handle
-pc    = Pinecone(api_key=PINECONE_API_KEY, environment=PINECONE_ENV)
-index = pc.Index(PINECONE_INDEX)
 
-async def query_handler(req: QueryRequest):
-    # 1) Embed
+async def query_handler(req: QueryRequest, inferred_acts: Sequence[str] = ()):
+    """
+    Embed the query and search the live index. Retrieval is restricted by the
+    request's act / url / version when given, otherwise to `inferred_acts`
+    (named in the question, see chat.py) if any; an inferred scope that
+    matches nothing (an act that was never ingested) is dropped.
+    """
+    # 1) Embed, off the event loop like the rest: the model, the vector store
+    #    clients, the alias lookup and the chunk store all block
     try:
-        vec = hf_model.encode([req.query], show_progress_bar=False)[0].tolist()
+        with span("embed"):
+            vecs = await asyncio.to_thread(embedder().encode, [req.query], show_progress_bar=False)
+            vec = vecs[0].tolist()
     except Exception as e:
         raise HTTPException(500, f"Failed to embed query: {e}")
+    return await asyncio.to_thread(retrieve, req, vec, inferred_acts)
+
 
-    # 2) Query Pinecone (v2 SDK expects `vector=…`, not `queries=…`)
+def retrieve(req: QueryRequest, vec: list, inferred_acts: Sequence[str] = (),
+             texts: Optional[Dict[str, str]] = None) -> QueryResponse:
+    """
+    Steps 2-4 of query_handler for an already embedded query. `texts` is an
+    ID -> chunk text map shared by the queries of one batch: chunks another
+    query already fetched are not looked up again, and fetched ones are added.
+    """
+    # 2) Query Pinecone (v2 SDK expects `vector=…`, not `queries=…`) with the
+    #    metadata filter pushed down, over-fetching so near-duplicates can be
+    #    collapsed without losing top_k
+    explicit = metadata_filter([canonical_act(req.act)] if req.act else (), url=req.url, version=req.version)
+    flt = explicit or metadata_filter(inferred_acts)
+    scope = "explicit" if explicit else "inferred" if flt else "none"
+    dedup = settings.DEDUP_THRESHOLD > 0
+    fetch_k = req.top_k * max(1, settings.QUERY_OVERFETCH) if dedup else req.top_k
     try:
-        resp = index.query(
-            vector=vec,
-            top_k=req.top_k,
-            include_metadata=True
-        )
+        namespace = live_namespace()
+        resp = _search(vec, fetch_k, namespace, flt)
+        if scope == "inferred" and not resp.matches:
+            scope = "fallback"
+            resp = _search(vec, fetch_k, namespace, None)
     except Exception as e:
         raise HTTPException(500, f"Pinecone query error: {e}")
+    SCOPED_QUERIES.inc(scope=scope)
+
+    # 3) Collapse near-duplicate matches, keeping the best-scored of each group
+    found = list(resp.matches)
+    if dedup and len(found) > 1:
+        from backend.scrape_api.dedup import collapse_matches   # numpy only when used
 
-    # 3) Format response
+        with span("dedup", candidates=len(found)):
+            texts = fetch_texts([m.id for m in found], texts)
+            for m in found:
+                if m.id not in texts and (m.metadata or {}).get("text"):
+                    texts[m.id] = m.metadata["text"]
+            found, collapsed = collapse_matches(found, texts, settings.DEDUP_THRESHOLD, limit=req.top_k)
+            set_attrs(collapsed=collapsed)
+        NEAR_DUPLICATES.inc(collapsed, stage="query")
+    found = found[:req.top_k]
+
+    # 4) Format response
     matches = [
-        Match(score=m.score, metadata=m.metadata)
-        for m in resp.matches
+        Match(id=m.id, score=m.score, metadata=m.metadata or {})
+        for m in found
     ]
     return QueryResponse(matches=matches, prompt=req.query)
+
+
+def fetch_texts(ids: Sequence[str], texts: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Chunk texts of `ids` from the chunk store, added to (and returned as)
+    `texts`; IDs already in `texts` are not looked up. Without a chunk store
+    nothing is added: the texts are in the matches' metadata.
+    """
+    texts = {} if texts is None else texts
+    missing = [vid for vid in dict.fromkeys(ids) if vid not in texts]
+    hits = 0
+    if missing and chunk_texts() is not None:
+        found, hits = chunk_texts().lookup(missing)
+        record_cache("chunk_text", hits, len(missing) - hits)
+        texts.update(found)
+    set_attrs(cache_hits=hits, cache_misses=len(missing) - hits, shared=len(ids) - len(missing))
+    return texts
@@ -1,6 +1,6 @@
 # src/python_be/server/models/models.py
 
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from sqlalchemy.orm import declarative_base
@@ -23,9 +23,15 @@ class Conversation(Base):
     user_id   = Column(Integer, index=True)            # from your auth system
     created_at= Column(DateTime, default=datetime.utcnow)
     summary    = Column(Text, nullable=True, default="")
+    memory_summary = Column(Text, nullable=True, default="")  # rolling summary of turns outside the window
+    memory_folded_through = Column(Integer, nullable=False, default=0, server_default="0")  # id of the last message in memory_summary
 
     messages  = relationship("Message", back_populates="conversation", cascade="all, delete")
 
+    __table_args__ = (
+        Index("ix_conversations_user_id_created_at", "user_id", "created_at"),  # keyset listing
+    )
+
 class Message(Base):
     __tablename__   = "messages"
     id              = Column(Integer, primary_key=True, index=True)
@@ -34,4 +40,44 @@ class Message(Base):
     content         = Column(Text, nullable=False)
     created_at      = Column(DateTime, default=datetime.utcnow)
 
-    conversation    = relationship("Conversation", back_populates="messages")
\ No newline at end of file
+    conversation    = relationship("Conversation", back_populates="messages")
+
+    __table_args__ = (
+        Index("ix_messages_conversation_id_id", "conversation_id", "id"),  # history / window reads
+    )
+
+class IngestedSource(Base):
+    __tablename__ = "ingested_sources"
+    id           = Column(Integer, primary_key=True, index=True)
+    url          = Column(String(2048), unique=True, nullable=False, index=True)
+    content_hash = Column(String(64), nullable=True)     # hash over the ingested chunk IDs
+    chunk_count  = Column(Integer, nullable=False, default=0)
+    ingested_at  = Column(DateTime, default=datetime.utcnow)
+    status       = Column(String(20), nullable=False, default="in_progress")  # in_progress | done | failed
+    claimed_at   = Column(DateTime, nullable=True)         # when the running ingest claimed the URL
+
+    __table_args__ = (
+        Index("ix_ingested_sources_status_id", "status", "id"),  # keyset listing
+    )
+
+    def __repr__(self):
+        return f"<IngestedSource id={self.id!r} url={self.url!r} status={self.status!r}>"
+
+class IndexGeneration(Base):
+    __tablename__ = "index_generations"
+    id              = Column(Integer, primary_key=True, index=True)
+    namespace       = Column(String(64), unique=True, nullable=False)   # Pinecone namespace holding its vectors
+    status          = Column(String(20), nullable=False, default="building")  # building | ready | live | retired | failed | deleted
+    embedding_model = Column(String(255), nullable=True)
+    vector_count    = Column(Integer, nullable=False, default=0)
+    created_at      = Column(DateTime, default=datetime.utcnow)
+    promoted_at     = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # the alias: at most one live generation
+        Index("ux_index_generations_live", "status", unique=True,
+              postgresql_where=text("status = 'live'"), sqlite_where=text("status = 'live'")),
+    )
+
+    def __repr__(self):
+        return f"<IndexGeneration id={self.id!r} namespace={self.namespace!r} status={self.status!r}>"
@@ -29,6 +29,10 @@ class MessageItem(BaseModel):
 class ChatRequest(BaseModel):
     conversation_id: Optional[int] = None  # omit to start a new chat
     message: str
+    # Restrict retrieval; when all are omitted it is scoped to the acts the question names
+    act: Optional[str] = None      # e.g. "OUG 195/2002"
+    url: Optional[str] = None      # one ingested page
+    version: Optional[str] = None  # legislatie.just.ro document id of one consolidated form
 
 class ChatResponse(BaseModel):
     conversation_id: int
@@ -38,14 +42,34 @@ class ChatResponse(BaseModel):
 class QueryRequest(BaseModel):
     query: str
     top_k: int = 5
+    act: Optional[str] = None      # e.g. "OUG 195/2002"
+    url: Optional[str] = None      # one ingested page
+    version: Optional[str] = None  # legislatie.just.ro document id of one consolidated form
     
 class Match(BaseModel):
+    id: Optional[str] = None
     score: float
     metadata: dict
     
 class QueryResponse(BaseModel):
     matches: list[Match]
     prompt: str
+
+class BatchQueryRequest(BaseModel):
+    queries: List[QueryRequest]    # at most settings.BATCH_MAX_QUERIES
+
+class BatchQueryItem(BaseModel):
+    index: int                     # position in BatchQueryRequest.queries
+    query: str
+    matches: List[Match] = []
+    error: Optional[str] = None
+
+class BatchAnswerItem(BaseModel):
+    index: int
+    query: str
+    answer: Optional[str] = None
+    sources: List[Match] = []
+    error: Optional[str] = None
     
 class IngestRequest(BaseModel):
     url: str
@@ -63,6 +87,11 @@ class ConversationSummary(BaseModel):
     created_at: datetime
     summary: Optional[str] = None
 
+class ConversationPage(BaseModel):
+    conversations: List[ConversationSummary]
+    next_cursor: Optional[str] = None  # pass back as `cursor` for the next page
+
 class ConversationHistory(BaseModel):
     conversation_id: int
-    messages: List[MessageItem]
\ No newline at end of file
+    messages: List[MessageItem]
+    next_cursor: Optional[int] = None  # pass back as `before` for older messages
\ No newline at end of file
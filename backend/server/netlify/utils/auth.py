@@ -1,55 +1,110 @@
 # src/python_be/server/utils/auth.py
 
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, Optional
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 
+from .metrics import record_cache
 from .settings import settings
+from ..functions.models.models import User
 
 bearer_scheme = HTTPBearer(
     scheme_name="Bearer",
     description="Please paste your token as: Bearer <your_jwt>"
 )
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
-) -> str:
+# Tokens issued before `exp` was added are cached for at most this long
+_NO_EXP_CACHE_SECONDS = 300
+
+
+@dataclass(frozen=True)
+class Principal:
+    user_id: str
+    is_admin: bool
+
+
+class _ExpiringLRU:
     """
-    Extracts and verifies the JWT from the Authorization: Bearer <token> header.
-    Returns the user_id (the “sub” claim) if valid, else raises 401.
+    Small thread-safe LRU whose entries also carry their own expiry time.
     """
-    token = credentials.credentials
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=["HS256"])
-        user_id: str = payload.get("sub")
-        if not user_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token payload",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        return user_id
-    except jwt.PyJWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
 
-def get_current_admin_user(
-    cred: HTTPAuthorizationCredentials = Depends(bearer_scheme),
-) -> str:
+    def __init__(self, maxsize: int, name: str):
+        self.maxsize = maxsize
+        self.name = name
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] <= time.time():
+                del self._data[key]
+                entry = None
+            if entry is not None:
+                self._data.move_to_end(key)
+        record_cache(self.name, int(entry is not None), int(entry is None))
+        return entry[0] if entry is not None else None
+
+    def put(self, key: Hashable, value: Any, expires_at: float) -> None:
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+# token hash -> Principal, valid until the token's own `exp`
+_principals = _ExpiringLRU(settings.AUTH_CACHE_SIZE, "auth_principal")
+# user ids recently confirmed to exist
+_known_users = _ExpiringLRU(settings.AUTH_CACHE_SIZE, "known_user")
+
+
+def issue_token(user_id: int, is_admin: bool) -> str:
     """
-    Decode the JWT, ensure `admin=True` in its claims,
-    and return the user_id ("sub") if okay.
+    Sign a JWT carrying everything the handlers need: `sub`, `admin`, `iat`, `exp`.
+    """
+    now = int(time.time())
+    payload = {
+        "sub": str(user_id),
+        "admin": is_admin,
+        "iat": now,
+        "exp": now + settings.JWT_TTL_SECONDS,
+    }
+    return jwt.encode(payload, settings.JWT_SECRET, algorithm="HS256")
+
+
+def _verify(token: str, invalid_detail: str) -> Principal:
+    """
+    Decode and verify `token`, serving repeat tokens from the principal cache.
     """
-    token = cred.credentials
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    principal = _principals.get(key)
+    if principal is not None:
+        return principal
+
     try:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=["HS256"])
     except jwt.PyJWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
+            detail=invalid_detail,
             headers={"WWW-Authenticate": "Bearer"},
         )
 
@@ -61,10 +116,65 @@ def get_current_admin_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    if not payload.get("admin", False):
+    principal = Principal(user_id=str(user_id), is_admin=bool(payload.get("admin", False)))
+    expires_at = payload.get("exp") or time.time() + _NO_EXP_CACHE_SECONDS
+    _principals.put(key, principal, expires_at)
+    return principal
+
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+) -> str:
+    """
+    Extracts and verifies the JWT from the Authorization: Bearer <token> header.
+    Returns the user_id (the “sub” claim) if valid, else raises 401.
+    """
+    return _verify(credentials.credentials, "Could not validate credentials").user_id
+
+def get_current_admin_user(
+    cred: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+) -> str:
+    """
+    Decode the JWT, ensure `admin=True` in its claims,
+    and return the user_id ("sub") if okay.
+    """
+    principal = _verify(cred.credentials, "Invalid authentication credentials")
+
+    if not principal.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin privileges required",
         )
 
-    return user_id
\ No newline at end of file
+    return principal.user_id
+
+
+def require_known_user(db: Session, user_id: str) -> int:
+    """
+    Confirm the token's user still exists, hitting the database only when the
+    id is not in the recently-seen cache. Returns the id as int, else raises 401.
+    """
+    uid = int(user_id)
+    if _known_users.get(uid):
+        return uid
+
+    if db.query(User.id).filter(User.id == uid).first() is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid user",
+        )
+    _known_users.put(uid, True, time.time() + settings.KNOWN_USER_TTL_SECONDS)
+    return uid
+
+
+def forget_user(user_id: int) -> None:
+    """
+    Drop a user from the known-valid cache. Called automatically when a User
+    row is deleted through the ORM; call it directly after bulk deletes.
+    """
+    _known_users.discard(int(user_id))
+
+
+@event.listens_for(User, "after_delete")
+def _forget_deleted_user(mapper, connection, target) -> None:
+    forget_user(target.id)
@@ -0,0 +1,126 @@
+# src/python_be/server/netlify/utils/container.py
+#
+# Lazily-built shared clients. Nothing here runs at import time: each
+# dependency is constructed (and its heavy library imported) on first use,
+# then shared by every handler in the process. Index existence checks live in
+# `utils/pinecone.py` as an explicit admin step, not on the request path.
+
+import logging
+import threading
+from typing import Any, Callable
+
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+_UNSET = object()
+
+
+class Lazy:
+    """
+    Thread-safe, build-once holder for a shared dependency.
+
+    `set()` replaces the instance (e.g. with a local stand-in for benchmarks)
+    and `reset()` forces a rebuild on next use.
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._value = _UNSET
+        self.__name__ = factory.__name__
+        self.__doc__ = factory.__doc__
+
+    def __call__(self) -> Any:
+        value = self._value
+        if value is _UNSET:
+            with self._lock:
+                if self._value is _UNSET:
+                    self._value = self._factory()
+                value = self._value
+        return value
+
+    @property
+    def built(self) -> bool:
+        return self._value is not _UNSET
+
+    def set(self, value: Any) -> None:
+        with self._lock:
+            self._value = value
+
+    def reset(self) -> None:
+        self.set(_UNSET)
+
+
+def lazy(factory: Callable[[], Any]) -> Lazy:
+    return Lazy(factory)
+
+
+@lazy
+def pinecone_client():
+    """Pinecone control-plane client."""
+    from pinecone import Pinecone
+
+    return Pinecone(api_key=settings.PINECONE_API_KEY, environment=settings.PINECONE_ENV)
+
+
+@lazy
+def pinecone_index():
+    """
+    Data-plane handle for settings.PINECONE_INDEX (no list_indexes round trip),
+    or the memory-mapped LocalIndex when VECTOR_BACKEND is "local".
+    """
+    if settings.VECTOR_BACKEND == "local":
+        from backend.scrape_api.vector_store import LocalIndex
+
+        return LocalIndex(
+            settings.LOCAL_INDEX_PATH,
+            dimension=settings.EMBEDDING_DIMENSION,
+            codec=settings.LOCAL_INDEX_CODEC,
+            rescore=settings.LOCAL_INDEX_RESCORE,
+        )
+    return pinecone_client().Index(settings.PINECONE_INDEX)
+
+
+@lazy
+def embedder():
+    """The one SentenceTransformer shared by query and ingest."""
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(settings.EMBEDDING_MODEL)
+
+
+@lazy
+def llm():
+    """The one async OpenAI client (pooled, rate-scheduled) shared by every handler."""
+    from .openai_client import build_llm_client
+
+    return build_llm_client()
+
+
+@lazy
+def chunk_store():
+    """
+    The SQLite chunk store at settings.CHUNK_STORE_PATH, or None when unset
+    (chunk texts are then read from vector metadata). It has to be the file
+    the ingest CLI wrote, on a volume every server process reads; an empty one
+    is reported, since answers would have no passages to quote.
+    """
+    from backend.scrape_api.chunk_store import ChunkStore
+
+    if not settings.CHUNK_STORE_PATH:
+        return None
+    store = ChunkStore(settings.CHUNK_STORE_PATH)
+    if not store.count():
+        logger.warning("chunk store %s is empty; answers will have no passage texts",
+                       settings.CHUNK_STORE_PATH)
+    return store
+
+
+@lazy
+def chunk_texts():
+    """In-memory LRU over the chunk store (None without one)."""
+    from backend.scrape_api.chunk_store import ChunkTextCache
+
+    store = chunk_store()
+    return ChunkTextCache(store, maxsize=settings.CHUNK_CACHE_SIZE) if store is not None else None
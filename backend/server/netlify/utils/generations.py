@@ -0,0 +1,329 @@
+# src/python_be/server/netlify/utils/generations.py
+#
+# Versioned index generations (blue/green re-indexing).
+#
+# Every full (re)build writes into its own Pinecone namespace, registered in
+# the `index_generations` table. Queries read whichever generation is `live`;
+# promoting a validated generation flips that status in one transaction (a
+# partial unique index allows only one live row), so a query sees either the
+# old or the new generation, never a half-built one.
+#
+#   building -> ready -> live -> retired -> deleted     (failed when validation fails)
+#
+# A build that dies marks its generation failed; one that could not (killed
+# process, lost host) is abandoned once it has been building for
+# GENERATION_STALE_HOURS: incremental ingests stop writing to it and `gc`
+# marks it failed and reclaims it.
+#
+# Until the first generation is promoted, the default namespace ("") that
+# existing deployments were filled into stays live; the first promotion
+# registers it as a retired generation, so it can be rolled back to and is
+# reclaimed by `gc` like any other. Namespaces share the
+# index, so a rebuild can change the chunker or the model but not the vector
+# dimension. Server settings are only read where needed, so the ingest CLI
+# can use this module with nothing but a database URL. Admin CLI:
+#
+#   poetry run python -m backend.server.netlify.utils.generations list
+#   poetry run python -m backend.server.netlify.utils.generations promote gen-20261019120000-ab12
+#   poetry run python -m backend.server.netlify.utils.generations gc --keep 1
+#   poetry run python -m backend.server.netlify.utils.generations abandon gen-20261019120000-ab12
+
+import time
+import secrets
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import click
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from ..functions.models.models import IndexGeneration
+
+LEGACY_NAMESPACE = ""
+
+_alias_lock = threading.Lock()
+_alias: Tuple[Optional[str], float] = (None, 0.0)   # (live namespace, monotonic expiry)
+
+
+def _session() -> Session:
+    from ..functions.db.db import SessionLocal, get_engine
+
+    return SessionLocal(bind=get_engine())
+
+
+def read_live_namespace(db: Session) -> str:
+    ns = db.execute(
+        select(IndexGeneration.namespace).where(IndexGeneration.status == "live")
+    ).scalar_one_or_none()
+    return LEGACY_NAMESPACE if ns is None else ns
+
+
+def live_namespace() -> str:
+    """
+    Namespace queries should read. Cached per process for
+    INDEX_ALIAS_TTL_SECONDS, so other workers follow a promotion within that.
+    """
+    from .settings import settings
+
+    global _alias
+    ns, expires_at = _alias
+    if ns is not None and time.monotonic() < expires_at:
+        return ns
+    with _alias_lock:
+        ns, expires_at = _alias
+        if ns is None or time.monotonic() >= expires_at:
+            with _session() as db:
+                ns = read_live_namespace(db)
+            _alias = (ns, time.monotonic() + settings.INDEX_ALIAS_TTL_SECONDS)
+    return ns
+
+
+def invalidate_alias() -> None:
+    global _alias
+    _alias = (None, 0.0)
+
+
+def _stale_before(hours: Optional[float] = None) -> datetime:
+    if hours is None:
+        from .settings import settings
+
+        hours = settings.GENERATION_STALE_HOURS
+    return datetime.utcnow() - timedelta(hours=hours)
+
+
+def write_namespaces(db: Session, stale_hours: Optional[float] = None) -> List[str]:
+    """
+    Namespaces an incremental ingest must write to: the live generation plus
+    any still building, so a rebuild in progress does not miss it. Builds
+    older than `stale_hours` (default GENERATION_STALE_HOURS) are treated as
+    abandoned.
+    """
+    building = db.execute(
+        select(IndexGeneration.namespace)
+        .where(IndexGeneration.status == "building", IndexGeneration.created_at >= _stale_before(stale_hours))
+        .order_by(IndexGeneration.id)
+    ).scalars().all()
+    return list(dict.fromkeys([read_live_namespace(db), *building]))
+
+
+def new_generation(db: Session, embedding_model: Optional[str] = None) -> IndexGeneration:
+    gen = IndexGeneration(
+        namespace=f"gen-{datetime.utcnow():%Y%m%d%H%M%S}-{secrets.token_hex(2)}",
+        status="building",
+        embedding_model=embedding_model,
+    )
+    db.add(gen)
+    db.commit()
+    return gen
+
+
+@contextmanager
+def failing_on_error(db: Session, gen: Optional[IndexGeneration]) -> Iterator[None]:
+    """
+    Mark `gen` failed when the block raises or is interrupted while it is
+    still building, so it is neither written to nor left for promotion.
+    """
+    gen_id = gen.id if gen is not None else None
+    try:
+        yield
+    except BaseException:
+        if gen_id is not None:
+            db.rollback()
+            db.execute(
+                update(IndexGeneration)
+                .where(IndexGeneration.id == gen_id, IndexGeneration.status == "building")
+                .values(status="failed")
+            )
+            db.commit()
+        raise
+
+
+def abandon(db: Session, namespace: Optional[str] = None) -> List[str]:
+    """
+    Mark failed the building generation `namespace`, or without one every
+    generation building for longer than GENERATION_STALE_HOURS. Returns the
+    namespaces marked.
+    """
+    stmt = select(IndexGeneration).where(IndexGeneration.status == "building")
+    if namespace is not None:
+        stmt = stmt.where(IndexGeneration.namespace == namespace)
+    else:
+        stmt = stmt.where(IndexGeneration.created_at < _stale_before())
+    gens = db.execute(stmt).scalars().all()
+    for gen in gens:
+        gen.status = "failed"
+    db.commit()
+    return [gen.namespace for gen in gens]
+
+
+def get_generation(db: Session, namespace: str) -> Optional[IndexGeneration]:
+    return db.execute(
+        select(IndexGeneration).where(IndexGeneration.namespace == namespace)
+    ).scalar_one_or_none()
+
+
+def _namespace_counts(index: Any) -> Dict[str, int]:
+    stats = index.describe_index_stats()
+    namespaces = stats["namespaces"] if isinstance(stats, dict) else stats.namespaces
+    return {
+        name: entry["vector_count"] if isinstance(entry, dict) else entry.vector_count
+        for name, entry in namespaces.items()
+    }
+
+
+def namespace_vector_count(index: Any, namespace: str) -> int:
+    return _namespace_counts(index).get(namespace, 0)
+
+
+def _register_legacy(db: Session) -> None:
+    """
+    Give the default namespace a retired row once another generation has
+    been live, so it can be promoted back and garbage-collected.
+    """
+    if get_generation(db, LEGACY_NAMESPACE) is None:
+        db.add(IndexGeneration(namespace=LEGACY_NAMESPACE, status="retired"))
+
+
+def validate_generation(
+    db: Session,
+    gen: IndexGeneration,
+    index: Any,
+    expected: int,
+    probe: Optional[Sequence[float]] = None,
+    timeout: float = 120.0,
+    poll: float = 2.0,
+) -> bool:
+    """
+    Wait until the namespace reports `expected` vectors (index stats are
+    eventually consistent) and, given a probe vector, that a query answers.
+    Marks the generation ready or failed.
+    """
+    deadline = time.monotonic() + timeout
+    count = namespace_vector_count(index, gen.namespace)
+    while count < expected and time.monotonic() < deadline:
+        time.sleep(poll)
+        count = namespace_vector_count(index, gen.namespace)
+
+    ok = expected > 0 and count >= expected
+    if ok and probe is not None:
+        resp = index.query(vector=list(probe), top_k=1, namespace=gen.namespace)
+        ok = bool(resp.matches)
+
+    gen.vector_count = count
+    gen.status = "ready" if ok else "failed"
+    db.commit()
+    return ok
+
+
+def promote(db: Session, namespace: str) -> IndexGeneration:
+    """
+    Atomically make `namespace` the live generation. A retired generation can
+    be promoted again to roll back.
+    """
+    gen = get_generation(db, namespace)
+    if gen is None:
+        raise ValueError(f"unknown generation {namespace!r}")
+    if gen.status == "live":
+        return gen
+    if gen.status not in ("ready", "retired"):
+        raise ValueError(f"generation {namespace!r} is {gen.status}, not ready")
+
+    db.execute(
+        update(IndexGeneration).where(IndexGeneration.status == "live").values(status="retired")
+    )
+    _register_legacy(db)
+    gen.status = "live"
+    gen.promoted_at = datetime.utcnow()
+    db.commit()
+    invalidate_alias()
+    return gen
+
+
+def collect_garbage(db: Session, index: Any, keep: int = 1) -> List[str]:
+    """
+    Delete the vectors of failed generations (stale builds included, see
+    `abandon`) and of retired ones beyond the `keep` most recently live
+    (kept for rollback); the default namespace counts as retired once a
+    generation has been promoted. Returns the namespaces removed.
+    """
+    abandon(db)
+    if read_live_namespace(db) != LEGACY_NAMESPACE:
+        _register_legacy(db)   # promoted before the default namespace was registered
+        db.commit()
+    # promotion order is retirement order; the default namespace was live first
+    retired = db.execute(
+        select(IndexGeneration)
+        .where(IndexGeneration.status == "retired")
+        .order_by(IndexGeneration.promoted_at.desc().nulls_last(), IndexGeneration.id.desc())
+    ).scalars().all()
+    failed = db.execute(
+        select(IndexGeneration).where(IndexGeneration.status == "failed")
+    ).scalars().all()
+
+    removed = []
+    counts = _namespace_counts(index)
+    for gen in [*retired[keep:], *failed]:
+        if counts.get(gen.namespace):   # an empty namespace does not exist to delete
+            index.delete(delete_all=True, namespace=gen.namespace)
+        gen.status = "deleted"
+        gen.vector_count = 0
+        db.commit()
+        removed.append(gen.namespace)
+    return removed
+
+
+# ─── Admin CLI ──────────────────────────────────────────────────────────────
+@click.group()
+def main():
+    """Inspect, promote and garbage-collect index generations."""
+
+
+@main.command("list")
+def list_cmd():
+    """Show every generation, newest first."""
+    with _session() as db:
+        gens = db.execute(select(IndexGeneration).order_by(IndexGeneration.id.desc())).scalars().all()
+        if not gens:
+            click.echo("No generations; queries read the default namespace.")
+        for g in gens:
+            click.echo(
+                f"{g.namespace or '(default)':32s} {g.status:9s} {g.vector_count:>9d} vectors  "
+                f"created {g.created_at:%Y-%m-%d %H:%M}  model={g.embedding_model or '-'}"
+            )
+
+
+@main.command("promote")
+@click.argument("namespace")
+def promote_cmd(namespace):
+    """Switch queries to NAMESPACE (ready, or retired for a rollback)."""
+    with _session() as db:
+        gen = promote(db, namespace)
+        click.echo(f"'{gen.namespace}' is live.")
+        click.echo("Register URLs ingested into it without --promote with "
+                   f"`python -m backend.server.netlify.utils.sources backfill --namespace {gen.namespace}`.")
+
+
+@main.command("abandon")
+@click.argument("namespace", required=False)
+def abandon_cmd(namespace):
+    """Mark building NAMESPACE failed (default: every stale build); `gc` then reclaims it."""
+    with _session() as db:
+        marked = abandon(db, namespace)
+    click.echo(f"Marked {len(marked)} generation(s) failed: {', '.join(marked) or '-'}")
+
+
+@main.command("gc")
+@click.option("--keep", default=1, show_default=True, help="Retired generations kept for rollback")
+def gc_cmd(keep):
+    """Delete vectors of failed and surplus retired generations."""
+    from .container import pinecone_index
+
+    with _session() as db:
+        removed = collect_garbage(db, pinecone_index(), keep=keep)
+    click.echo(f"Removed {len(removed)} generation(s): {', '.join(removed) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# src/python_be/server/netlify/utils/llm_cache.py
+#
+# Memoization of deterministic (temperature 0) chat completions: the query
+# classifier and the follow-up rewriter. Identical (model, messages, params)
+# give the same answer, so repeats — retries, resubmitted questions, common
+# openers — are served without a round trip.
+#
+#   - bounded in-process LRU (LLM_CACHE_SIZE entries, 0 disables)
+#   - optional SQLite file shared by the workers on a node (LLM_CACHE_PATH),
+#     entries expire after LLM_CACHE_TTL_SECONDS
+#   - concurrent identical calls share one request (see LLMClient.complete)
+#
+# The LRU is safe to use on the event loop; `load` and `store` do file I/O
+# and the client runs them in a worker thread.
+#
+# Lookups are counted in cache_lookups_total{cache="llm"}; a call that joined
+# one in flight counts as a hit.
+
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def cache_key(model: str, messages: List[dict], params: Dict[str, Any]) -> str:
+    """sha256 over the model, the exact messages and the sampling parameters."""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    LRU of SDK responses, optionally backed by a SQLite table of their JSON.
+    """
+
+    def __init__(self, maxsize: int, path: Optional[str] = None, ttl: float = 24 * 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS llm_cache ('
+                '  key        TEXT PRIMARY KEY,'
+                '  model      TEXT NOT NULL,'
+                '  response   TEXT NOT NULL,'
+                '  expires_at REAL NOT NULL'
+                ')'
+            )
+            self._db.execute('DELETE FROM llm_cache WHERE expires_at <= ?', (time.time(),))
+            self._db.commit()
+
+    @property
+    def persistent(self) -> bool:
+        """Whether there is a SQLite tier behind the LRU."""
+        return self._db is not None
+
+    def get_local(self, key: str) -> Optional[Any]:
+        """The response held in this process's LRU, or None."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] <= time.time():
+                del self._data[key]
+                entry = None
+            if entry is not None:
+                self._data.move_to_end(key)
+        return entry[0] if entry is not None else None
+
+    def load(self, key: str) -> Optional[Any]:
+        """The response stored in the SQLite tier, or None; a hit is kept in the LRU. Blocking."""
+        if self._db is None:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                'SELECT response, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?', (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        value = _load_response(row[0])
+        self._remember(key, value, row[1])
+        return value
+
+    def get(self, key: str) -> Optional[Any]:
+        """The cached response from either tier, or None. Blocking."""
+        value = self.get_local(key)
+        return value if value is not None else self.load(key)
+
+    def put_local(self, key: str, response: Any) -> None:
+        self._remember(key, response, time.time() + self.ttl)
+
+    def store(self, key: str, model: str, response: Any) -> None:
+        """Write the response to the SQLite tier, if there is one. Blocking."""
+        if self._db is None:
+            return
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO llm_cache (key, model, response, expires_at) VALUES (?, ?, ?, ?)',
+                (key, model, response.model_dump_json(), time.time() + self.ttl),
+            )
+            self._db.commit()
+
+    def put(self, key: str, model: str, response: Any) -> None:
+        self.put_local(key, response)
+        self.store(key, model, response)
+
+    def _remember(self, key: str, value: Any, expires_at: float) -> None:
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM llm_cache')
+                self._db.commit()
+
+
+def _load_response(raw: str) -> Any:
+    from openai.types.chat import ChatCompletion
+
+    return ChatCompletion.model_validate_json(raw)
+
+
+def build_llm_cache() -> Optional[LLMCache]:
+    from .settings import settings
+
+    if settings.LLM_CACHE_SIZE <= 0:
+        return None
+    return LLMCache(settings.LLM_CACHE_SIZE, path=settings.LLM_CACHE_PATH, ttl=settings.LLM_CACHE_TTL_SECONDS)
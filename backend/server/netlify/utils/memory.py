@@ -0,0 +1,103 @@
+# src/python_be/server/netlify/utils/memory.py
+#
+# Bounded conversation memory: the last K turns verbatim plus a rolling,
+# compressed summary of everything older, stored on Conversation.memory_summary.
+# Conversation.memory_folded_through marks the last message folded in; it moves
+# only together with the summary, so a fold that never finishes is redone from
+# the messages table on the next refresh.
+
+from typing import List, Tuple
+
+from backend.server.netlify.utils.container import llm
+from backend.server.netlify.utils.openai_client import Priority
+from backend.server.netlify.utils.settings import settings
+
+MEMORY_SUMMARY_MAX_TOKENS = 200
+MEMORY_FOLD_BATCH = 40   # messages folded per refresh, so a backlog catches up in bounded calls
+
+
+def window_size() -> int:
+    """Number of messages kept verbatim (user + assistant per turn)."""
+    return 2 * settings.CHAT_MEMORY_TURNS
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (~4 characters per token) — good enough for budgeting.
+    """
+    return len(text) // 4 + 4
+
+
+def slide_window(unfolded: List[dict]) -> Tuple[List[dict], List[dict]]:
+    """
+    Split the messages after the fold watermark (oldest first) into the
+    verbatim window and those that left it. Returns (kept, evicted); evicted
+    messages must be folded into the summary. `unfolded` may be truncated at
+    the newest end: what it evicts is then still outside the real window.
+    """
+    cut = max(0, len(unfolded) - window_size())
+    return unfolded[cut:], unfolded[:cut]
+
+
+def build_prompt_messages(memory_summary: str, window: List[dict], token_budget: int) -> List[dict]:
+    """
+    Build the chat-completion message list: the summary of older turns as a
+    system message, then as many of the most recent messages as fit in
+    `token_budget`. The newest message is always kept.
+    """
+    head: List[dict] = []
+    budget = token_budget
+    if memory_summary:
+        head.append({
+            "role": "system",
+            "content": f"Rezumatul conversației de până acum:\n{memory_summary}",
+        })
+        budget -= estimate_tokens(head[0]["content"])
+
+    tail: List[dict] = []
+    for msg in reversed(window):
+        cost = estimate_tokens(msg["content"])
+        if tail and cost > budget:
+            break
+        tail.append({"role": msg["role"], "content": msg["content"]})
+        budget -= cost
+    tail.reverse()
+    return head + tail
+
+
+async def fold_into_summary(memory_summary: str, evicted: List[dict]) -> str:
+    """
+    Incrementally update the rolling summary with messages leaving the window.
+    Only the previous summary and the evicted messages are sent, never the full history.
+    """
+    if not evicted:
+        return memory_summary
+
+    lines = []
+    for m in evicted:
+        role = "User" if m["role"] == "user" else "Assistant"
+        lines.append(f"{role}: {m['content']}")
+    transcript = "\n".join(lines)
+
+    prompt = f"""
+Rezumatul de până acum:
+{memory_summary or "(gol)"}
+
+Mesaje noi de adăugat în rezumat:
+{transcript}
+
+Actualizează rezumatul (în limba română, maxim 120 de cuvinte), păstrând faptele,
+întrebările și actele normative importante. Returnează doar rezumatul.
+"""
+
+    response = await llm().complete(
+        model="gpt-4o-mini",
+        priority=Priority.BACKGROUND,
+        messages=[
+            {"role": "system", "content": "Ești un asistent care comprimă conversații."},
+            {"role": "user", "content": prompt},
+        ],
+        temperature=0.0,
+        max_tokens=MEMORY_SUMMARY_MAX_TOKENS,
+    )
+    return response.choices[0].message.content.strip()
@@ -0,0 +1,297 @@
+# src/python_be/server/netlify/utils/metrics.py
+#
+# In-process Prometheus metrics, served as text at GET /metrics.
+#
+# The hot path takes no locks: every series keeps one small array per thread
+# and only the owning thread ever writes to it, so `inc` / `observe` is a dict
+# lookup plus a couple of float additions. Shards are summed at scrape time.
+#
+# Multi-worker uvicorn: set METRICS_MULTIPROC_DIR to a directory shared by the
+# workers. Each process then writes its own snapshot there every
+# METRICS_FLUSH_SECONDS (and at exit), and whichever worker answers the scrape
+# sums its live values with every other process's last snapshot. Snapshots of
+# exited workers are kept, so counters never go backwards across restarts;
+# clear the directory when the whole deployment restarts.
+#
+# Rates such as pages/s or vectors/s are derived by Prometheus from the
+# counters, e.g. rate(crawl_pages_total[5m]) or, per unit of active work,
+# crawl_pages_total / crawl_duration_seconds_total.
+
+import os
+import json
+import time
+import atexit
+import bisect
+import secrets
+import logging
+import threading
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _Series:
+    """
+    One labelled series: per-thread shards of `size` float slots.
+    """
+
+    __slots__ = ("size", "_shards")
+
+    def __init__(self, size: int):
+        self.size = size
+        self._shards: Dict[int, array] = {}
+
+    def shard(self) -> array:
+        ident = threading.get_ident()
+        shard = self._shards.get(ident)
+        if shard is None:
+            shard = self._shards[ident] = array("d", bytes(8 * self.size))
+        return shard
+
+    def values(self) -> List[float]:
+        total = [0.0] * self.size
+        for shard in list(self._shards.values()):
+            for i, v in enumerate(shard):
+                total[i] += v
+        return total
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], _Series] = {}
+
+    @property
+    def size(self) -> int:
+        return 1
+
+    def _get(self, labels: Dict[str, Any]) -> _Series:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series.setdefault(key, _Series(self.size))
+        return series
+
+    def snapshot(self) -> Dict[Tuple[str, ...], List[float]]:
+        return {key: s.values() for key, s in list(self._series.items())}
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        self._get(labels).shard()[0] += amount
+
+
+class Histogram(_Metric):
+    """
+    Fixed-bucket histogram; slots are [per-bucket counts..., +Inf, sum, count].
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    @property
+    def size(self) -> int:
+        return len(self.buckets) + 3
+
+    def observe(self, value: float, **labels: Any) -> None:
+        shard = self._get(labels).shard()
+        shard[bisect.bisect_left(self.buckets, value)] += 1
+        shard[-2] += value
+        shard[-1] += 1
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(v)
+
+
+class Registry:
+    def __init__(self, multiproc_dir: Optional[str] = None, flush_interval: float = 1.0):
+        self._metrics: Dict[str, _Metric] = {}
+        self.multiproc_dir = multiproc_dir
+        self.flush_interval = flush_interval
+        # pid alone can be reused by a later worker; the token keeps files distinct
+        self._file = f"{os.getpid()}-{secrets.token_hex(4)}.json"
+        self._flusher: Optional[threading.Thread] = None
+
+    def _register(self, metric: _Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name!r} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    # ─── Multi-process aggregation ──────────────────────────────────────────
+    def _snapshot(self) -> Dict[str, List[list]]:
+        return {
+            name: [[list(key), values] for key, values in m.snapshot().items()]
+            for name, m in self._metrics.items()
+        }
+
+    def flush(self) -> None:
+        """Atomically replace this process's snapshot file."""
+        if not self.multiproc_dir:
+            return
+        os.makedirs(self.multiproc_dir, exist_ok=True)
+        path = os.path.join(self.multiproc_dir, self._file)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._snapshot(), f)
+        os.replace(tmp, path)
+
+    def start(self) -> None:
+        """Begin periodic flushing (no-op without a multiproc dir)."""
+        if not self.multiproc_dir or self._flusher is not None:
+            return
+
+        def _loop():
+            while True:
+                time.sleep(self.flush_interval)
+                try:
+                    self.flush()
+                except OSError:
+                    logger.warning("metrics flush failed", exc_info=True)
+
+        self._flusher = threading.Thread(target=_loop, name="metrics-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    def collect(self) -> Dict[str, Dict[Tuple[str, ...], List[float]]]:
+        """Live values of this process plus the last snapshot of every other one."""
+        merged = {name: m.snapshot() for name, m in self._metrics.items()}
+        if not self.multiproc_dir or not os.path.isdir(self.multiproc_dir):
+            return merged
+
+        for fname in os.listdir(self.multiproc_dir):
+            if not fname.endswith(".json") or fname == self._file:
+                continue
+            try:
+                with open(os.path.join(self.multiproc_dir, fname), encoding="utf-8") as f:
+                    other = json.load(f)
+            except (OSError, ValueError):
+                continue   # being replaced right now, or not ours
+            for name, series in other.items():
+                metric = self._metrics.get(name)
+                if metric is None:
+                    continue
+                target = merged[name]
+                for key, values in series:
+                    key = tuple(key)
+                    if len(values) != metric.size:
+                        continue   # written with different buckets
+                    current = target.setdefault(key, [0.0] * metric.size)
+                    for i, v in enumerate(values):
+                        current[i] += v
+        return merged
+
+    # ─── Exposition ─────────────────────────────────────────────────────────
+    def render(self) -> str:
+        """Prometheus text exposition format 0.0.4."""
+        collected = self.collect()
+        lines: List[str] = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key, values in sorted(collected[name].items()):
+                if isinstance(metric, Histogram):
+                    cumulative = 0.0
+                    bounds = [repr(b) for b in metric.buckets] + ["+Inf"]
+                    for bound, count in zip(bounds, values):
+                        cumulative += count
+                        le = _labels(metric.labelnames, key, f'le="{bound}"')
+                        lines.append(f"{name}_bucket{le} {_num(cumulative)}")
+                    labels = _labels(metric.labelnames, key)
+                    lines.append(f"{name}_sum{labels} {_num(values[-2])}")
+                    lines.append(f"{name}_count{labels} {_num(values[-1])}")
+                else:
+                    lines.append(f"{name}{_labels(metric.labelnames, key)} {_num(values[0])}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry(settings.METRICS_MULTIPROC_DIR, settings.METRICS_FLUSH_SECONDS)
+registry.start()
+
+# ─── Application metrics ────────────────────────────────────────────────────
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests served", ("method", "route", "status"))
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "End-to-end request latency", ("method", "route"))
+STAGE_LATENCY = registry.histogram(
+    "pipeline_stage_duration_seconds", "Latency of traced pipeline stages", ("stage",))
+LLM_REQUESTS = registry.counter(
+    "llm_requests_total", "OpenAI calls by outcome (ok, error, retry)", ("model", "outcome"))
+LLM_TOKENS = registry.counter(
+    "llm_tokens_total", "OpenAI tokens used", ("model", "kind"))
+CACHE_LOOKUPS = registry.counter(
+    "cache_lookups_total", "In-process cache lookups", ("cache", "result"))
+CRAWL_PAGES = registry.counter(
+    "crawl_pages_total", "Pages fetched by the crawler during ingestion")
+CRAWL_SECONDS = registry.counter(
+    "crawl_duration_seconds_total", "Time spent crawling during ingestion")
+VECTORS_UPSERTED = registry.counter(
+    "vectors_upserted_total", "Vectors upserted into the index")
+UPSERT_SECONDS = registry.counter(
+    "upsert_duration_seconds_total", "Time spent upserting vectors")
+CRAWL_LINKS = registry.counter(
+    "crawl_links_total", "Links discovered while crawling, by whether they were queued", ("outcome",))
+NEAR_DUPLICATES = registry.counter(
+    "near_duplicate_chunks_total", "Near-duplicate matches collapsed at query time", ("stage",))
+DB_ACQUIRE = registry.histogram(
+    "db_connection_acquire_seconds", "Time to get a database connection (pool wait plus connect)", ("pool",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0))
+DB_CONNECTIONS = registry.counter(
+    "db_connection_events_total", "Database connections opened, closed, pinged, ping_failed or timed out", ("event",))
+SCOPED_QUERIES = registry.counter(
+    "scoped_queries_total", "Vector queries by metadata scope (none, explicit, inferred, fallback)", ("scope",))
+BATCH_QUERIES = registry.counter(
+    "batch_queries_total", "Questions in batch requests by outcome (ok, error, duplicate)", ("endpoint", "outcome"))
+CHUNK_TEXT_MISSING = registry.counter(
+    "chunk_text_missing_total", "Retrieved matches left out of an answer because their text was not found")
+
+
+def observe_request(method: str, route: str, status: int, trace) -> None:
+    """Record one finished request and the stage spans of its trace."""
+    HTTP_REQUESTS.inc(method=method, route=route, status=status)
+    HTTP_LATENCY.observe(trace.root.duration_ms / 1000, method=method, route=route)
+    for s in trace.spans:
+        STAGE_LATENCY.observe(s.duration_ms / 1000, stage=s.name)
+
+
+def record_cache(cache: str, hits: int, misses: int) -> None:
+    if hits:
+        CACHE_LOOKUPS.inc(hits, cache=cache, result="hit")
+    if misses:
+        CACHE_LOOKUPS.inc(misses, cache=cache, result="miss")
@@ -1,44 +1,423 @@
 # src/python_be/server/openai_client.py
+#
+# One shared, async OpenAI client for the whole process:
+#   - pooled HTTP transport (keep-alive connections are reused across calls)
+#   - per-model token buckets for requests/minute and tokens/minute
+#   - priority lanes: user-facing calls are granted capacity before background ones
+#   - jittered exponential retries on 429 / 5xx / timeouts (honouring Retry-After)
+#   - per-call latency and token metrics
+#   - memoized temperature-0 calls on request (see llm_cache.py)
+#
+# Point OPENAI_BASE_URL at a local fake server to exercise it offline.
+#
+# The connection pool, scheduler waiters and in-flight memoized calls all
+# belong to the event loop that created them. When a call arrives on a new
+# loop (asyncio.run() per invocation), the client drops them and rebuilds
+# its HTTP client instead of reusing connections bound to the old loop.
 
-import os
-from openai import OpenAI
-from openai import RateLimitError, OpenAIError
+import time
+import heapq
+import random
+import asyncio
+import itertools
+from collections import deque
+from enum import IntEnum
+from typing import Any, Dict, List, Optional
+
+from .llm_cache import LLMCache, build_llm_cache, cache_key
+from .metrics import LLM_REQUESTS, LLM_TOKENS, record_cache
 from .settings import settings
+from .tracing import set_attrs
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0   # answers a user is waiting for
+    BACKGROUND  = 1   # summaries, memory folding
+
+
+def estimate_prompt_tokens(messages: List[dict]) -> int:
+    """~4 characters per token plus per-message overhead."""
+    return sum(len(m.get("content") or "") // 4 + 4 for m in messages)
 
-# Initialize the async client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY") or settings.OPENAI_API_KEY)
 
-async def embed_text(text: str) -> list[float]:
+class TokenBucket:
     """
-    Returns the embedding vector for the given text.
+    Continuous-refill bucket sized in units per minute.
     """
-    try:
-        resp = await client.embeddings.create(
-            model=settings.openai_embedding_model,
-            input=[text]
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (0 if it already is)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+
+class RateScheduler:
+    """
+    Grants call slots per model within RPM/TPM budgets and a global in-flight
+    cap. Among callers whose model has budget, the lowest (priority, arrival)
+    goes first, so background work never delays a waiting user request.
+    """
+
+    def __init__(self, limits: Dict[str, Dict[str, int]], default_limits: Dict[str, int], max_in_flight: int):
+        self.limits = limits
+        self.default_limits = default_limits
+        self.max_in_flight = max_in_flight
+        self._buckets: Dict[str, tuple] = {}
+        self._queues: Dict[str, list] = {}
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _model_buckets(self, model: str) -> tuple:
+        if model not in self._buckets:
+            lim = self.limits.get(model, self.default_limits)
+            self._buckets[model] = (TokenBucket(lim["rpm"]), TokenBucket(lim["tpm"]))
+        return self._buckets[model]
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Serve callers on `loop`, dropping the state of the previous one."""
+        if loop is not self._loop:
+            # waiters of a previous (finished) loop can never be woken; start clean
+            self._loop = loop
+            self._queues.clear()
+            self._in_flight = 0
+            self._timer = None
+
+    async def acquire(self, model: str, tokens: int, priority: Priority) -> None:
+        loop = asyncio.get_running_loop()
+        self.bind_loop(loop)
+        fut = loop.create_future()
+        heapq.heappush(self._queues.setdefault(model, []), (int(priority), next(self._seq), tokens, fut))
+        self._pump()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        self._in_flight -= 1
+        self._pump()
+
+    def _pump(self) -> None:
+        now = time.monotonic()
+        next_wait: Optional[float] = None
+        while self._in_flight < self.max_in_flight:
+            best = None
+            for model, queue in self._queues.items():
+                while queue and queue[0][3].done():   # cancelled waiters
+                    heapq.heappop(queue)
+                if not queue:
+                    continue
+                prio, seq, tokens, _ = queue[0]
+                rpm, tpm = self._model_buckets(model)
+                wait = max(rpm.wait_time(1, now), tpm.wait_time(tokens, now))
+                if wait > 0:
+                    next_wait = wait if next_wait is None else min(next_wait, wait)
+                elif best is None or (prio, seq) < best[0]:
+                    best = ((prio, seq), model)
+            if best is None:
+                break
+            _, _, tokens, fut = heapq.heappop(self._queues[best[1]])
+            rpm, tpm = self._model_buckets(best[1])
+            rpm.take(1)
+            tpm.take(tokens)
+            self._in_flight += 1
+            fut.set_result(None)
+
+        if next_wait is not None and self._loop is not None:
+            wake_at = self._loop.time() + next_wait
+            if self._timer is not None and self._timer.when() <= wake_at:
+                return
+            if self._timer is not None:
+                self._timer.cancel()
+
+            def _wake():
+                self._timer = None
+                self._pump()
+            self._timer = self._loop.call_at(wake_at, _wake)
+
+
+class LLMMetrics:
+    """
+    Per-model call counters and a bounded window of latencies.
+    """
+
+    def __init__(self, window: int = 1024):
+        self.window = window
+        self._models: Dict[str, Dict[str, Any]] = {}
+
+    def _model(self, model: str) -> Dict[str, Any]:
+        if model not in self._models:
+            self._models[model] = {
+                "calls": 0, "errors": 0, "retries": 0, "cache_hits": 0,
+                "prompt_tokens": 0, "completion_tokens": 0,
+                "latencies": deque(maxlen=self.window),
+            }
+        return self._models[model]
+
+    def record(self, model: str, seconds: float, ok: bool, usage: Any = None) -> None:
+        m = self._model(model)
+        m["calls"] += 1
+        m["latencies"].append(seconds)
+        LLM_REQUESTS.inc(model=model, outcome="ok" if ok else "error")
+        if not ok:
+            m["errors"] += 1
+        if usage is not None:
+            prompt = getattr(usage, "prompt_tokens", 0) or 0
+            completion = getattr(usage, "completion_tokens", 0) or 0
+            m["prompt_tokens"] += prompt
+            m["completion_tokens"] += completion
+            LLM_TOKENS.inc(prompt, model=model, kind="prompt")
+            LLM_TOKENS.inc(completion, model=model, kind="completion")
+
+    def record_cached(self, model: str) -> None:
+        self._model(model)["cache_hits"] += 1
+        LLM_REQUESTS.inc(model=model, outcome="cached")
+
+    def record_retry(self, model: str) -> None:
+        self._model(model)["retries"] += 1
+        LLM_REQUESTS.inc(model=model, outcome="retry")
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        out = {}
+        for model, m in self._models.items():
+            lat = sorted(m["latencies"])
+            out[model] = {k: v for k, v in m.items() if k != "latencies"}
+            out[model]["latency_p50_ms"] = round(lat[len(lat) // 2] * 1000, 1) if lat else None
+            out[model]["latency_p95_ms"] = round(lat[min(len(lat) - 1, int(len(lat) * 0.95))] * 1000, 1) if lat else None
+        return out
+
+
+class LLMClient:
+    """
+    Shared async OpenAI client with rate-aware scheduling and retries.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        rate_limits: Optional[Dict[str, Dict[str, int]]] = None,
+        default_limits: Optional[Dict[str, int]] = None,
+        max_in_flight: int = 16,
+        max_connections: int = 20,
+        max_retries: int = 4,
+        timeout: float = 60.0,
+        backoff: float = 0.5,
+        cache: Optional[LLMCache] = None,
+    ):
+        self._client_args = (api_key, base_url, max_connections, timeout)
+        self._http, self.client = self._build_client()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.scheduler = RateScheduler(
+            rate_limits or {},
+            default_limits or {"rpm": 500, "tpm": 200_000},
+            max_in_flight,
+        )
+        self.metrics = LLMMetrics()
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.cache = cache
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _build_client(self):
+        import httpx
+        from openai import AsyncOpenAI
+
+        api_key, base_url, max_connections, timeout = self._client_args
+        http = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+        )
+        # retries are ours (scheduler-aware), not the SDK's
+        return http, AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http, max_retries=0)
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is self._loop:
+            return
+        if self._loop is not None:
+            # pooled connections and in-flight futures of the previous loop
+            # can't be used (or closed) from this one; start clean
+            self._http, self.client = self._build_client()
+            self._inflight.clear()
+        self._loop = loop
+        self.scheduler.bind_loop(loop)
+
+    def _retry_delay(self, attempt: int, err: Exception) -> float:
+        response = getattr(err, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after) + random.random() * self.backoff
+            except ValueError:
+                pass
+        return self.backoff * (2 ** (attempt - 1)) * (0.5 + random.random())
+
+    async def complete(
+        self,
+        messages: List[dict],
+        model: str,
+        priority: Priority = Priority.INTERACTIVE,
+        memoize: bool = False,
+        **params: Any,
+    ):
+        """
+        chat.completions.create() through the scheduler. Returns the SDK response.
+
+        With `memoize` a temperature-0 call is answered from the LLM cache when
+        an identical one was made before, and joins an identical call still in
+        flight instead of sending its own.
+        """
+        self._bind_loop()
+        if not memoize or self.cache is None or params.get("temperature") != 0:
+            return await self._complete(messages, model, priority, **params)
+
+        key = cache_key(model, messages, params)
+        cached = self.cache.get_local(key)
+        if cached is None and self.cache.persistent:
+            # the SQLite tier is file I/O: keep it off the event loop
+            cached = await asyncio.to_thread(self.cache.load, key)
+        if cached is not None:
+            record_cache("llm", 1, 0)
+            self.metrics.record_cached(model)
+            set_attrs(model=model, cached=True)
+            return cached
+        pending = self._inflight.get(key)
+        if pending is not None:
+            record_cache("llm", 1, 0)
+            self.metrics.record_cached(model)
+            set_attrs(model=model, cached="joined")
+            return await asyncio.shield(pending)
+
+        record_cache("llm", 0, 1)
+
+        # The shared call runs as its own task: cancelling whichever caller
+        # started it does not cancel (or fail) the callers that joined it
+        pending = self._inflight[key] = asyncio.ensure_future(
+            self._complete_and_cache(key, messages, model, priority, **params)
         )
-        # resp.data is a list of Embedding objects; grab the first one's .embedding field
-        return resp.data[0].embedding
-    except RateLimitError as e:
-        # bubble up or wrap in your own exception
-        raise
-    except OpenAIError as e:
-        # catch other OpenAI API errors
-        raise
+        # callers re-raise its error; don't warn when they were all cancelled
+        pending.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return await asyncio.shield(pending)
+
+    async def _complete_and_cache(self, key: str, messages: List[dict], model: str, priority: Priority,
+                                  **params: Any):
+        try:
+            resp = await self._complete(messages, model, priority, **params)
+            # in the LRU before the in-flight entry goes, so no caller misses both
+            self.cache.put_local(key, resp)
+        finally:
+            del self._inflight[key]
+        if self.cache.persistent:
+            await asyncio.to_thread(self.cache.store, key, model, resp)
+        return resp
 
-async def chat_completion(messages: list[dict]) -> str:
+    async def _complete(self, messages: List[dict], model: str, priority: Priority, **params: Any):
+        from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+
+        retryable = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+        tokens = estimate_prompt_tokens(messages) + int(params.get("max_tokens") or 256)
+
+        attempt = 0
+        while True:
+            await self.scheduler.acquire(model, tokens, priority)
+            start = time.perf_counter()
+            # the slot goes back however the call ends, cancellation included
+            try:
+                resp = await self.client.chat.completions.create(model=model, messages=messages, **params)
+            except retryable as err:
+                self.metrics.record(model, time.perf_counter() - start, ok=False)
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                retry_in = self._retry_delay(attempt, err)
+            except Exception:
+                self.metrics.record(model, time.perf_counter() - start, ok=False)
+                raise
+            else:
+                retry_in = None
+            finally:
+                self.scheduler.release()
+            if retry_in is not None:
+                self.metrics.record_retry(model)
+                await asyncio.sleep(retry_in)
+                continue
+
+            usage = getattr(resp, "usage", None)
+            self.metrics.record(model, time.perf_counter() - start, ok=True, usage=usage)
+            set_attrs(
+                model=model,
+                prompt_tokens=getattr(usage, "prompt_tokens", None),
+                completion_tokens=getattr(usage, "completion_tokens", None),
+                retries=attempt,
+            )
+            return resp
+
+    async def embed(self, texts: List[str], model: str, priority: Priority = Priority.INTERACTIVE) -> List[List[float]]:
+        self._bind_loop()
+        tokens = sum(len(t) // 4 + 1 for t in texts)
+        await self.scheduler.acquire(model, tokens, priority)
+        start = time.perf_counter()
+        try:
+            resp = await self.client.embeddings.create(model=model, input=texts)
+        except Exception:
+            self.metrics.record(model, time.perf_counter() - start, ok=False)
+            raise
+        finally:
+            self.scheduler.release()
+        self.metrics.record(model, time.perf_counter() - start, ok=True, usage=getattr(resp, "usage", None))
+        return [d.embedding for d in resp.data]
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+def build_llm_client() -> LLMClient:
+    return LLMClient(
+        api_key=settings.OPENAI_API_KEY,
+        base_url=settings.OPENAI_BASE_URL,
+        rate_limits=settings.OPENAI_RATE_LIMITS,
+        max_in_flight=settings.OPENAI_MAX_IN_FLIGHT,
+        max_connections=settings.OPENAI_MAX_CONNECTIONS,
+        max_retries=settings.OPENAI_MAX_RETRIES,
+        cache=build_llm_cache(),
+    )
+
+
+async def embed_text(text: str, model: str = "text-embedding-3-small") -> list[float]:
+    """
+    Returns the embedding vector for the given text.
+    """
+    from .container import llm
+
+    return (await llm().embed([text], model=model))[0]
+
+async def chat_completion(messages: list[dict], model: str = "gpt-4o-mini") -> str:
     """
     Sends a chat-completion request and returns the assistant's reply.
     messages should be a list of {"role": ..., "content": ...} dicts.
     """
-    try:
-        resp = await client.chat.completions.create(
-            model=settings.openai_chat_model,
-            messages=messages
-        )
-        # resp.choices is a list of ChatChoice; each has a .message
-        return resp.choices[0].message.content
-    except RateLimitError as e:
-        raise
-    except OpenAIError as e:
-        raise
+    from .container import llm
+
+    resp = await llm().complete(messages, model=model)
+    return resp.choices[0].message.content
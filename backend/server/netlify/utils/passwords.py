@@ -0,0 +1,53 @@
+# src/python_be/server/netlify/utils/passwords.py
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from .settings import settings
+
+
+class PasswordHasher:
+    """
+    bcrypt hashing and verification on a dedicated, bounded thread pool so
+    CPU-bound work never runs on the event loop.
+
+    `rounds` is the cost policy: hashes made with any other cost are reported
+    as needing an update by `verify_and_update`, so they get rehashed on login.
+    """
+
+    def __init__(self, rounds: int = 12, workers: int = 2):
+        self.rounds = rounds
+        self.ctx = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds,
+        )
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.ctx.hash, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(self.ctx.verify, password, hashed)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify once; if it matches and `hashed` does not follow the current cost
+        policy, also return a fresh hash to store. Returns (ok, new_hash or None).
+        """
+        return await self._run(self.ctx.verify_and_update, password, hashed)
+
+
+passwords = PasswordHasher(
+    rounds=settings.BCRYPT_ROUNDS,
+    workers=settings.PASSWORD_HASH_WORKERS,
+)
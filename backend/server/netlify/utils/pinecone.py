@@ -1,42 +1,41 @@
-import os
-from pinecone import Pinecone, ServerlessSpec, CloudProvider, AwsRegion
+# src/python_be/server/netlify/utils/pinecone.py
+#
+# Pinecone helpers on top of the shared, lazily-built index handle.
+# `ensure_index` is an explicit admin/deploy step:
+#
+#   poetry run python -m backend.server.netlify.utils.pinecone
+#
+# so request handlers never pay for list_indexes()/create_index().
+
 from typing import List, Tuple, Dict, Any
 
-# -----------------------------------------------------------------------------
-# 1) Instantiate the new Pinecone client
-# -----------------------------------------------------------------------------
-pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-
-# -----------------------------------------------------------------------------
-# 2) Pick up your index name, dimension and region from env
-# -----------------------------------------------------------------------------
-INDEX_NAME      = os.getenv("PINECONE_INDEX_NAME", "my-index")
-INDEX_DIMENSION = int(os.getenv("PINECONE_INDEX_DIMENSION", "1536"))
-REGION          = os.getenv("PINECONE_REGION", "US_EAST_1")  # must match AwsRegion enum
-
-# -----------------------------------------------------------------------------
-# 3) Create it if missing (optional) & fetch the host
-# -----------------------------------------------------------------------------
-existing = pc.list_indexes().names()
-if INDEX_NAME not in existing:
+import click
+
+from .container import pinecone_client, pinecone_index
+from .settings import settings
+
+
+def ensure_index(
+    name: str = settings.PINECONE_INDEX,
+    dimension: int = settings.EMBEDDING_DIMENSION,
+) -> bool:
+    """
+    Create the serverless index if it does not exist. Returns True if it was created.
+    """
+    from pinecone import ServerlessSpec
+
+    pc = pinecone_client()
+    if name in pc.list_indexes().names():
+        return False
     pc.create_index(
-        name=INDEX_NAME,
-        dimension=INDEX_DIMENSION,
-        spec=ServerlessSpec(
-            cloud=CloudProvider.AWS,
-            region=getattr(AwsRegion, REGION)
-        )
+        name=name,
+        dimension=dimension,
+        metric="cosine",
+        spec=ServerlessSpec(cloud="aws", region=settings.PINECONE_ENV),
     )
-index_config = pc.describe_index(INDEX_NAME)
+    return True
 
-# -----------------------------------------------------------------------------
-# 4) Instantiate an Index client against that host
-# -----------------------------------------------------------------------------
-idx = pc.Index(host=index_config.host)
 
-# -----------------------------------------------------------------------------
-# 5) Export your upsert & query functions against idx
-# -----------------------------------------------------------------------------
 def upsert(
     vectors: List[Tuple[str, List[float], Dict[str, Any]]],
     namespace: str = ""
@@ -44,7 +43,7 @@ def upsert(
     """
     Upsert a batch of (id, embedding, metadata) into Pinecone.
     """
-    return idx.upsert(vectors=vectors, namespace=namespace)
+    return pinecone_index().upsert(vectors=vectors, namespace=namespace)
 
 def query_top_k(
     embedding: List[float],
@@ -54,9 +53,22 @@ def query_top_k(
     """
     Query Pinecone for the top_k most similar vectors.
     """
-    return idx.query(
+    return pinecone_index().query(
         vector=embedding,
         top_k=top_k,
         include_metadata=True,
         namespace=namespace
     )
+
+
+@click.command()
+@click.option('--dimension', default=settings.EMBEDDING_DIMENSION, show_default=True)
+def main(dimension):
+    """Create the configured Pinecone index if it is missing."""
+    created = ensure_index(settings.PINECONE_INDEX, dimension)
+    state = "created" if created else "already exists"
+    click.echo(f"Index '{settings.PINECONE_INDEX}' {state}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,7 @@
+import os
+from typing import Dict, Optional
+
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -13,7 +17,66 @@ class Settings(BaseSettings):
     DB_NAME: str
     DATABASE_URL: str
     ADMIN_USERNAME: str
-    ADMIN_PASSWORD_HASH: str  # bcrypt‐hash of the admin’s password
+    ADMIN_PASSWORD_HASH: str  # bcrypt‐hash of the admin’s password; the only one ADMIN_USERNAME logs in with
+    DB_POOL_MODE: str = "auto"                # queue | null (NullPool, e.g. behind PgBouncer) | auto: null on AWS Lambda
+    DB_POOL_SIZE: int = 5                     # connections kept open per process (queue mode)
+    DB_MAX_OVERFLOW: int = 5                  # extra connections opened at peak, closed on return (queue mode)
+    DB_POOL_TIMEOUT_SECONDS: float = 10.0     # wait for a free connection before failing the request
+    DB_POOL_RECYCLE_SECONDS: int = 1800       # replace pooled connections older than this
+    DB_PING_IDLE_SECONDS: float = 60.0        # ping a pooled connection at checkout only after this idle time (<0 never)
+    OPENAI_BASE_URL: Optional[str] = None     # e.g. a local fake server for offline runs
+    OPENAI_MAX_IN_FLIGHT: int = 16            # concurrent OpenAI calls per process
+    OPENAI_MAX_CONNECTIONS: int = 20          # pooled keep-alive HTTP connections
+    OPENAI_MAX_RETRIES: int = 4
+    OPENAI_RATE_LIMITS: Dict[str, Dict[str, int]] = {   # per model: requests and tokens per minute
+        "gpt-4o":      {"rpm": 500, "tpm": 30_000},
+        "gpt-4o-mini": {"rpm": 500, "tpm": 200_000},
+    }
+    EMBEDDING_MODEL: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+    CHUNK_STORE_PATH: Optional[str] = None    # absolute path of a shared SQLite chunk store; unset: texts stay in vector metadata
+    CHUNK_STORE_SHARED: bool = False          # every API process reads CHUNK_STORE_PATH: admin ingest leaves texts out of metadata
+    CHUNK_CACHE_SIZE: int = 4096              # in-memory LRU entries
+    CHAT_MEMORY_TURNS: int = 6                # turns replayed verbatim to the chat model
+    CHAT_MEMORY_TOKEN_BUDGET: int = 3000      # prompt budget for summary + recent turns
+    JWT_TTL_SECONDS: int = 7 * 24 * 3600      # lifetime of issued access tokens
+    AUTH_CACHE_SIZE: int = 10_000             # verified tokens / known users kept in memory
+    KNOWN_USER_TTL_SECONDS: int = 300         # how long a confirmed user id skips the DB check
+    BCRYPT_ROUNDS: int = 12                   # cost policy; other-cost hashes are rehashed on login
+    PASSWORD_HASH_WORKERS: int = 2            # threads dedicated to bcrypt
+    LOG_LEVEL: str = "INFO"
+    TRACE_EXPORTER: str = "none"              # none | jsonl | otel
+    TRACE_JSONL_PATH: str = "traces.jsonl"    # used by the jsonl exporter
+    METRICS_MULTIPROC_DIR: Optional[str] = None  # shared dir for multi-worker /metrics
+    METRICS_FLUSH_SECONDS: float = 1.0        # how often each worker writes its snapshot
+    INDEX_ALIAS_TTL_SECONDS: float = 10.0     # how long a worker caches the live index generation
+    GENERATION_STALE_HOURS: float = 24.0      # a generation building longer than this is abandoned
+    DEDUP_THRESHOLD: float = 0.8              # MinHash similarity collapsing query matches (0 disables)
+    QUERY_OVERFETCH: int = 2                  # candidates fetched per requested match before collapsing
+    INFER_ACT_SCOPE: bool = True              # scope /chat retrieval to acts named in the question
+    BATCH_MAX_QUERIES: int = 500              # questions accepted by one /query/batch or /answer/batch
+    BATCH_CONCURRENCY: int = 8                # vector queries in flight per batch
+    BATCH_MAX_ANSWERS_SERVERLESS: int = 20    # /answer/batch questions accepted on Lambda, where Mangum buffers the stream
+    LLM_CACHE_SIZE: int = 2048                # memoized temperature-0 completions per process (0 disables)
+    LLM_CACHE_PATH: Optional[str] = None      # SQLite file shared by the workers on a node
+    LLM_CACHE_TTL_SECONDS: int = 24 * 3600    # lifetime of a memoized completion
+    VECTOR_BACKEND: str = "pinecone"          # pinecone | local (memory-mapped index on this node)
+    LOCAL_INDEX_PATH: str = "vectors"         # directory of the local index
+    LOCAL_INDEX_CODEC: str = "float16"        # float32 | float16 | pq, fixed when the index is created
+    LOCAL_INDEX_RESCORE: int = 100            # pq candidates re-scored exactly per query
+    EMBEDDING_DIMENSION: int = 384            # output size of EMBEDDING_MODEL
+    CRAWL_MAX_DEPTH: int = 1                  # link levels followed by the admin ingest crawl
+    CRAWL_MAX_PAGES: Optional[int] = None     # page budget per admin ingest crawl
+    CRAWL_MAX_BYTES: Optional[int] = None     # download budget per admin ingest crawl
+    INGEST_CLAIM_STALE_MINUTES: float = 30.0  # an in_progress ingest claimed longer ago than this is reclaimable
+
+    @field_validator("CHUNK_STORE_PATH")
+    @classmethod
+    def _absolute_chunk_store(cls, v: Optional[str]) -> Optional[str]:
+        # a relative path resolves against whatever the working directory is
+        # (read-only on Lambda), silently opening an empty store
+        if v and not os.path.isabs(v):
+            raise ValueError(f"CHUNK_STORE_PATH must be an absolute path, got {v!r}")
+        return v
 
     class Config:
         env_file = ".env"
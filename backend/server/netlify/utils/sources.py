@@ -0,0 +1,99 @@
+# src/python_be/server/netlify/utils/sources.py
+#
+# The ingested_sources registry outside the admin endpoint. The ingest CLI
+# records every URL it wrote (`record_sources`), and `backfill` registers the
+# URLs already in an index that the registry does not know (ingested before
+# it existed), so the admin duplicate check and /admin/ingested_urls see
+# them. Re-ingesting such a URL would otherwise add a second copy of its
+# vectors under the content-derived IDs.
+#
+#   poetry run python -m backend.server.netlify.utils.sources backfill
+#   poetry run python -m backend.server.netlify.utils.sources backfill --namespace gen-20261019120000-ab12
+#
+# No server settings are read at import, so the ingest CLI can use it with
+# only a database URL.
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import click
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..functions.models.models import IngestedSource
+
+_IN_CHUNK = 500
+
+
+def record_sources(db: Session, counts: Dict[str, int], hashes: Optional[Dict[str, str]] = None,
+                   only_missing: bool = False) -> int:
+    """
+    Mark every url of `counts` done with its chunk count (and content hash),
+    adding the rows that do not exist. With `only_missing` existing rows are
+    left as they are. Returns the number of rows written.
+    """
+    now = datetime.utcnow()
+    urls = list(counts)
+    written = 0
+    for i in range(0, len(urls), _IN_CHUNK):
+        part = urls[i:i + _IN_CHUNK]
+        existing = {
+            s.url: s for s in db.execute(select(IngestedSource).where(IngestedSource.url.in_(part))).scalars()
+        }
+        for url in part:
+            source = existing.get(url)
+            if source is None:
+                source = IngestedSource(url=url)
+                db.add(source)
+            elif only_missing:
+                continue
+            source.status = "done"
+            source.chunk_count = counts[url]
+            source.content_hash = (hashes or {}).get(url)
+            source.ingested_at = now
+            source.claimed_at = None
+            written += 1
+        db.commit()
+    return written
+
+
+def backfill(db: Session, index: Any, namespace: str) -> int:
+    """
+    Register every url with vectors in `namespace` that the registry is
+    missing. The index must be able to list its IDs (LocalIndex, Pinecone
+    serverless). Returns the number of urls added.
+    """
+    counts: Dict[str, int] = {}
+    for ids in index.list(namespace=namespace):
+        ids = list(ids)
+        if not ids:
+            continue
+        for vector in index.fetch(ids=ids, namespace=namespace).vectors.values():
+            url = (vector.metadata or {}).get("url")
+            if url:
+                counts[url] = counts.get(url, 0) + 1
+    return record_sources(db, counts, only_missing=True)
+
+
+# ─── Admin CLI ──────────────────────────────────────────────────────────────
+@click.group()
+def main():
+    """Maintain the ingested-sources registry."""
+
+
+@main.command("backfill")
+@click.option("--namespace", default=None, help="Namespace to scan (default: the live generation)")
+def backfill_cmd(namespace):
+    """Register the URLs already in the index that the registry is missing."""
+    from .container import pinecone_index
+    from .generations import _session, read_live_namespace
+
+    with _session() as db:
+        if namespace is None:
+            namespace = read_live_namespace(db)
+        added = backfill(db, pinecone_index(), namespace)
+    click.echo(f"Registered {added} URL(s) from namespace '{namespace or '(default)'}'.")
+
+
+if __name__ == "__main__":
+    main()
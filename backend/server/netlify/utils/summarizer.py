@@ -1,12 +1,12 @@
 # src/python_be/server/netlify/functions/utils/summarizer.py
 
-from openai import OpenAI
 from typing import List
 
 from backend.server.netlify.functions.schemas.schemas import MessageItem
-from backend.server.netlify.utils.settings import settings
+from backend.server.netlify.utils.container import llm
+from backend.server.netlify.utils.openai_client import Priority
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+TITLE_CONTEXT_MESSAGES = 20
 
 async def generate_conversation_summary(messages: List[MessageItem]) -> str:
     """
@@ -14,7 +14,7 @@ async def generate_conversation_summary(messages: List[MessageItem]) -> str:
     a very short summary (3-5 words) in Romanian.
     """
     # Take the last 20 messages to avoid token bloat
-    recent = messages[-20:]
+    recent = messages[-TITLE_CONTEXT_MESSAGES:]
     transcript_lines = []
     for m in recent:
         role = "User" if m.role == "user" else "Assistant"
@@ -30,8 +30,9 @@ Rezumă în doar 3-5 cuvinte principale esența acestei conversații (în limba
 Returnează strict acele 3-5 cuvinte, fără text suplimentar.
 """
 
-    response = client.chat.completions.create(
+    response = await llm().complete(
         model="gpt-4o-mini",
+        priority=Priority.BACKGROUND,
         messages=[
             {"role": "system", "content": "Ești un asistent care creează titluri scurte."},
             {"role": "user", "content": prompt},
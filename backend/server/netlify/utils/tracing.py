@@ -0,0 +1,176 @@
+# src/python_be/server/netlify/utils/tracing.py
+#
+# Lightweight request tracing. A Trace is opened per request (see the
+# middleware in functions/api.py) and `span(...)` blocks record each pipeline
+# stage with its timing and attributes (tokens, cache hits, ...). Outside a
+# trace `span` is a no-op, so instrumented code costs nothing in CLIs/scripts.
+#
+# Finished traces are exported according to settings.TRACE_EXPORTER:
+#   "none"  — only the Server-Timing header is produced
+#   "jsonl" — one OpenTelemetry-shaped span per line in TRACE_JSONL_PATH
+#   "otel"  — replayed into the installed opentelemetry SDK's tracer
+
+import json
+import time
+import logging
+import secrets
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_unix_ns: int
+    start: float
+    end: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    def to_otel_dict(self) -> Dict[str, Any]:
+        end_ns = self.start_unix_ns + int(self.duration_ms * 1_000_000)
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": self.start_unix_ns,
+            "endTimeUnixNano": end_ns,
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    def __init__(self, name: str):
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List[Span] = []
+        self.root = self._new_span(name, None)
+
+    def _new_span(self, name: str, parent_id: Optional[str]) -> Span:
+        return Span(
+            name=name,
+            trace_id=self.trace_id,
+            span_id=secrets.token_hex(8),
+            parent_id=parent_id,
+            start_unix_ns=time.time_ns(),
+            start=time.perf_counter(),
+        )
+
+    def server_timing(self) -> str:
+        """
+        Server-Timing header value: total duration per stage name, in ms.
+        """
+        totals: Dict[str, float] = {}
+        for s in self.spans:
+            totals[s.name] = totals.get(s.name, 0.0) + s.duration_ms
+        totals["total"] = self.root.duration_ms
+        return ", ".join(f"{name};dur={ms:.1f}" for name, ms in totals.items())
+
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+_span: ContextVar[Optional[Span]] = ContextVar("span", default=None)
+
+
+@contextmanager
+def start_trace(name: str, **attrs: Any) -> Iterator[Trace]:
+    """
+    Open a trace for one request; it is exported when the block exits.
+    """
+    trace = Trace(name)
+    trace.root.attributes.update(attrs)
+    t_token = _trace.set(trace)
+    s_token = _span.set(trace.root)
+    try:
+        yield trace
+    finally:
+        trace.root.end = time.perf_counter()
+        _span.reset(s_token)
+        _trace.reset(t_token)
+        export(trace)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Optional[Span]]:
+    """
+    Time a pipeline stage inside the current trace (no-op when there is none).
+    """
+    trace = _trace.get()
+    if trace is None:
+        yield None
+        return
+
+    parent = _span.get()
+    s = trace._new_span(name, parent.span_id if parent else None)
+    s.attributes.update(attrs)
+    token = _span.set(s)
+    try:
+        yield s
+    except Exception as e:
+        s.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        s.end = time.perf_counter()
+        _span.reset(token)
+        trace.spans.append(s)
+
+
+def set_attrs(**attrs: Any) -> None:
+    """Attach attributes (token counts, cache hits, ...) to the current span."""
+    s = _span.get()
+    if s is not None:
+        s.attributes.update(attrs)
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+
+# ─── Exporters ──────────────────────────────────────────────────────────────
+_jsonl_lock = threading.Lock()
+
+
+def _export_jsonl(trace: Trace) -> None:
+    lines = [json.dumps(s.to_otel_dict(), ensure_ascii=False, default=str)
+             for s in [trace.root, *trace.spans]]
+    with _jsonl_lock, open(settings.TRACE_JSONL_PATH, "a", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def _export_otel(trace: Trace) -> None:
+    from opentelemetry import trace as otel_trace
+
+    tracer = otel_trace.get_tracer("road-law-qa")
+    by_id: Dict[str, Any] = {}
+    for s in sorted([trace.root, *trace.spans], key=lambda s: s.start):
+        parent = by_id.get(s.parent_id)
+        ctx = otel_trace.set_span_in_context(parent) if parent is not None else None
+        o = tracer.start_span(s.name, context=ctx, start_time=s.start_unix_ns)
+        for k, v in s.attributes.items():
+            o.set_attribute(k, v if isinstance(v, (str, bool, int, float)) else str(v))
+        o.end(end_time=s.start_unix_ns + int(s.duration_ms * 1_000_000))
+        by_id[s.span_id] = o
+
+
+def export(trace: Trace) -> None:
+    exporter = settings.TRACE_EXPORTER
+    try:
+        if exporter == "jsonl":
+            _export_jsonl(trace)
+        elif exporter == "otel":
+            _export_otel(trace)
+    except Exception:
+        logger.warning("trace export via %r failed", exporter, exc_info=True)
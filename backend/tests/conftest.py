@@ -0,0 +1,10 @@
+# backend/tests/conftest.py
+#
+# The server's settings are read when its modules are imported: point them at
+# offline stand-in values first (existing environment variables still win).
+
+import tempfile
+
+from backend.bench.stubs import offline_environment
+
+offline_environment(tempfile.mkdtemp(prefix="tests-"))
@@ -0,0 +1,60 @@
+# backend/tests/test_acts.py
+
+import pytest
+
+from backend.scrape_api.acts import act_from_header, canonical_act, mentioned_acts, metadata_filter, tag_acts
+from backend.scrape_api.vector_store import matches_filter
+
+
+@pytest.mark.parametrize("question, acts", [
+    ("Ce prevede OUG 195/2002 despre viteză?", ["OUG 195/2002"]),
+    ("Conform O.U.G. nr. 195/2002, art. 49", ["OUG 195/2002"]),
+    ("ordonanța de urgență a Guvernului nr. 195 din 2002", ["OUG 195/2002"]),
+    ("Ce spune H.G. nr. 1391/2006?", ["HG 1391/2006"]),
+    ("Hotărârea Guvernului nr. 1.391/2006 și OUG 195/2002", ["HG 1391/2006", "OUG 195/2002"]),
+    ("codul rutier și regulamentul de aplicare", ["OUG 195/2002", "HG 1391/2006"]),
+    ("Legea 38 din 2003 și OUG 195/2002, iar apoi OUG 195/2002", ["LEGE 38/2003", "OUG 195/2002"]),
+    ("Care este limita de viteză pe autostradă?", []),
+    ("Am condus 195 km în 2002", []),
+])
+def test_mentioned_acts(question, acts):
+    assert mentioned_acts(question) == acts
+
+
+def test_act_from_header_and_canonical_names():
+    assert act_from_header("ORD DE URGENTA 195 12/12/2002 - Portal Legislativ") == "OUG 195/2002"
+    assert act_from_header("HOTARARE 1391 04/10/2006 - Portal Legislativ") == "HG 1391/2006"
+    assert act_from_header("Portal Legislativ") is None
+    assert canonical_act("o.u.g. nr. 195/2002") == "OUG 195/2002"
+    assert canonical_act(" H.G. nr. 1391/2006 ") == "HG 1391/2006"
+    assert canonical_act("ceva") == "ceva"
+
+
+def test_tag_acts_carries_the_header_act_across_batches():
+    known = tag_acts([{"url": "u1", "chunk_index": 0, "text": "HOTARARE 1391 04/10/2006 - Portal Legislativ"}])
+    batch = [{"url": "u1", "chunk_index": 7, "text": "Art. 100"}, {"url": "u2", "chunk_index": 3, "text": "x"}]
+    tag_acts(batch, known)
+    assert batch[0]["act"] == "HG 1391/2006" and "act" not in batch[1]
+
+
+def test_metadata_filter_shapes():
+    assert metadata_filter() is None
+    assert metadata_filter(["OUG 195/2002"]) == {"act": {"$eq": "OUG 195/2002"}}
+    assert metadata_filter(["OUG 195/2002", "HG 1391/2006", "OUG 195/2002"]) == {
+        "act": {"$in": ["OUG 195/2002", "HG 1391/2006"]}
+    }
+    assert metadata_filter(["HG 1391/2006"], url="https://x/1", version="79134") == {"$and": [
+        {"act": {"$eq": "HG 1391/2006"}}, {"url": {"$eq": "https://x/1"}}, {"name": {"$eq": "79134"}},
+    ]}
+
+
+def test_metadata_filter_selects_the_named_acts():
+    chunks = [
+        {"act": "OUG 195/2002", "url": "https://x/1", "name": "1"},
+        {"act": "HG 1391/2006", "url": "https://x/2", "name": "79134"},
+        {"url": "https://x/3", "name": "3"},   # ingested before acts were tagged
+    ]
+    flt = metadata_filter(mentioned_acts("OUG 195/2002 sau H.G. nr. 1391/2006?"))
+    assert [c["url"] for c in chunks if matches_filter(c, flt)] == ["https://x/1", "https://x/2"]
+    flt = metadata_filter(mentioned_acts("H.G. nr. 1391/2006"), version="79134")
+    assert [c["url"] for c in chunks if matches_filter(c, flt)] == ["https://x/2"]
@@ -0,0 +1,71 @@
+# backend/tests/test_admin_ingest.py
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from backend.server.netlify.functions.handlers.admin_ingest import _claim_source, _ingest
+from backend.server.netlify.functions.models.models import Base, IngestedSource
+from backend.server.netlify.utils.settings import settings
+
+URL = "https://legislatie.just.ro/Public/DetaliiDocument/1"
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def _source(db, status, minutes_ago=0.0, url=URL):
+    source = IngestedSource(url=url, status=status, chunk_count=0,
+                            claimed_at=datetime.utcnow() - timedelta(minutes=minutes_ago))
+    db.add(source)
+    db.commit()
+    return source
+
+
+def test_claim_new_url(db):
+    source = _claim_source(db, URL)
+    assert source.status == "in_progress" and source.claimed_at is not None
+
+
+def test_claim_rejects_done_and_running(db):
+    _source(db, "done")
+    with pytest.raises(HTTPException) as err:
+        _claim_source(db, URL)
+    assert err.value.status_code == 400
+
+    _source(db, "in_progress", url=URL + "/running")
+    with pytest.raises(HTTPException) as err:
+        _claim_source(db, URL + "/running")
+    assert err.value.status_code == 409
+
+
+@pytest.mark.parametrize("status, minutes_ago", [
+    ("failed", 0),
+    ("in_progress", settings.INGEST_CLAIM_STALE_MINUTES + 1),   # its process died
+])
+def test_claim_takes_over_failed_and_stale(db, status, minutes_ago):
+    before = _source(db, status, minutes_ago).claimed_at
+    source = _claim_source(db, URL)
+    assert source.status == "in_progress" and source.claimed_at > before
+
+
+def test_empty_crawl_leaves_the_url_retryable(db, monkeypatch):
+    from backend.scrape_api import crawler
+
+    monkeypatch.setattr(crawler, "crawl", lambda *args, **kwargs: [])
+    source = _claim_source(db, URL)
+    with pytest.raises(HTTPException) as err:
+        _ingest(db, URL, source)
+    assert err.value.status_code == 502
+    assert source.status == "failed"
+
+    # the next attempt is allowed again
+    assert _claim_source(db, URL).status == "in_progress"
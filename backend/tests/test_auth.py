@@ -0,0 +1,117 @@
+# backend/tests/test_auth.py
+
+import time
+
+import jwt
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from backend.server.netlify.functions.models.models import Base, User
+from backend.server.netlify.utils import auth
+from backend.server.netlify.utils.settings import settings
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    auth._principals.clear()
+    auth._known_users.clear()
+
+
+def _token(**claims):
+    return jwt.encode({"sub": "7", **claims}, settings.JWT_SECRET, algorithm="HS256")
+
+
+def test_lru_entries_expire_and_evict():
+    cache = auth._ExpiringLRU(maxsize=2, name="test")
+    now = time.time()
+    cache.put("stale", 1, now - 1)
+    assert cache.get("stale") is None
+
+    cache.put("a", 1, now + 60)
+    cache.put("b", 2, now + 60)
+    cache.get("a")               # b is now least recently used
+    cache.put("c", 3, now + 60)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def test_repeat_tokens_skip_verification(monkeypatch):
+    token = auth.issue_token(7, is_admin=True)
+    assert auth._verify(token, "bad") == auth.Principal(user_id="7", is_admin=True)
+
+    def no_decode(*args, **kwargs):
+        raise AssertionError("cached token was decoded again")
+
+    monkeypatch.setattr(auth.jwt, "decode", no_decode)
+    assert auth._verify(token, "bad").is_admin
+
+
+def test_expired_token_is_rejected_even_when_cached():
+    exp = int(time.time()) + 1
+    token = _token(exp=exp)
+    assert auth._verify(token, "bad").user_id == "7"
+
+    time.sleep(exp - time.time() + 0.05)
+    with pytest.raises(HTTPException) as err:
+        auth._verify(token, "bad")
+    assert err.value.status_code == 401
+
+
+def test_invalid_tokens_are_not_cached():
+    with pytest.raises(HTTPException) as err:
+        auth._verify("not-a-jwt", "bad")
+    assert err.value.status_code == 401 and err.value.detail == "bad"
+
+    with pytest.raises(HTTPException) as err:
+        auth._verify(jwt.encode({"admin": True}, settings.JWT_SECRET, algorithm="HS256"), "bad")
+    assert err.value.detail == "Invalid token payload"
+
+
+def test_known_user_is_cached_until_deleted(db):
+    user = User(username="ana", hashed_password="x")
+    db.add(user)
+    db.commit()
+    uid = user.id
+
+    assert auth.require_known_user(db, str(uid)) == uid
+    # answered from the cache, without a session
+    assert auth.require_known_user(None, str(uid)) == uid
+
+    db.delete(user)   # the after_delete listener drops it from the cache
+    db.commit()
+    with pytest.raises(HTTPException) as err:
+        auth.require_known_user(db, str(uid))
+    assert err.value.status_code == 401
+
+
+def test_forget_user_after_bulk_delete(db):
+    db.add(User(id=5, username="ion", hashed_password="x"))
+    db.commit()
+    auth.require_known_user(db, "5")
+
+    db.query(User).filter(User.id == 5).delete()   # bypasses ORM events
+    db.commit()
+    assert auth.require_known_user(db, "5") == 5   # still cached
+    auth.forget_user(5)
+    with pytest.raises(HTTPException):
+        auth.require_known_user(db, "5")
+
+
+def test_known_users_expire(db, monkeypatch):
+    monkeypatch.setattr(settings, "KNOWN_USER_TTL_SECONDS", -1)
+    db.add(User(id=9, username="dan", hashed_password="x"))
+    db.commit()
+    auth.require_known_user(db, "9")
+    db.query(User).filter(User.id == 9).delete()
+    db.commit()
+    with pytest.raises(HTTPException):
+        auth.require_known_user(db, "9")
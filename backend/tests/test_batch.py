@@ -0,0 +1,104 @@
+# backend/tests/test_batch.py
+
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from backend.bench.stubs import HashEmbedder
+from backend.server.netlify.functions.handlers import batch
+from backend.server.netlify.functions.schemas.schemas import (
+    AnswerResponse, BatchQueryRequest, Match, QueryRequest, QueryResponse,
+)
+from backend.server.netlify.utils.settings import settings
+
+DELAYS = {"lent": 0.15, "rapid": 0.0, "mediu": 0.05}
+
+
+@pytest.fixture
+def retrieved(monkeypatch):
+    """Stub embedder and retrieval; returns the questions retrieval was asked for."""
+    calls = []
+
+    def retrieve(req, vec, inferred_acts, texts):
+        calls.append(req.query)
+        time.sleep(DELAYS.get(req.query.split()[0], 0))
+        if req.query.startswith("eroare"):
+            raise RuntimeError("index unavailable")
+        texts[req.query] = "text"
+        return QueryResponse(prompt=req.query, matches=[
+            Match(id=f"{req.query}#0", score=0.9, metadata={"url": "https://x/1", "act": inferred_acts}),
+        ])
+
+    monkeypatch.setattr(batch, "embedder", lambda: HashEmbedder(dimension=8))
+    monkeypatch.setattr(batch, "retrieve", retrieve)
+    monkeypatch.delenv("AWS_LAMBDA_FUNCTION_NAME", raising=False)
+    return calls
+
+
+def _lines(handler, queries):
+    async def run():
+        response = await handler(BatchQueryRequest(queries=[QueryRequest(query=q) for q in queries]))
+        assert response.media_type == "application/x-ndjson"
+        return [json.loads(chunk) async for chunk in response.body_iterator]
+    return asyncio.run(run())
+
+
+def test_query_batch_streams_results_as_they_finish(retrieved):
+    lines = _lines(batch.query_batch_handler, ["lent OUG 195/2002", "rapid", "mediu"])
+    # completion order, with `index` pointing back into the request
+    assert [(line["index"], line["query"]) for line in lines] == [
+        (1, "rapid"), (2, "mediu"), (0, "lent OUG 195/2002"),
+    ]
+    assert lines[2]["matches"][0]["metadata"]["act"] == ["OUG 195/2002"]
+    assert all(line["error"] is None for line in lines)
+
+
+def test_duplicates_are_retrieved_once_and_answered_per_position(retrieved):
+    lines = _lines(batch.query_batch_handler, ["rapid", "mediu", "rapid  ", "rapid"])
+    assert sorted(retrieved) == ["mediu", "rapid"]
+    assert sorted(line["index"] for line in lines) == [0, 1, 2, 3]
+    # whitespace-only variants share the first one's result
+    assert {line["query"] for line in lines if line["index"] in (0, 2, 3)} == {"rapid"}
+
+
+def test_one_failure_does_not_fail_the_batch(retrieved):
+    lines = {line["index"]: line for line in _lines(batch.query_batch_handler, ["rapid", "eroare", "mediu"])}
+    assert lines[1]["error"] == "index unavailable" and lines[1]["matches"] == []
+    assert lines[0]["error"] is None and lines[2]["matches"]
+
+
+def test_answer_batch_reports_per_item_errors(retrieved, monkeypatch):
+    async def answer(qr, texts, priority):
+        if qr.prompt == "mediu":
+            raise HTTPException(503, "Retrieved passages have no text")
+        assert texts[qr.prompt] == "text"   # fetched once per batch, shared
+        return AnswerResponse(answer=f"răspuns: {qr.prompt}")
+
+    monkeypatch.setattr(batch, "answer_handler", answer)
+    lines = {line["index"]: line for line in _lines(batch.answer_batch_handler, ["rapid", "mediu", "eroare"])}
+    assert lines[0]["answer"] == "răspuns: rapid" and lines[0]["sources"][0]["id"] == "rapid#0"
+    assert lines[1]["error"] == "Retrieved passages have no text"
+    assert lines[2]["error"] == "index unavailable" and lines[2]["answer"] is None
+
+
+def test_serverless_caps_answer_batches_only(retrieved, monkeypatch):
+    monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "road-law-qa-api")
+    monkeypatch.setattr(settings, "BATCH_MAX_ANSWERS_SERVERLESS", 2)
+    queries = ["rapid", "mediu", "altul"]
+
+    with pytest.raises(HTTPException) as err:
+        _lines(batch.answer_batch_handler, queries)
+    assert err.value.status_code == 413 and "serverless" in err.value.detail
+    assert retrieved == []
+
+    assert len(_lines(batch.query_batch_handler, queries)) == 3
+
+
+def test_batch_size_limit(retrieved, monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_MAX_QUERIES", 2)
+    with pytest.raises(HTTPException) as err:
+        _lines(batch.query_batch_handler, ["a", "b", "c"])
+    assert err.value.status_code == 413 and "serverless" not in err.value.detail
@@ -0,0 +1,113 @@
+# backend/tests/test_bench.py
+
+import json
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+from backend.bench.run_suite import _flatten, compare
+from backend.bench.stubs import OVERLAP_WORDS, FakeOpenAI, FixtureSite, HashEmbedder, MemoryIndex, render_page
+
+
+def _post(url, payload):
+    req = urllib.request.Request(url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=5) as resp:
+        return json.loads(resp.read())
+
+
+def test_memory_index_ranks_filters_and_deletes():
+    index = MemoryIndex(dimension=3)
+    index.upsert([
+        ("a", [1, 0, 0], {"act": "A"}),
+        ("b", [0.9, 0.1, 0], {"act": "B"}),
+        ("c", [0, 1, 0], {"act": "A"}),
+    ])
+    res = index.query([1, 0, 0], top_k=2, include_metadata=True)
+    assert [m.id for m in res.matches] == ["a", "b"]
+    assert res.matches[0].metadata == {"act": "A"}
+
+    res = index.query([1, 0, 0], top_k=5, filter={"act": "A"})
+    assert [m.id for m in res.matches] == ["a", "c"]
+
+    index.upsert([("a", [0, 0, 1], {"act": "A"})])   # replace in place
+    index.delete(ids=["b"])
+    assert [m.id for m in index.query([0, 0.1, 1], top_k=3).matches] == ["a", "c"]
+    assert index.describe_index_stats()["total_vector_count"] == 2
+    assert index.fetch(["c", "b"]).vectors.keys() == {"c"}
+
+
+def test_hash_embedder_is_deterministic_and_similarity_preserving():
+    embedder = HashEmbedder(dimension=64)
+    a, b, c = embedder.encode([
+        "limita de viteza in localitati este de 50 km/h",
+        "limita de viteza in localitati este de 50 km/h pe drumurile publice",
+        "permisul de conducere se suspenda pentru 90 de zile",
+    ])
+    assert np.allclose(a, embedder.encode(["limita de viteza in localitati este de 50 km/h"])[0])
+    assert np.isclose(np.linalg.norm(a), 1.0)
+    assert a @ b > a @ c
+    assert embedder.encode([]).shape == (0, 64)
+
+
+def test_fake_openai_answers_chat_and_embeddings():
+    with FakeOpenAI(latency=0, jitter=0) as fake:
+        chat = _post(fake.base_url + "/chat/completions", {
+            "model": "gpt-4o-mini",
+            "messages": [{"role": "system", "content": "You are a classifier"}, {"role": "user", "content": "x"}],
+        })
+        assert chat["choices"][0]["message"]["content"] == "LEGISLATION"
+        assert chat["usage"]["total_tokens"] > 0
+
+        emb = _post(fake.base_url + "/embeddings", {"input": ["a b", "c d"]})
+        assert [d["index"] for d in emb["data"]] == [0, 1]
+        assert len(emb["data"][0]["embedding"]) == 1536
+        assert fake.requests == 2
+
+
+def test_fake_openai_rate_limits_with_retry_after():
+    with FakeOpenAI(latency=0, jitter=0, error_rate=1.0) as fake:
+        try:
+            _post(fake.base_url + "/chat/completions", {"messages": []})
+        except urllib.error.HTTPError as err:
+            assert err.code == 429 and err.headers["Retry-After"]
+        else:
+            raise AssertionError("expected a 429")
+
+
+def test_fixture_site_serves_rebuilt_pages(tmp_path):
+    words = [f"w{i}" for i in range(OVERLAP_WORDS + 20)]
+    first, second = words[:OVERLAP_WORDS + 10], words[10:]   # consecutive chunks overlap
+    chunks = [
+        {"url": "https://legislatie.just.ro/Public/DetaliiDocument/1", "name": "OUG 195/2002",
+         "chunk_index": i, "text": " ".join(text)}
+        for i, text in enumerate([first, second])
+    ]
+    (tmp_path / "page.json").write_text(json.dumps(chunks), encoding="utf-8")
+    with FixtureSite(str(tmp_path)) as site:
+        with urllib.request.urlopen(site.index_url, timeout=5) as resp:
+            assert b'href="/Public/DetaliiDocument/1"' in resp.read()
+        with urllib.request.urlopen(site.base_url + "/Public/DetaliiDocument/1", timeout=5) as resp:
+            html = resp.read().decode("utf-8")
+        assert 'id="textdocumentleg"' in html
+        assert " ".join(words[:60]) in html and " ".join(words[60:]) in html
+        try:
+            urllib.request.urlopen(site.base_url + "/missing", timeout=5)
+        except urllib.error.HTTPError as err:
+            assert err.code == 404
+
+
+def test_render_page_wraps_the_act_in_boilerplate():
+    html = render_page({"name": "HG 1391/2006", "text": "cuvant " * 130})
+    assert html.count("<p id=") == 3
+    assert "<header>" in html and "<footer>" in html
+
+
+def test_compare_flags_regressions_by_metric_direction():
+    baseline = {"scenarios": {"chat": {"req_per_s": 10.0, "p95_ms": 100.0, "llm": {"p50_ms": 5.0}, "count": 3}}}
+    current = {"scenarios": {"chat": {"req_per_s": 7.0, "p95_ms": 110.0, "llm": {"p50_ms": 50.0}, "count": 9}}}
+    assert _flatten(baseline["scenarios"]) == {
+        "chat.req_per_s": 10.0, "chat.p95_ms": 100.0, "chat.llm.p50_ms": 5.0, "chat.count": 3,
+    }
+    # throughput fell 30%; latency rose 10% (under the threshold); the stand-in's own latency is ignored
+    assert compare(baseline, current, threshold=0.2) == ["chat.req_per_s"]
@@ -0,0 +1,81 @@
+# backend/tests/test_conversations.py
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from backend.server.netlify.functions.db.conversations import (
+    decode_conversation_cursor,
+    encode_conversation_cursor,
+    list_conversation_page,
+    message_page,
+)
+from backend.server.netlify.functions.models.models import Base, Conversation, Message
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def _pages(db, user_id, limit):
+    pages, before = [], None
+    while True:
+        rows, before = list_conversation_page(db, user_id, limit, before)
+        pages.append([r["conversation_id"] for r in rows])
+        if before is None:
+            return pages
+
+
+def test_keyset_pages_split_equal_timestamps_by_id(db):
+    t0 = datetime(2026, 1, 1, 12, 0, 0)
+    # five conversations share one created_at, so only the id separates them
+    stamps = [t0 - timedelta(minutes=1), t0, t0, t0, t0, t0, t0 + timedelta(minutes=1)]
+    for ts in stamps:
+        db.add(Conversation(user_id=1, created_at=ts))
+    db.add(Conversation(user_id=2, created_at=t0))
+    db.commit()
+
+    newest_first = [7, 6, 5, 4, 3, 2, 1]
+    for limit in (1, 2, 3, 4, 7, 10):
+        pages = _pages(db, 1, limit)
+        assert [cid for page in pages for cid in page] == newest_first
+        assert all(len(page) <= limit for page in pages)
+
+
+def test_keyset_last_full_page_has_no_cursor(db):
+    for _ in range(4):
+        db.add(Conversation(user_id=1, created_at=datetime(2026, 1, 1)))
+    db.commit()
+    rows, next_key = list_conversation_page(db, 1, 4)
+    assert len(rows) == 4 and next_key is None
+
+
+def test_conversation_cursor_round_trip():
+    key = (datetime(2026, 1, 1, 12, 0, 0, 123456), 42)
+    assert decode_conversation_cursor(encode_conversation_cursor(*key)) == key
+    with pytest.raises(ValueError):
+        decode_conversation_cursor("not-a-cursor")
+
+
+def test_message_pages_walk_back_to_the_first_message(db):
+    conv = Conversation(user_id=1, created_at=datetime(2026, 1, 1))
+    db.add(conv)
+    db.flush()
+    for i in range(7):
+        db.add(Message(conversation_id=conv.id, role="user", content=f"m{i}", created_at=datetime(2026, 1, 1)))
+    db.commit()
+
+    seen, before = [], None
+    while True:
+        msgs, before = message_page(db, conv.id, 1, 3, before)
+        seen = [m["content"] for m in msgs] + seen
+        if before is None:
+            break
+    assert seen == [f"m{i}" for i in range(7)]
+    assert message_page(db, conv.id, 2, 3) is None
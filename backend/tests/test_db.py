@@ -0,0 +1,98 @@
+# backend/tests/test_db.py
+
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+from backend.server.netlify.functions.db import db
+from backend.server.netlify.utils.metrics import DB_CONNECTIONS
+from backend.server.netlify.utils.settings import settings
+
+
+@pytest.mark.parametrize("configured, on_lambda, expected", [
+    ("auto", False, "queue"),
+    ("auto", True, "null"),
+    ("queue", True, "queue"),
+    ("null", False, "null"),
+])
+def test_pool_mode(monkeypatch, configured, on_lambda, expected):
+    monkeypatch.setattr(settings, "DB_POOL_MODE", configured)
+    if on_lambda:
+        monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "road-law-qa-api")
+    else:
+        monkeypatch.delenv("AWS_LAMBDA_FUNCTION_NAME", raising=False)
+    assert db.pool_mode() == expected
+
+
+def test_pool_mode_rejects_unknown(monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_MODE", "static")
+    with pytest.raises(ValueError):
+        db.pool_mode()
+
+
+def test_build_engine_picks_the_pool(tmp_path):
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    queue = db.build_engine(url, mode="queue")
+    assert isinstance(queue.pool, db.TimedQueuePool)
+    assert queue.pool.size() == settings.DB_POOL_SIZE
+    assert isinstance(db.build_engine(url, mode="null").pool, db.TimedNullPool)
+    assert db.engine_options("sqlite:///:memory:", "null") == {}
+
+
+def _events():
+    return {key[0]: values[0] for key, values in DB_CONNECTIONS.snapshot().items()}
+
+
+def test_null_pool_closes_every_connection(tmp_path):
+    engine = db.build_engine(f"sqlite:///{tmp_path / 'app.db'}", mode="null")
+    before = _events()
+    for _ in range(3):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    after = _events()
+    assert after.get("opened", 0) - before.get("opened", 0) == 3
+    assert after.get("closed", 0) - before.get("closed", 0) == 3
+
+
+def test_idle_connections_are_pinged(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DB_PING_IDLE_SECONDS", 0)
+    engine = db.build_engine(f"sqlite:///{tmp_path / 'app.db'}", mode="queue")
+    before = _events().get("pinged", 0)
+    for _ in range(3):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    # the first checkout is a fresh connection; the next two reuse it after idling
+    assert _events().get("pinged", 0) - before == 2
+
+
+def test_track_queries_counts_statements(tmp_path):
+    engine = db.build_engine(f"sqlite:///{tmp_path / 'app.db'}", mode="queue")
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))   # outside the block: not counted
+
+    with db.track_queries() as stats:
+        with engine.connect() as conn:
+            conn.execute(text("CREATE TABLE t (x INTEGER)"))
+            conn.execute(text("INSERT INTO t VALUES (1)"))
+            conn.execute(text("SELECT x FROM t")).all()
+    assert stats.count == 3
+    assert stats.statements[-1] == "SELECT x FROM t"
+    assert stats.total_ms > 0 and stats.acquire_ms > 0
+
+
+def test_track_queries_sees_threadpool_work(tmp_path):
+    engine = db.build_engine(f"sqlite:///{tmp_path / 'app.db'}", mode="queue")
+
+    def query():
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT 1")).scalar()
+
+    async def run():
+        with db.track_queries() as stats:
+            await run_in_threadpool(query)
+            await asyncio.to_thread(query)
+        return stats
+
+    assert asyncio.run(run()).count == 2
@@ -0,0 +1,33 @@
+# backend/tests/test_dedup.py
+
+from types import SimpleNamespace
+
+from backend.scrape_api.dedup import NearDuplicateIndex, collapse_matches
+
+ARTICLE = (
+    "Art. 49 (1) Limita maximă de viteză în localităţi este de 50 km/h. "
+    "(2) Pe anumite sectoare de drum din interiorul localităţilor, administratorul drumului "
+    "poate stabili limite de viteză mai mari, dar nu mai mult de 80 km/h."
+)
+OTHER = (
+    "Art. 35 (1) Participanţii la trafic trebuie să aibă un comportament care să nu afecteze "
+    "fluenţa şi siguranţa circulaţiei, să nu pună în pericol viaţa sau integritatea corporală a persoanelor."
+)
+
+
+def test_near_duplicate_is_found():
+    index = NearDuplicateIndex(threshold=0.8)
+    assert index.check_and_add("a1", ARTICLE) is None
+    assert index.check_and_add("a2", OTHER) is None
+    assert index.check_and_add("a3", ARTICLE + " Se aplică.") == "a1"
+    assert index.duplicates == 1 and index.dedup_ratio == 1 / 3
+
+
+def test_collapse_matches_keeps_the_best_of_each_group():
+    matches = [SimpleNamespace(id=vid) for vid in ("a", "b", "c", "d")]
+    texts = {"a": ARTICLE, "b": ARTICLE, "c": OTHER}   # d has no known text
+    kept, collapsed = collapse_matches(matches, texts, threshold=0.8)
+    assert [m.id for m in kept] == ["a", "c", "d"] and collapsed == 1
+
+    kept, _ = collapse_matches(matches, texts, threshold=0.8, limit=2)
+    assert [m.id for m in kept] == ["a", "c"]
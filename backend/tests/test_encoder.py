@@ -0,0 +1,76 @@
+# backend/tests/test_encoder.py
+
+import numpy as np
+import pytest
+
+from backend.bench.stubs import HashEmbedder
+from backend.scrape_api.encoder import BulkEncoder, padded_tokens, plan_batches
+
+TEXTS = [
+    " ".join(f"w{i}" for i in range(n))
+    for n in (3, 40, 1, 17, 60, 5, 5, 33, 2, 12, 48, 7)
+]
+
+
+class RecordingModel(HashEmbedder):
+    """HashEmbedder that remembers the batches it was given."""
+
+    def __init__(self, dimension=16):
+        super().__init__(dimension)
+        self.batches = []
+
+    def encode(self, texts, **kwargs):
+        self.batches.append(list(texts))
+        return super().encode(texts, **kwargs)
+
+
+def test_plan_batches_respects_the_token_budget():
+    lengths = [len(t.split()) + 2 for t in TEXTS]
+    batches = plan_batches(lengths, max_batch_tokens=100, max_batch_size=4)
+
+    assert sorted(i for _, positions in batches for i in positions) == list(range(len(TEXTS)))
+    for longest, positions in batches:
+        assert longest == max(lengths[i] for i in positions)
+        assert len(positions) <= 4
+        # a single input longer than the budget still gets a batch of its own
+        assert len(positions) * longest <= 100 or len(positions) == 1
+    # longest first
+    assert [b[0] for b in batches] == sorted((b[0] for b in batches), reverse=True)
+    # bucketing pads less than batching in input order
+    in_order = [list(range(i, min(i + 4, len(TEXTS)))) for i in range(0, len(TEXTS), 4)]
+    assert padded_tokens(lengths, [p for _, p in batches]) < padded_tokens(lengths, in_order)
+
+
+def test_plan_batches_edge_cases():
+    assert plan_batches([], 100, 8) == []
+    assert plan_batches([500], 100, 8) == [(500, [0])]
+    assert plan_batches([0, 0], 100, 8) == [(1, [0, 1])]
+
+
+def test_encode_in_process_keeps_input_order():
+    model = RecordingModel()
+    with BulkEncoder(RecordingModel, model=model, max_batch_tokens=64, max_batch_size=4) as encoder:
+        out = encoder.encode(TEXTS)
+
+    assert out.dtype == np.float32 and out.shape == (len(TEXTS), 16)
+    np.testing.assert_allclose(out, HashEmbedder(16).encode(TEXTS), rtol=1e-6)
+    assert len(model.batches) > 1
+    # batches are length buckets, longest first: none overlaps the next
+    spans = [(min(len(t.split()) for t in b), max(len(t.split()) for t in b)) for b in model.batches]
+    assert all(shorter[1] <= longer[0] for longer, shorter in zip(spans, spans[1:]))
+    assert encoder.encoded == len(TEXTS) and 0 <= encoder.padding_ratio < 1
+
+
+def test_encode_empty_input():
+    encoder = BulkEncoder(RecordingModel)
+    assert encoder.encode([]).shape == (0, 16)
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_encode_matches_the_model_across_processes(processes):
+    with BulkEncoder(HashEmbedder, processes=processes, max_batch_tokens=64) as encoder:
+        out = encoder.encode(TEXTS)
+        again = encoder.encode(TEXTS[::-1])
+    expected = HashEmbedder().encode(TEXTS)
+    np.testing.assert_allclose(out, expected, rtol=1e-6)
+    np.testing.assert_allclose(again, expected[::-1], rtol=1e-6)
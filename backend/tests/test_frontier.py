@@ -0,0 +1,62 @@
+# backend/tests/test_frontier.py
+
+from backend.scrape_api.frontier import Frontier
+
+
+def _drain(frontier):
+    order = []
+    while (item := frontier.pop()) is not None:
+        order.append(item)
+    return order
+
+
+def test_pop_order_and_dedup():
+    f = Frontier()
+    f.push("https://x/b", 1, score=0.1)
+    f.push("https://x/c", 1, score=0.9)
+    f.push("https://x/a", 0)
+    assert not f.push("https://x/c#section", 2)
+    assert _drain(f) == [("https://x/a", 0), ("https://x/c", 1), ("https://x/b", 1)]
+    assert f.summary()["duplicate_links"] == 1
+
+
+def test_resume_after_interruption(tmp_path):
+    path = str(tmp_path / "crawl.sqlite3")
+    f = Frontier(path, checkpoint_every=1)
+    assert not f.resumed
+    for url, depth in [("https://x/", 0), ("https://x/1", 1), ("https://x/2", 1), ("https://x/3", 1)]:
+        f.push(url, depth)
+
+    url, _ = f.pop()
+    f.done(url, {"url": url, "text": "home"}, nbytes=10)
+    url, _ = f.pop()
+    f.done(url, None)
+    f.pop()                  # being fetched when the process dies
+    f.checkpoint()
+    f._conn.close()          # no close(): nothing after the checkpoint is saved
+
+    resumed = Frontier(path)
+    assert resumed.resumed
+    # the interrupted URL is queued again, ahead of the ones never started
+    assert _drain(resumed) == [("https://x/2", 1), ("https://x/3", 1)]
+    assert not resumed.push("https://x/", 0)
+    assert not resumed.push("https://x/1", 1)
+    assert resumed.push("https://x/4", 2)
+    assert resumed.entries() == [{"url": "https://x/", "text": "home"}]
+    assert resumed.stats["pages"] == 1 and resumed.stats["failed"] == 1
+    resumed.close()
+
+
+def test_unsaved_work_is_redone(tmp_path):
+    path = str(tmp_path / "crawl.sqlite3")
+    f = Frontier(path, checkpoint_every=100)
+    f.push("https://x/", 0)
+    f.checkpoint()
+    url, _ = f.pop()
+    f.done(url, {"url": url})   # not checkpointed yet
+    f._conn.close()
+
+    resumed = Frontier(path)
+    assert _drain(resumed) == [("https://x/", 0)]
+    assert resumed.entries() == []
+    resumed.close()
@@ -0,0 +1,124 @@
+# backend/tests/test_generations.py
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from backend.bench.stubs import MemoryIndex
+from backend.server.netlify.functions.models.models import Base, IndexGeneration
+from backend.server.netlify.utils import generations as gens
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def _gen(db, namespace, status, hours_ago=0.0):
+    gen = IndexGeneration(namespace=namespace, status=status,
+                          created_at=datetime.utcnow() - timedelta(hours=hours_ago))
+    db.add(gen)
+    db.commit()
+    return gen
+
+
+def test_write_namespaces_default_is_legacy(db):
+    assert gens.write_namespaces(db, stale_hours=24) == [gens.LEGACY_NAMESPACE]
+
+
+def test_write_namespaces_live_then_building(db):
+    _gen(db, "gen-old", "retired")
+    _gen(db, "gen-live", "live")
+    _gen(db, "gen-a", "building")
+    _gen(db, "gen-ready", "ready")
+    _gen(db, "gen-b", "building", hours_ago=1)
+    _gen(db, "gen-stale", "building", hours_ago=48)
+    assert gens.write_namespaces(db, stale_hours=24) == ["gen-live", "gen-a", "gen-b"]
+
+
+def test_write_namespaces_during_first_build(db):
+    # nothing promoted yet: the legacy namespace stays live and is written too
+    _gen(db, "gen-a", "building")
+    assert gens.write_namespaces(db, stale_hours=24) == [gens.LEGACY_NAMESPACE, "gen-a"]
+
+
+def test_promote_retires_the_live_generation(db):
+    _gen(db, "gen-a", "ready")
+    _gen(db, "gen-b", "ready")
+    gens.promote(db, "gen-a")
+    gens.promote(db, "gen-b")
+    assert gens.read_live_namespace(db) == "gen-b"
+    assert gens.get_generation(db, "gen-a").status == "retired"
+
+    # a retired generation can be promoted back
+    gens.promote(db, "gen-a")
+    assert gens.read_live_namespace(db) == "gen-a"
+    assert gens.get_generation(db, "gen-b").status == "retired"
+
+
+def test_promote_refuses_unvalidated(db):
+    _gen(db, "gen-a", "building")
+    with pytest.raises(ValueError):
+        gens.promote(db, "gen-a")
+    with pytest.raises(ValueError):
+        gens.promote(db, "gen-missing")
+
+
+def test_first_promotion_registers_the_legacy_namespace(db):
+    _gen(db, "gen-a", "ready")
+    gens.promote(db, "gen-a")
+    legacy = gens.get_generation(db, gens.LEGACY_NAMESPACE)
+    assert legacy is not None and legacy.status == "retired"
+
+    gens.promote(db, gens.LEGACY_NAMESPACE)   # roll back to the original index
+    assert gens.read_live_namespace(db) == gens.LEGACY_NAMESPACE
+
+
+def _fill(index, namespace, n=3):
+    index.upsert([(f"{namespace}-{i}", np.ones(4)) for i in range(n)], namespace=namespace)
+
+
+def test_collect_garbage_keeps_the_latest_retired(db):
+    index = MemoryIndex(dimension=4)
+    for ns in ("", "gen-a", "gen-b", "gen-c", "gen-broken"):
+        _fill(index, ns)
+    for ns in ("gen-a", "gen-b", "gen-c"):
+        _gen(db, ns, "ready")
+        gens.promote(db, ns)
+    _gen(db, "gen-broken", "failed")
+
+    removed = gens.collect_garbage(db, index, keep=1)
+
+    # the legacy namespace was retired first, gen-b last
+    assert sorted(removed) == ["", "gen-a", "gen-broken"]
+    assert set(index.describe_index_stats()["namespaces"]) == {"gen-b", "gen-c"}
+    assert gens.get_generation(db, "gen-b").status == "retired"
+    assert gens.get_generation(db, "").status == "deleted"
+
+
+def test_collect_garbage_reclaims_legacy_promoted_before_registration(db):
+    index = MemoryIndex(dimension=4)
+    _fill(index, "")
+    _fill(index, "gen-a")
+    _gen(db, "gen-a", "live")   # promoted without a row for the default namespace
+
+    assert gens.collect_garbage(db, index, keep=0) == [""]
+    assert set(index.describe_index_stats()["namespaces"]) == {"gen-a"}
+
+
+def test_collect_garbage_abandons_stale_builds(db):
+    index = MemoryIndex(dimension=4)
+    _gen(db, "gen-stale", "building", hours_ago=1000)
+    _gen(db, "gen-fresh", "building")
+    _fill(index, "gen-stale")
+
+    assert gens.collect_garbage(db, index) == ["gen-stale"]
+    assert gens.get_generation(db, "gen-fresh").status == "building"
+    # the default namespace is still live: nothing registers or deletes it
+    assert gens.get_generation(db, "") is None
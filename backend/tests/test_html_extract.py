@@ -0,0 +1,88 @@
+# backend/tests/test_html_extract.py
+
+import importlib
+
+import pytest
+
+from backend.scrape_api.html_extract import BACKENDS, _IMPORTS, extract_page, resolve_backend
+
+ACT_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>OUG 195/2002</title>
+<style>.S_ART{font-weight:bold}</style><script>var portal = {lang: 'ro'};</script></head>
+<body>
+<header><div class="logo">Portal Legislativ</div>
+  <nav><ul><li><a href="/">Acasă</a></li><li><a href="/Public/Cautare">Căutare</a></li></ul></nav></header>
+<div id="left"><h3>Cuprinsul Actului</h3><ul><li><a href="#art49">Articolul 49</a></li></ul></div>
+<div id="textdocumentleg">
+  <p><span class="S_ART">Art. 49</span></p>
+  <p>(1) Limita maximă de viteză în localităţi este de <b>50 km/h</b>.</p>
+  <!-- nota -->
+  <p>(2) Pe anumite sectoare de drum<br>administratorul poate stabili limite mai mari.</p>
+  <form><button>Printează</button></form>
+  <p>Vezi și <a href="/Public/DetaliiDocument/79134">H.G. nr. 1391/2006</a> pentru aplicare.</p>
+</div>
+<footer>Ministerul Justiției</footer>
+<script>document.querySelectorAll('a');</script>
+</body></html>"""
+
+MAIN_TEXT = [
+    "OUG 195/2002",
+    "Art. 49",
+    "(1) Limita maximă de viteză în localităţi este de",
+    "50 km/h",
+    ".",
+    "(2) Pe anumite sectoare de drum",
+    "administratorul poate stabili limite mai mari.",
+    "Vezi și",
+    "H.G. nr. 1391/2006",
+    "pentru aplicare.",
+]
+
+
+def _installed(name):
+    try:
+        importlib.import_module(_IMPORTS[name])
+    except ImportError:
+        return False
+    return True
+
+
+backends = pytest.mark.parametrize("backend", [
+    pytest.param(name, marks=pytest.mark.skipif(not _installed(name), reason=f"{name} not installed"))
+    for name in BACKENDS
+])
+
+
+@backends
+def test_main_content_of_an_act_page(backend):
+    text, links = extract_page(ACT_PAGE.encode("utf-8"), backend=backend)
+    assert text.split("\n") == MAIN_TEXT
+    assert links == [
+        ("/", "Acasă"),
+        ("/Public/Cautare", "Căutare"),
+        ("#art49", "Articolul 49"),
+        ("/Public/DetaliiDocument/79134", "H.G. nr. 1391/2006"),
+    ]
+
+
+@backends
+def test_page_without_a_main_region_falls_back_to_the_body(backend):
+    page = ("<html><head><title>Știri</title></head><body><nav>Meniu</nav>"
+            "<div><h1>Știri</h1><p>Text  util</p></div><footer>Subsol</footer></body></html>")
+    text, links = extract_page(page.encode("utf-8"), backend=backend)
+    assert text.split("\n") == ["Știri", "Text  util"]
+    assert links == []
+
+
+@backends
+def test_legacy_encoding_is_decoded(backend):
+    page = '<html><head><meta charset="windows-1250"><title>Lege</title></head><body><main>Circulaţia pe drumurile publice</main></body></html>'
+    text, _ = extract_page(page.encode("cp1250"), backend=backend)
+    assert text.split("\n") == ["Lege", "Circulaţia pe drumurile publice"]
+
+
+def test_resolve_backend():
+    assert resolve_backend("auto") == next(name for name in BACKENDS if _installed(name))
+    assert resolve_backend("bs4") == "bs4"
+    with pytest.raises(ValueError):
+        resolve_backend("html5lib")
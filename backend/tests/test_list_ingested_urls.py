@@ -0,0 +1,47 @@
+# backend/tests/test_list_ingested_urls.py
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from backend.server.netlify.functions.handlers.list_ingested_urls import list_ingested_urls_handler
+from backend.server.netlify.functions.models.models import Base, IngestedSource
+
+URL = "https://legislatie.just.ro/Public/DetaliiDocument"
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def _source(db, url, status="done"):
+    db.add(IngestedSource(url=url, status=status, chunk_count=1))
+    db.commit()
+
+
+def test_keyset_pages_list_only_done_urls(db):
+    for i in range(7):
+        _source(db, f"{URL}/{i}")
+        if i == 3:
+            _source(db, f"{URL}/failed", "failed")
+            _source(db, f"{URL}/running", "in_progress")
+
+    urls, after = [], None
+    while True:
+        page = list_ingested_urls_handler(db, "admin", limit=3, after=after)
+        assert len(page.urls) <= 3
+        urls += [str(u) for u in page.urls]
+        after = page.next_cursor
+        if after is None:
+            break
+    assert urls == [f"{URL}/{i}" for i in range(7)]
+
+
+def test_page_size_is_clamped(db):
+    _source(db, URL)
+    page = list_ingested_urls_handler(db, "admin", limit=0)
+    assert len(page.urls) == 1 and page.next_cursor is None
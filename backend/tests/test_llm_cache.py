@@ -0,0 +1,90 @@
+# backend/tests/test_llm_cache.py
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from openai.types.chat import ChatCompletion
+
+from backend.server.netlify.utils.llm_cache import LLMCache, cache_key
+from backend.server.netlify.utils.openai_client import LLMClient
+
+MESSAGES = [{"role": "user", "content": "Ce înseamnă OUG 195/2002?"}]
+
+
+def _response(content="Codul rutier"):
+    return ChatCompletion.model_validate({
+        "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+    })
+
+
+def test_cache_key_ignores_dict_order_only():
+    key = cache_key("gpt-4o-mini", MESSAGES, {"temperature": 0, "max_tokens": 5})
+    reordered = [{"content": m["content"], "role": m["role"]} for m in MESSAGES]
+    assert cache_key("gpt-4o-mini", reordered, {"max_tokens": 5, "temperature": 0}) == key
+
+    assert cache_key("gpt-4o", MESSAGES, {"temperature": 0, "max_tokens": 5}) != key
+    assert cache_key("gpt-4o-mini", MESSAGES, {"temperature": 0, "max_tokens": 6}) != key
+    changed = [{**MESSAGES[0], "content": MESSAGES[0]["content"] + " "}]
+    assert cache_key("gpt-4o-mini", changed, {"temperature": 0, "max_tokens": 5}) != key
+
+
+def test_entries_expire_after_the_ttl(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    cache = LLMCache(maxsize=8, path=path, ttl=0.2)
+    cache.put("k", "gpt-4o-mini", _response())
+    assert cache.get_local("k") is not None
+    assert LLMCache(maxsize=8, path=path).load("k") is not None   # another worker
+
+    time.sleep(0.25)
+    assert cache.get("k") is None
+    assert LLMCache(maxsize=8, path=path).get("k") is None
+
+
+def test_sqlite_tier_is_shared_and_refills_the_lru(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    LLMCache(maxsize=8, path=path).put("k", "gpt-4o-mini", _response("da"))
+
+    other = LLMCache(maxsize=8, path=path)
+    assert other.get_local("k") is None
+    assert other.get("k").choices[0].message.content == "da"
+    assert other.get_local("k") is not None
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = LLMCache(maxsize=2)
+    for key in ("a", "b"):
+        cache.put(key, "m", _response(key))
+    cache.get("a")
+    cache.put("c", "m", _response("c"))
+    assert cache.get("b") is None and cache.get("a") is not None and not cache.persistent
+
+
+def test_client_reads_and_writes_sqlite_off_the_event_loop(tmp_path):
+    cache = LLMCache(maxsize=8, path=str(tmp_path / "llm.sqlite"))
+    threads = []
+    for name in ("load", "store"):
+        def record(*args, _real=getattr(cache, name)):
+            threads.append(threading.current_thread())
+            return _real(*args)
+        setattr(cache, name, record)
+
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        return _response()
+
+    client = LLMClient(api_key="test", base_url="http://fake/v1", cache=cache)
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    async def run():
+        await client.complete(MESSAGES, model="gpt-4o-mini", memoize=True, temperature=0)
+        cache._data.clear()   # as in a fresh worker: only the SQLite tier has it
+        await client.complete(MESSAGES, model="gpt-4o-mini", memoize=True, temperature=0)
+
+    asyncio.run(run())
+    assert len(calls) == 1
+    assert len(threads) == 3 and threading.main_thread() not in threads   # load, store, load
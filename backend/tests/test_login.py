@@ -0,0 +1,93 @@
+# backend/tests/test_login.py
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from backend.server.netlify.functions.handlers import login
+from backend.server.netlify.functions.models.models import Base, User
+from backend.server.netlify.functions.schemas.schemas import LoginRequest
+from backend.server.netlify.utils.passwords import PasswordHasher
+from backend.server.netlify.utils.settings import settings
+
+
+def _hash(password, rounds):
+    return CryptContext(schemes=["bcrypt"]).hash(password, rounds=rounds)
+
+
+@pytest.fixture
+def db():
+    # one shared connection: the handler queries from the threadpool
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture(autouse=True)
+def cheap_hasher(monkeypatch):
+    hasher = PasswordHasher(rounds=4, workers=1)
+    monkeypatch.setattr(login, "passwords", hasher)
+    return hasher
+
+
+def _login(db, username, password):
+    return asyncio.run(login.login_handler(LoginRequest(username=username, password=password), db))
+
+
+def _user(db, username, password, rounds=4):
+    user = User(username=username, hashed_password=_hash(password, rounds))
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_login_rehashes_when_the_cost_changes(db):
+    user = _user(db, "ana", "parola", rounds=5)   # made before BCRYPT_ROUNDS became 4
+    assert not _login(db, "ana", "parola").is_admin
+    db.refresh(user)
+    assert user.hashed_password.startswith("$2b$04$")
+
+    rehashed = user.hashed_password
+    _login(db, "ana", "parola")   # already on the current policy: left alone
+    db.refresh(user)
+    assert user.hashed_password == rehashed
+
+
+def test_wrong_password_or_unknown_user_is_rejected(db):
+    user = _user(db, "ana", "parola", rounds=5)
+    before = user.hashed_password
+    for username, password in (("ana", "gresit"), ("nimeni", "parola")):
+        with pytest.raises(HTTPException) as err:
+            _login(db, username, password)
+        assert err.value.status_code == 401
+    db.refresh(user)
+    assert user.hashed_password == before
+
+
+def test_admin_logs_in_with_admin_password_hash_only(db, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_PASSWORD_HASH", _hash("admin-secret", 5))
+    admin = _user(db, settings.ADMIN_USERNAME, "row-password")
+
+    assert _login(db, settings.ADMIN_USERNAME, "admin-secret").is_admin
+    # the environment hash is not rehashed, and the row is untouched
+    assert settings.ADMIN_PASSWORD_HASH.startswith("$2b$05$")
+    db.refresh(admin)
+    assert admin.hashed_password.startswith("$2b$04$")
+
+    # the row's own password no longer logs the admin account in
+    with pytest.raises(HTTPException) as err:
+        _login(db, settings.ADMIN_USERNAME, "row-password")
+    assert err.value.status_code == 401
+
+
+def test_admin_needs_a_user_row(db, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_PASSWORD_HASH", _hash("admin-secret", 4))
+    with pytest.raises(HTTPException) as err:
+        _login(db, settings.ADMIN_USERNAME, "admin-secret")
+    assert err.value.status_code == 401
@@ -0,0 +1,39 @@
+# backend/tests/test_memory.py
+
+import pytest
+
+from backend.server.netlify.utils import memory
+from backend.server.netlify.utils.settings import settings
+
+
+@pytest.fixture(autouse=True)
+def two_turns(monkeypatch):
+    monkeypatch.setattr(settings, "CHAT_MEMORY_TURNS", 2)
+
+
+def _msgs(n):
+    return [{"id": i, "role": "user" if i % 2 else "assistant", "content": f"m{i}"} for i in range(1, n + 1)]
+
+
+def test_window_size_counts_both_roles():
+    assert memory.window_size() == 4
+
+
+@pytest.mark.parametrize("n", [0, 1, 4])
+def test_slide_window_within_size_evicts_nothing(n):
+    kept, evicted = memory.slide_window(_msgs(n))
+    assert kept == _msgs(n) and evicted == []
+
+
+def test_slide_window_evicts_oldest_first():
+    kept, evicted = memory.slide_window(_msgs(7))
+    assert [m["id"] for m in kept] == [4, 5, 6, 7]
+    assert [m["id"] for m in evicted] == [1, 2, 3]
+
+
+def test_build_prompt_messages_keeps_newest_within_budget():
+    window = [{"role": "user", "content": "x" * 400} for _ in range(3)] + [{"role": "user", "content": "last"}]
+    out = memory.build_prompt_messages("rezumat", window, token_budget=150)
+    assert out[0]["role"] == "system" and "rezumat" in out[0]["content"]
+    assert out[-1]["content"] == "last"
+    assert len(out) == 3   # summary, one long message, the newest
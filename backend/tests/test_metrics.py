@@ -0,0 +1,97 @@
+# backend/tests/test_metrics.py
+
+import json
+import os
+import threading
+
+import pytest
+
+from backend.server.netlify.utils.metrics import Registry
+
+
+def _registry(multiproc_dir=None):
+    reg = Registry(multiproc_dir)
+    requests = reg.counter("requests_total", "Requests served", ("route", "status"))
+    latency = reg.histogram("latency_seconds", "Request latency", ("route",), buckets=(0.1, 1.0))
+    return reg, requests, latency
+
+
+def test_render_exposition_format():
+    reg, requests, latency = _registry()
+    requests.inc(route="/chat", status=200)
+    requests.inc(2, route="/chat", status=200)
+    requests.inc(route='/say "hi"\n', status=500)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, route="/chat")
+
+    assert reg.render() == (
+        "# HELP requests_total Requests served\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{route="/chat",status="200"} 3\n'
+        'requests_total{route="/say \\"hi\\"\\n",status="500"} 1\n'
+        "# HELP latency_seconds Request latency\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{route="/chat",le="0.1"} 2\n'
+        'latency_seconds_bucket{route="/chat",le="1.0"} 3\n'
+        'latency_seconds_bucket{route="/chat",le="+Inf"} 4\n'
+        'latency_seconds_sum{route="/chat"} 3.65\n'
+        'latency_seconds_count{route="/chat"} 4\n'
+    )
+
+
+def test_duplicate_names_are_rejected():
+    reg, _, _ = _registry()
+    with pytest.raises(ValueError):
+        reg.counter("requests_total", "again")
+
+
+def test_thread_shards_are_summed():
+    reg, requests, _ = _registry()
+
+    def work():
+        for _ in range(1000):
+            requests.inc(route="/x", status=200)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert reg.collect()["requests_total"][("/x", "200")] == [4000.0]
+
+
+def test_snapshots_of_other_processes_are_merged(tmp_path):
+    # two workers sharing METRICS_MULTIPROC_DIR
+    a, a_requests, a_latency = _registry(str(tmp_path))
+    b, b_requests, b_latency = _registry(str(tmp_path))
+    a_requests.inc(5, route="/chat", status=200)
+    a_latency.observe(0.5, route="/chat")
+    b_requests.inc(2, route="/chat", status=200)
+    b_requests.inc(route="/health", status=200)
+    b_latency.observe(2.0, route="/chat")
+    b.flush()
+
+    collected = a.collect()
+    assert collected["requests_total"] == {("/chat", "200"): [7.0], ("/health", "200"): [1.0]}
+    assert collected["latency_seconds"][("/chat",)] == [0.0, 1.0, 1.0, 2.5, 2.0]
+    assert 'latency_seconds_count{route="/chat"} 2' in a.render()
+
+    # a's own live values are not counted twice once it has flushed too
+    a.flush()
+    assert a.collect()["requests_total"][("/chat", "200")] == [7.0]
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_unreadable_or_mismatched_snapshots_are_skipped(tmp_path):
+    reg, requests, _ = _registry(str(tmp_path))
+    requests.inc(route="/chat", status=200)
+    (tmp_path / "torn.json").write_text('{"requests_total": [[["/chat", "200"], [1', encoding="utf-8")
+    (tmp_path / "old.json").write_text(json.dumps({
+        "latency_seconds": [[["/chat"], [1, 2, 3]]],          # written with other buckets
+        "retired_total": [[[], [9]]],                          # no longer registered
+        "requests_total": [[["/chat", "200"], [4]]],
+    }), encoding="utf-8")
+
+    collected = reg.collect()
+    assert collected["requests_total"] == {("/chat", "200"): [5.0]}
+    assert collected["latency_seconds"] == {}
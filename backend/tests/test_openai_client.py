@@ -0,0 +1,192 @@
+# backend/tests/test_openai_client.py
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+from openai import RateLimitError
+from openai.types.chat import ChatCompletion
+
+from backend.server.netlify.utils.llm_cache import LLMCache
+from backend.server.netlify.utils.openai_client import LLMClient, Priority, RateScheduler, TokenBucket
+
+MESSAGES = [{"role": "user", "content": "Care este limita de viteză în localitate?"}]
+UNLIMITED = {"rpm": 100_000, "tpm": 10_000_000}
+
+
+def _response(content="50 km/h"):
+    return ChatCompletion.model_validate({
+        "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12},
+    })
+
+
+def _rate_limited(retry_after):
+    request = httpx.Request("POST", "http://fake/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": str(retry_after)}, request=request)
+    return RateLimitError("rate limited", response=response, body=None)
+
+
+class FakeCompletions:
+    """Stand-in for client.chat.completions: raises the scripted errors, then answers."""
+
+    def __init__(self, errors=(), gate=None):
+        self.errors = list(errors)
+        self.gate = gate
+        self.calls = 0
+        self.started = asyncio.Event()
+
+    async def create(self, model, messages, **params):
+        self.calls += 1
+        self.started.set()
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.errors:
+            raise self.errors.pop(0)
+        return _response()
+
+
+def _client(completions, **kwargs):
+    client = LLMClient(api_key="test", base_url="http://fake/v1", default_limits=UNLIMITED, **kwargs)
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return client
+
+
+def test_token_bucket_refills_continuously():
+    bucket = TokenBucket(per_minute=60)   # one unit per second
+    now = bucket.updated
+    assert bucket.wait_time(60, now) == 0.0
+    bucket.take(60)
+    assert bucket.wait_time(1, now) == 1.0
+    assert bucket.wait_time(1, now + 0.5) == 0.5
+    assert bucket.wait_time(1, now + 1.0) == 0.0
+    assert bucket.wait_time(1000, now + 1000) == 0.0   # capped at capacity
+
+
+def test_interactive_callers_go_before_background():
+    async def run():
+        scheduler = RateScheduler({}, UNLIMITED, max_in_flight=1)
+        await scheduler.acquire("m", 1, Priority.INTERACTIVE)   # hold the only slot
+        order = []
+
+        async def call(name, priority):
+            await scheduler.acquire("m", 1, priority)
+            order.append(name)
+            scheduler.release()
+
+        tasks = [asyncio.create_task(call(name, prio)) for name, prio in (
+            ("bg-1", Priority.BACKGROUND), ("user", Priority.INTERACTIVE), ("bg-2", Priority.BACKGROUND),
+        )]
+        await asyncio.sleep(0)   # all three are queued
+        scheduler.release()
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(run()) == ["user", "bg-1", "bg-2"]
+
+
+def test_scheduler_waits_for_token_budget():
+    async def run():
+        # 6,000 tokens/minute = 100/s: once drained, 20 tokens take ~0.2s to come back
+        scheduler = RateScheduler({"m": {"rpm": 1000, "tpm": 6000}}, UNLIMITED, max_in_flight=4)
+        await scheduler.acquire("m", 6000, Priority.INTERACTIVE)
+        scheduler.release()
+        start = time.monotonic()
+        await scheduler.acquire("m", 20, Priority.INTERACTIVE)
+        scheduler.release()
+        waited = time.monotonic() - start
+
+        # another model has its own budget
+        start = time.monotonic()
+        await scheduler.acquire("other", 20, Priority.INTERACTIVE)
+        return waited, time.monotonic() - start
+
+    waited, other = asyncio.run(run())
+    assert 0.15 <= waited < 1.0
+    assert other < 0.05
+
+
+def test_retry_honours_retry_after():
+    completions = FakeCompletions(errors=[_rate_limited(0.2)])
+    client = _client(completions, backoff=0.01)
+
+    async def run():
+        start = time.monotonic()
+        resp = await client.complete(MESSAGES, model="gpt-4o-mini")
+        return resp, time.monotonic() - start
+
+    resp, elapsed = asyncio.run(run())
+    assert resp.choices[0].message.content == "50 km/h"
+    assert completions.calls == 2 and elapsed >= 0.2
+    stats = client.metrics.snapshot()["gpt-4o-mini"]
+    assert stats["retries"] == 1 and stats["errors"] == 1 and stats["calls"] == 2
+
+
+def test_retries_stop_after_max_retries():
+    completions = FakeCompletions(errors=[_rate_limited(0)] * 3)
+    client = _client(completions, backoff=0.001, max_retries=2)
+
+    async def run():
+        try:
+            await client.complete(MESSAGES, model="gpt-4o-mini")
+        except RateLimitError:
+            return "raised"
+
+    assert asyncio.run(run()) == "raised"
+    assert completions.calls == 3 and client.scheduler._in_flight == 0
+
+
+def test_cancelled_call_releases_its_slot():
+    async def run():
+        completions = FakeCompletions(gate=asyncio.Event())
+        client = _client(completions, max_in_flight=1)
+        first = asyncio.create_task(client.complete(MESSAGES, model="gpt-4o-mini"))
+        await completions.started.wait()
+        queued = asyncio.create_task(client.complete(MESSAGES, model="gpt-4o-mini", priority=Priority.BACKGROUND))
+        await asyncio.sleep(0)
+        queued.cancel()      # cancelled while waiting for a slot
+        first.cancel()       # cancelled mid-request, holding the slot
+        await asyncio.gather(first, queued, return_exceptions=True)
+        assert client.scheduler._in_flight == 0
+
+        completions.gate.set()
+        resp = await asyncio.wait_for(client.complete(MESSAGES, model="gpt-4o-mini"), timeout=1)
+        return resp, completions.calls
+
+    resp, calls = asyncio.run(run())
+    assert resp.choices[0].message.content == "50 km/h" and calls == 2
+
+
+def test_memoized_call_survives_the_first_callers_cancellation():
+    async def run():
+        completions = FakeCompletions(gate=asyncio.Event())
+        client = _client(completions, cache=LLMCache(maxsize=8))
+        first = asyncio.create_task(client.complete(MESSAGES, model="gpt-4o-mini", memoize=True, temperature=0))
+        await completions.started.wait()
+        joined = asyncio.create_task(client.complete(MESSAGES, model="gpt-4o-mini", memoize=True, temperature=0))
+        await asyncio.sleep(0)
+        first.cancel()
+        completions.gate.set()
+
+        resp = await joined
+        cached = await client.complete(MESSAGES, model="gpt-4o-mini", memoize=True, temperature=0)
+        assert first.cancelled()
+        return resp, cached, completions.calls, client.metrics.snapshot()["gpt-4o-mini"]
+
+    resp, cached, calls, stats = asyncio.run(run())
+    assert resp.choices[0].message.content == cached.choices[0].message.content == "50 km/h"
+    assert calls == 1 and stats["cache_hits"] == 2
+
+
+def test_nonzero_temperature_is_not_memoized():
+    completions = FakeCompletions()
+    client = _client(completions, cache=LLMCache(maxsize=8))
+
+    async def run():
+        for _ in range(2):
+            await client.complete(MESSAGES, model="gpt-4o-mini", memoize=True, temperature=0.7)
+
+    asyncio.run(run())
+    assert completions.calls == 2
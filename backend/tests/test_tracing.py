@@ -0,0 +1,103 @@
+# backend/tests/test_tracing.py
+
+import asyncio
+import json
+import re
+
+import pytest
+
+from backend.server.netlify.utils import tracing
+from backend.server.netlify.utils.settings import settings
+from backend.server.netlify.utils.tracing import current_trace, set_attrs, span, start_trace
+
+
+def test_spans_nest_under_their_parent():
+    with start_trace("POST /chat", path="/chat") as trace:
+        with span("retrieve", top_k=5) as outer:
+            with span("embed") as inner:
+                set_attrs(tokens=12)
+            with span("vector.query"):
+                pass
+        set_attrs(status=200)
+
+    assert current_trace() is None
+    by_name = {s.name: s for s in trace.spans}
+    assert by_name["retrieve"].parent_id == trace.root.span_id
+    assert inner.parent_id == outer.span_id == by_name["vector.query"].parent_id
+    assert inner.attributes == {"tokens": 12} and outer.attributes == {"top_k": 5}
+    assert trace.root.attributes == {"path": "/chat", "status": 200}
+    assert {s.trace_id for s in trace.spans} == {trace.trace_id}
+    assert all(s.end is not None for s in [trace.root, *trace.spans])
+    # children finish first and within their parent
+    assert [s.name for s in trace.spans] == ["embed", "vector.query", "retrieve"]
+    assert outer.start <= inner.start and inner.end <= outer.end
+
+
+def test_span_outside_a_trace_is_a_noop():
+    with span("embed") as s:
+        set_attrs(tokens=1)
+    assert s is None
+
+
+def test_failing_span_records_the_error():
+    with start_trace("GET /x") as trace:
+        with pytest.raises(ValueError):
+            with span("llm.answer"):
+                raise ValueError("boom")
+    assert trace.spans[0].attributes["error"] == "ValueError" and trace.spans[0].end is not None
+
+
+def test_concurrent_tasks_keep_their_own_parent():
+    async def stage(name):
+        with span(name) as s:
+            await asyncio.sleep(0.01)
+            with span(name + ".child") as child:
+                await asyncio.sleep(0)
+        return s, child
+
+    async def run():
+        with start_trace("POST /batch") as trace:
+            results = await asyncio.gather(stage("a"), stage("b"))
+        return trace, results
+
+    trace, results = asyncio.run(run())
+    for parent, child in results:
+        assert parent.parent_id == trace.root.span_id and child.parent_id == parent.span_id
+
+
+def test_server_timing_sums_each_stage():
+    with start_trace("POST /chat") as trace:
+        for _ in range(2):
+            with span("db"):
+                pass
+        with span("llm.answer"):
+            pass
+    trace.spans[0].end = trace.spans[0].start + 0.010
+    trace.spans[1].end = trace.spans[1].start + 0.0025
+    trace.spans[2].end = trace.spans[2].start + 0.1234
+
+    header = trace.server_timing()
+    assert re.fullmatch(r"db;dur=12\.5, llm\.answer;dur=123\.4, total;dur=\d+\.\d", header)
+
+
+def test_jsonl_export_writes_otel_shaped_spans(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(settings, "TRACE_EXPORTER", "jsonl")
+    monkeypatch.setattr(settings, "TRACE_JSONL_PATH", str(path))
+    with start_trace("GET /health") as trace:
+        with span("db", rows=1):
+            pass
+
+    root, child = [json.loads(line) for line in path.read_text().splitlines()]
+    assert root["traceId"] == child["traceId"] == trace.trace_id
+    assert root["parentSpanId"] == "" and child["parentSpanId"] == root["spanId"]
+    assert child["attributes"] == {"rows": 1}
+    assert root["startTimeUnixNano"] <= child["startTimeUnixNano"] <= child["endTimeUnixNano"]
+
+
+def test_export_failures_do_not_escape(monkeypatch):
+    monkeypatch.setattr(settings, "TRACE_EXPORTER", "jsonl")
+    monkeypatch.setattr(settings, "TRACE_JSONL_PATH", "/nonexistent/dir/traces.jsonl")
+    with start_trace("GET /x"):
+        pass
+    assert tracing.current_trace() is None
@@ -0,0 +1,103 @@
+# backend/tests/test_upsert.py
+
+import threading
+
+import pytest
+
+from backend.scrape_api.upsert import UpsertDispatcher, _estimate_bytes
+
+
+def _vectors(n, dim=4, meta=None):
+    return [(f"v{i}", [0.1] * dim, dict(meta or {})) for i in range(n)]
+
+
+class RecordingIndex:
+    """Pinecone `Index` stand-in that records each request's batch size."""
+
+    def __init__(self, max_vectors=None):
+        self.max_vectors = max_vectors
+        self.batches = []
+        self.ids = []
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors, namespace=""):
+        if self.max_vectors is not None and len(vectors) > self.max_vectors:
+            err = Exception("Request payload too large")
+            err.status = 413
+            raise err
+        with self._lock:
+            self.batches.append(len(vectors))
+            self.ids += [v[0] for v in vectors]
+
+
+class FlakyIndex(RecordingIndex):
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def upsert(self, vectors, namespace=""):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("reset")
+        super().upsert(vectors, namespace)
+
+
+def test_split_by_vector_count():
+    d = UpsertDispatcher(RecordingIndex(), max_batch_vectors=10)
+    assert [len(b) for b in d._split(_vectors(25))] == [10, 10, 5]
+    d.close()
+
+
+def test_split_by_request_size():
+    vectors = _vectors(10, meta={"text": "x" * 100})
+    per_vector = _estimate_bytes(vectors[0])
+    d = UpsertDispatcher(RecordingIndex(), max_batch_vectors=100, max_request_bytes=3 * per_vector)
+    batches = d._split(vectors)
+    assert [len(b) for b in batches] == [3, 3, 3, 1]
+    assert [v for b in batches for v in b] == vectors
+    d.close()
+
+
+def test_oversized_vector_gets_its_own_batch():
+    vectors = _vectors(3)
+    vectors[1] = ("big", [0.1] * 4, {"text": "x" * 1000})
+    d = UpsertDispatcher(RecordingIndex(), max_request_bytes=_estimate_bytes(vectors[1]) - 1)
+    assert [[v[0] for v in b] for b in d._split(vectors)] == [["v0"], ["big"], ["v2"]]
+    d.close()
+
+
+def test_payload_too_large_halves_and_lowers_the_limit():
+    index = RecordingIndex(max_vectors=16)
+    with UpsertDispatcher(index, max_in_flight=1, max_batch_vectors=100, backoff=0) as d:
+        d.submit(_vectors(100))
+    assert sorted(index.ids) == sorted(f"v{i}" for i in range(100))
+    assert max(index.batches) <= 16
+    assert d.max_batch_vectors <= 16
+    assert d.upserted == 100 and d.retries == 0
+
+    # later batches are cut at the lowered limit up front
+    index.batches.clear()
+    with UpsertDispatcher(index, max_in_flight=1, max_batch_vectors=d.max_batch_vectors) as d2:
+        d2.submit(_vectors(40))
+    assert max(index.batches) <= 16
+
+
+def test_single_vector_too_large_fails():
+    index = RecordingIndex(max_vectors=0)
+    with pytest.raises(Exception, match="too large"):
+        with UpsertDispatcher(index, max_retries=0, backoff=0) as d:
+            d.submit(_vectors(1))
+
+
+def test_transient_errors_are_retried():
+    index = FlakyIndex(failures=2)
+    with UpsertDispatcher(index, max_in_flight=1, max_retries=3, backoff=0) as d:
+        d.submit(_vectors(5))
+    assert index.ids == [f"v{i}" for i in range(5)]
+    assert d.retries == 2
+
+
+def test_retries_exhausted_raises():
+    with pytest.raises(ConnectionError):
+        with UpsertDispatcher(FlakyIndex(failures=5), max_retries=1, backoff=0) as d:
+            d.submit(_vectors(5))
@@ -0,0 +1,175 @@
+# backend/tests/test_vector_store.py
+
+import numpy as np
+import pytest
+
+from backend.scrape_api import vector_store
+from backend.scrape_api.vector_store import LocalIndex, matches_filter
+
+META = {"act": "OUG 195/2002", "url": "https://x/a", "year": 2002}
+
+
+@pytest.mark.parametrize("flt, expected", [
+    ({"act": "OUG 195/2002"}, True),
+    ({"act": "HG 1391/2006"}, False),
+    ({"act": {"$eq": "OUG 195/2002"}}, True),
+    ({"act": {"$ne": "OUG 195/2002"}}, False),
+    ({"year": {"$in": [2001, 2002]}}, True),
+    ({"year": {"$nin": [2001, 2002]}}, False),
+    ({"missing": {"$ne": "x"}}, True),
+    ({"missing": {"$in": ["x"]}}, False),
+    ({"act": "OUG 195/2002", "year": 2003}, False),
+    ({"$and": [{"act": "OUG 195/2002"}, {"url": "https://x/a"}]}, True),
+    ({"$and": [{"act": "OUG 195/2002"}, {"url": "https://x/b"}]}, False),
+    ({"$or": [{"act": "HG 1391/2006"}, {"year": 2002}]}, True),
+    ({"$or": [{"act": "HG 1391/2006"}, {"year": 2003}]}, False),
+    ({}, True),
+])
+def test_matches_filter(flt, expected):
+    assert matches_filter(META, flt) is expected
+
+
+@pytest.fixture
+def index(tmp_path):
+    idx = LocalIndex(str(tmp_path / "vectors"), dimension=8, codec="float32")
+    rng = np.random.default_rng(0)
+    vectors = []
+    for i in range(30):
+        act = ("A", "B", "C")[i % 3]
+        vectors.append((f"v{i}", rng.normal(size=8), {"act": act, "url": f"https://x/{act}/{i % 2}", "n": i}))
+    idx.upsert(vectors)
+    idx.upsert([("other", rng.normal(size=8), {"act": "A"})], namespace="elsewhere")
+    yield idx
+    idx.close()
+
+
+def _ids(idx, rows):
+    return set(idx._row_ids(rows).values())
+
+
+def test_select_partition_fields(index):
+    rows, complete = index._select({"act": "A"})
+    assert complete
+    assert _ids(index, rows) == {f"v{i}" for i in range(0, 30, 3)} | {"other"}
+
+    rows, complete = index._select({"act": {"$in": ["A", "B"]}, "url": "https://x/A/0"})
+    assert complete
+    assert _ids(index, rows) == {f"v{i}" for i in range(0, 30, 6)}
+
+
+def test_select_or_and_non_partition_fields(index):
+    rows, complete = index._select({"$or": [{"act": "B"}, {"act": "C"}]})
+    assert complete
+    assert len(rows) == 20
+
+    # a clause on another field narrows nothing and leaves a post-filter to run
+    rows, complete = index._select({"act": "B", "n": {"$ne": 1}})
+    assert not complete
+    assert len(rows) == 10
+
+    # one $or branch the postings can't answer: no pre-selection at all
+    rows, complete = index._select({"$or": [{"act": "B"}, {"n": 3}]})
+    assert rows is None and not complete
+
+    rows, complete = index._select({"n": 3})
+    assert rows is None and not complete
+
+
+def test_select_unknown_value_is_empty(index):
+    rows, complete = index._select({"act": "Z"})
+    assert rows == set() and complete
+
+
+def test_select_follows_metadata_updates(index):
+    index.upsert([("v0", np.ones(8), {"act": "B"})])
+    rows, _ = index._select({"act": "A"})
+    assert "v0" not in _ids(index, rows)
+    rows, _ = index._select({"act": "B"})
+    assert "v0" in _ids(index, rows)
+    index.delete(ids=["v3"])
+    rows, _ = index._select({"act": "A"})
+    assert "v3" not in _ids(index, rows)
+
+
+@pytest.mark.parametrize("flt", [
+    {"act": "A"},
+    {"act": "B", "n": {"$ne": 1}},
+    {"$or": [{"act": "B"}, {"n": 3}]},
+    {"n": {"$in": [4, 5, 6]}},
+])
+def test_query_filter_matches_brute_force(index, flt):
+    q = np.linspace(-1, 1, 8)
+    res = index.query(q, top_k=5, include_metadata=True, filter=flt)
+    assert all(matches_filter(m.metadata, flt) for m in res.matches)
+
+    everything = index.query(q, top_k=100, include_metadata=True)
+    expected = [m.id for m in everything.matches if matches_filter(m.metadata, flt)][:5]
+    assert [m.id for m in res.matches] == expected
+
+
+def test_list_pages_with_prefix(index):
+    pages = list(index.list(prefix="v1", limit=4))
+    assert [vid for page in pages for vid in page] == sorted(["v1"] + [f"v{i}" for i in range(10, 20)])
+    assert all(len(page) <= 4 for page in pages)
+    assert list(index.list(namespace="elsewhere")) == [["other"]]
+    assert list(index.list(namespace="missing")) == []
+
+
+def test_fetch_and_delete_all(index):
+    found = index.fetch(["v1", "v2", "nope"]).vectors
+    assert set(found) == {"v1", "v2"} and found["v1"].metadata["n"] == 1
+    index.delete(delete_all=True)
+    assert index.describe_index_stats()["namespaces"] == {"elsewhere": {"vector_count": 1}}
+    rows, _ = index._select({"act": "A"})
+    assert _ids(index, rows) == {"other"}
+
+
+def test_deleted_rows_are_reused(index):
+    index.delete(ids=["v1", "v2"])
+    n = index._n
+    index.upsert([("new1", np.ones(8)), ("new2", np.ones(8)), ("new3", np.ones(8))])
+    assert index._n == n + 1
+    assert index.describe_index_stats()["total_vector_count"] == 32
+
+
+def _peer(idx):
+    return LocalIndex(idx.path, refresh_seconds=0)
+
+
+def test_other_process_writes_are_replayed(index):
+    peer = _peer(index)
+    try:
+        q = np.linspace(-1, 1, 8)
+        peer.upsert([("late", q, {"act": "D"})])
+        peer.delete(ids=["v0"])
+        index._next_check = 0
+        res = index.query(q, top_k=1, filter={"act": "D"})
+        assert [m.id for m in res.matches] == ["late"]
+        assert "v0" not in index.fetch(["v0"]).vectors
+        assert index._seq == peer._seq
+
+        # and the other way round: the peer allocates past the rows it knows
+        index.upsert([(f"more{i}", np.ones(8)) for i in range(5)])
+        assert peer.describe_index_stats()["total_vector_count"] == index.describe_index_stats()["total_vector_count"]
+    finally:
+        peer.close()
+
+
+def test_truncated_change_log_reloads(index, monkeypatch):
+    peer = _peer(index)
+    try:
+        monkeypatch.setattr(vector_store, "CHANGE_LOG_ROWS", 2)
+        for i in range(3):
+            peer.upsert([(f"p{i}", np.ones(8), {"act": "D"})])
+        index._next_check = 0
+        stats = index.describe_index_stats()
+        assert stats["namespaces"][""]["vector_count"] == 33
+        assert index._seq == peer._seq
+    finally:
+        peer.close()
+
+
+def test_footprint_counts_the_bookkeeping(index):
+    footprint = index.footprint()
+    assert footprint["bookkeeping_bytes"] == index._row_ns.nbytes
+    assert footprint["stored_bytes"] == 31 * 8 * 4
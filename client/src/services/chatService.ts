@@ -31,6 +31,12 @@ export interface MessageItem {
 export interface ConversationHistory {
   conversation_id: number;
   messages: MessageItem[];
+  next_cursor?: number | null; // pass as `before` to load older messages
+}
+
+export interface ConversationPage {
+  conversations: ConversationSummary[];
+  next_cursor?: string | null; // pass as `cursor` to load the next page
 }
 
 export async function chatService(
@@ -40,18 +46,49 @@ export async function chatService(
   return response.data;
 }
 
+export async function getConversationsPage(
+  cursor?: string
+): Promise<ConversationPage> {
+  const response = await apiClient.get<ConversationPage>("/conversations", {
+    params: cursor ? { cursor } : undefined,
+  });
+  return response.data;
+}
+
 export async function getConversationsList(): Promise<ConversationSummary[]> {
-  const response = await apiClient.get<ConversationSummary[]>("/conversations");
+  const conversations: ConversationSummary[] = [];
+  let cursor: string | undefined;
+  do {
+    const page = await getConversationsPage(cursor);
+    conversations.push(...page.conversations);
+    cursor = page.next_cursor ?? undefined;
+  } while (cursor);
+  return conversations;
+}
+
+export async function getConversationHistoryPage(
+  conversation_id: number,
+  before?: number
+): Promise<ConversationHistory> {
+  const response = await apiClient.get<ConversationHistory>(
+    `/conversations/${conversation_id}`,
+    { params: before !== undefined ? { before } : undefined }
+  );
   return response.data;
 }
 
 //
-// 2.2.2. Fetch full history of one conversation
+// 2.2.2. Fetch full history of one conversation (pages come newest first,
+// each oldest-first; older pages are prepended)
 export async function getConversationHistory(
   conversation_id: number
 ): Promise<ConversationHistory> {
-  const response = await apiClient.get<ConversationHistory>(
-    `/conversations/${conversation_id}`
-  );
-  return response.data;
+  const messages: MessageItem[] = [];
+  let before: number | undefined;
+  do {
+    const page = await getConversationHistoryPage(conversation_id, before);
+    messages.unshift(...page.messages);
+    before = page.next_cursor ?? undefined;
+  } while (before !== undefined);
+  return { conversation_id, messages, next_cursor: null };
 }